@@ -0,0 +1,346 @@
+"""
+Measure the throughput of the SQL analysers, without a Django project.
+
+    python -m benchmarks.analysers --migrations 1000 --output results.json
+
+The analysers run on corpora of generated migrations:
+
+- realistic: the SQL that Django generates for the common operations of each
+  database vendor, with varying tables and columns,
+- adversarial: long and deeply nested statements, quotes and comments full of
+  keywords and semicolons, and statements with many clauses.
+
+The throughput is measured with analyse_sql_statements, that builds an
+analyser per migration, and with a single analyser reused for all the
+migrations. A separate run counts the evaluations and the time of each check.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from typing import Callable, Type
+
+from django_migration_linter.constants import __version__
+from django_migration_linter.sql_analyser import (
+    BaseAnalyser,
+    MySqlAnalyser,
+    PostgresqlAnalyser,
+    SqliteAnalyser,
+    analyse_sql_statements,
+)
+from django_migration_linter.sql_analyser.base import CheckStatistics
+
+ANALYSERS: dict[str, Type[BaseAnalyser]] = {
+    "postgresql": PostgresqlAnalyser,
+    "mysql": MySqlAnalyser,
+    "sqlite": SqliteAnalyser,
+}
+QUOTES = {"postgresql": '"', "mysql": "`", "sqlite": '"'}
+
+
+class CorpusGenerator:
+    """
+    Generates the SQL statements of migrations, with unique table and column
+    names so that the parsed statements are not shared between migrations.
+    """
+
+    def __init__(self, vendor: str, seed: int = 0):
+        self.vendor = vendor
+        self.quote = QUOTES[vendor]
+        self.random = random.Random(f"{seed}-{vendor}")
+        self.counter = 0
+
+    def name(self, prefix: str) -> str:
+        self.counter += 1
+        return f"{self.quote}{prefix}_{self.counter}{self.quote}"
+
+    def generate(
+        self, corpus: str, nb_migrations: int, scale: int = 1
+    ) -> list[list[str]]:
+        templates: list[Callable[[], list[str]]]
+        if corpus == "realistic":
+            templates = [
+                self.create_table,
+                self.add_column,
+                self.alter_column,
+                self.create_index,
+                self.add_unique,
+                self.add_foreign_key,
+                self.drop_column,
+                self.rename_column,
+                self.drop_table,
+                self.data_migration,
+            ]
+            if self.vendor == "postgresql":
+                templates.append(self.create_function)
+            if self.vendor == "sqlite":
+                templates.append(self.remake_table)
+        else:
+            templates = [
+                lambda: self.long_insert(200 * scale),
+                lambda: self.nested_check(50 * scale),
+                lambda: self.quoted_keywords(100 * scale),
+                lambda: self.commented_keywords(100 * scale),
+                lambda: self.many_clauses(100 * scale),
+                lambda: self.wide_table(200 * scale),
+                self.unterminated_quote,
+            ]
+
+        migrations = []
+        for _ in range(nb_migrations):
+            statements = ["BEGIN;"]
+            for template in self.random.choices(templates, k=self.random.randint(1, 4)):
+                statements += template()
+            statements.append("COMMIT;")
+            migrations.append(statements)
+        return migrations
+
+    def column_type(self) -> str:
+        return self.random.choice(
+            ["integer", "bigint", "varchar(255)", "boolean", "timestamp"]
+        )
+
+    def create_table(self) -> list[str]:
+        table = self.name("app_model")
+        return [
+            f"CREATE TABLE {table} ({self.name('id')} integer NOT NULL PRIMARY KEY, "
+            f"{self.name('name')} varchar(100) NOT NULL, "
+            f"{self.name('value')} {self.column_type()} NULL);"
+        ]
+
+    def add_column(self) -> list[str]:
+        table, column = self.name("app_model"), self.name("field")
+        statements = [
+            f"ALTER TABLE {table} ADD COLUMN {column} integer DEFAULT 0 NOT NULL;"
+        ]
+        if self.vendor != "sqlite":
+            statements.append(
+                f"ALTER TABLE {table} ALTER COLUMN {column} DROP DEFAULT;"
+            )
+        return statements
+
+    def alter_column(self) -> list[str]:
+        table, column = self.name("app_model"), self.name("field")
+        if self.vendor == "mysql":
+            return [f"ALTER TABLE {table} MODIFY {column} bigint NULL;"]
+        return [
+            f"ALTER TABLE {table} ALTER COLUMN {column} TYPE bigint "
+            f"USING {column}::bigint;"
+        ]
+
+    def create_index(self) -> list[str]:
+        table, column = self.name("app_model"), self.name("field")
+        return [f"CREATE INDEX {self.name('app_model_idx')} ON {table} ({column});"]
+
+    def add_unique(self) -> list[str]:
+        table = self.name("app_model")
+        return [
+            f"ALTER TABLE {table} ADD CONSTRAINT {self.name('app_model_uniq')} "
+            f"UNIQUE ({self.name('a')}, {self.name('b')});"
+        ]
+
+    def add_foreign_key(self) -> list[str]:
+        table, column = self.name("app_model"), self.name("parent_id")
+        return [
+            f"ALTER TABLE {table} ADD CONSTRAINT {self.name('app_model_fk')} "
+            f"FOREIGN KEY ({column}) REFERENCES {self.name('app_parent')} "
+            f"({self.name('id')}) DEFERRABLE INITIALLY DEFERRED;"
+        ]
+
+    def drop_column(self) -> list[str]:
+        return [
+            f"ALTER TABLE {self.name('app_model')} DROP COLUMN "
+            f"{self.name('field')} CASCADE;"
+        ]
+
+    def rename_column(self) -> list[str]:
+        table, column = self.name("app_model"), self.name("field")
+        if self.vendor == "mysql":
+            return [f"ALTER TABLE {table} CHANGE {column} {self.name('new')} integer;"]
+        return [f"ALTER TABLE {table} RENAME COLUMN {column} TO {self.name('new')};"]
+
+    def drop_table(self) -> list[str]:
+        return [f"DROP TABLE {self.name('app_model')} CASCADE;"]
+
+    def data_migration(self) -> list[str]:
+        table, column = self.name("app_model"), self.name("field")
+        return [
+            f"UPDATE {table} SET {column} = 'value; DROP TABLE' "
+            f"WHERE {self.name('id')} IN (1, 2, 3);",
+            f"INSERT INTO {table} ({column}) VALUES ('a'), ('b');",
+        ]
+
+    def create_function(self) -> list[str]:
+        return [
+            f"CREATE FUNCTION {self.name('app_trigger')}() RETURNS trigger AS $$ "
+            "BEGIN NEW.updated = now(); RETURN NEW; END; $$ LANGUAGE plpgsql;"
+        ]
+
+    def remake_table(self) -> list[str]:
+        table, new_table = self.name("app_model"), self.name("new__app_model")
+        column = self.name("field")
+        return [
+            f"CREATE TABLE {new_table} ({column} integer NOT NULL);",
+            f"INSERT INTO {new_table} ({column}) SELECT {column} FROM {table};",
+            f"DROP TABLE {table};",
+            f"ALTER TABLE {new_table} RENAME TO {table};",
+        ]
+
+    def long_insert(self, nb_rows: int) -> list[str]:
+        values = ", ".join(f"({i}, 'row {i}', NULL)" for i in range(nb_rows))
+        return [f"INSERT INTO {self.name('app_model')} VALUES {values};"]
+
+    def nested_check(self, depth: int) -> list[str]:
+        column = self.name("field")
+        condition = "(" * depth + f"{column} > 0" + ")" * depth
+        return [
+            f"ALTER TABLE {self.name('app_model')} ADD CONSTRAINT "
+            f"{self.name('check')} CHECK {condition};"
+        ]
+
+    def quoted_keywords(self, nb_strings: int) -> list[str]:
+        strings = ", ".join(
+            f"'ALTER TABLE; DROP COLUMN {i}; RENAME TO x'" for i in range(nb_strings)
+        )
+        return [f"INSERT INTO {self.name('app_model')} VALUES ({strings});"]
+
+    def commented_keywords(self, nb_comments: int) -> list[str]:
+        comments = " ".join(
+            f"/* DROP TABLE {i}; */ -- RENAME COLUMN;\n" for i in range(nb_comments)
+        )
+        return [f"{comments}UPDATE {self.name('app_model')} SET a = 1;"]
+
+    def many_clauses(self, nb_clauses: int) -> list[str]:
+        clauses = ", ".join(
+            f"ADD COLUMN {self.name('field')} integer DEFAULT 1 NOT NULL"
+            for _ in range(nb_clauses)
+        )
+        return [f"ALTER TABLE {self.name('app_model')} {clauses};"]
+
+    def wide_table(self, nb_columns: int) -> list[str]:
+        columns = ", ".join(
+            f"{self.name('field')} varchar(10) NOT NULL" for _ in range(nb_columns)
+        )
+        return [f"CREATE TABLE {self.name('app_model')} ({columns});"]
+
+    def unterminated_quote(self) -> list[str]:
+        return [f"UPDATE {self.name('app_model')} SET a = 'DROP COLUMN; RENAME"]
+
+
+def time_analysis(
+    analyser_class: Type[BaseAnalyser],
+    migrations: list[list[str]],
+    reuse: bool = False,
+    check_stats: CheckStatistics | None = None,
+) -> float:
+    """Analyse the migrations, and return the elapsed time."""
+    start = time.perf_counter()
+    if reuse:
+        analyser = analyser_class(None, check_stats=check_stats)
+        for statements in migrations:
+            analyser.errors, analyser.ignored, analyser.warnings = [], [], []
+            analyser.analyse(statements)
+    else:
+        for statements in migrations:
+            analyse_sql_statements(analyser_class, statements, check_stats=check_stats)
+    return time.perf_counter() - start
+
+
+def benchmark_analyser(
+    analyser_class: Type[BaseAnalyser], migrations: list[list[str]], repeat: int
+) -> dict:
+    nb_statements = sum(len(statements) for statements in migrations)
+    results: dict = {"migrations": len(migrations), "statements": nb_statements}
+    for mode, reuse in (("analyse_sql_statements", False), ("reuse", True)):
+        elapsed = min(
+            time_analysis(analyser_class, migrations, reuse=reuse)
+            for _ in range(repeat)
+        )
+        results[mode] = {
+            "time": elapsed,
+            "statements_per_second": nb_statements / elapsed,
+        }
+
+    check_stats = CheckStatistics()
+    elapsed = time_analysis(analyser_class, migrations, check_stats=check_stats)
+    results["checks"] = {
+        code: {
+            **stats,
+            "evaluations_per_second": (
+                stats["evaluated"] / stats["time"] if stats["time"] else None
+            ),
+            "share": stats["time"] / elapsed,
+        }
+        for code, stats in check_stats.as_dict().items()
+    }
+    return results
+
+
+def main(argv: list[str] | None = None) -> dict:
+    parser = argparse.ArgumentParser(
+        description="Measure the throughput of the SQL analysers."
+    )
+    parser.add_argument("--migrations", type=int, default=1000)
+    parser.add_argument(
+        "--scale",
+        type=int,
+        default=1,
+        help="size multiplier of the adversarial statements",
+    )
+    parser.add_argument(
+        "--analysers", nargs="+", choices=list(ANALYSERS), default=list(ANALYSERS)
+    )
+    parser.add_argument(
+        "--corpora",
+        nargs="+",
+        choices=["realistic", "adversarial"],
+        default=["realistic", "adversarial"],
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    analysers: dict[str, dict] = {}
+    for vendor in args.analysers:
+        for corpus in args.corpora:
+            migrations = CorpusGenerator(vendor, args.seed).generate(
+                corpus, args.migrations, args.scale
+            )
+            results = benchmark_analyser(ANALYSERS[vendor], migrations, args.repeat)
+            analysers.setdefault(vendor, {})[corpus] = results
+            print(
+                "{:<11} {:<12} {:>10.0f} statements/s, {:>10.0f} reused".format(
+                    vendor,
+                    corpus,
+                    results["analyse_sql_statements"]["statements_per_second"],
+                    results["reuse"]["statements_per_second"],
+                ),
+                file=sys.stderr,
+            )
+
+    results = {
+        "version": __version__,
+        "python_version": platform.python_version(),
+        "platform": platform.platform(),
+        "migrations": args.migrations,
+        "scale": args.scale,
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "analysers": analysers,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import os
+import random
+import textwrap
+from dataclasses import dataclass, field
+
+# The operations of the generated migrations, with their default weight.
+DEFAULT_OPERATION_MIX = {
+    "add_field": 4,
+    "alter_field": 2,
+    "run_python": 1,
+    "run_sql": 1,
+    "add_index": 2,
+}
+# The type that each type of column is altered to.
+ALTERED_FIELD_TYPES = {
+    "IntegerField": "BigIntegerField",
+    "BigIntegerField": "IntegerField",
+}
+SETTINGS_MODULE = "bench_project.settings"
+
+SETTINGS_TEMPLATE = """\
+from __future__ import annotations
+
+import os
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SECRET_KEY = "benchmark"
+USE_TZ = True
+DEFAULT_AUTO_FIELD = "django.db.models.AutoField"
+INSTALLED_APPS = [
+    "django_migration_linter",
+{apps}
+]
+DATABASES = {{
+    "default": {{
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
+    }}
+}}
+"""
+
+MIGRATION_TEMPLATE = """\
+from __future__ import annotations
+
+from django.db import migrations, models
+{imports}
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+{dependencies}
+    ]
+
+    operations = [
+{operations}
+    ]
+"""
+
+RUN_PYTHON_TEMPLATE = """\
+def forward_{index}(apps, schema_editor):
+    Model = apps.get_model("{app_label}", "Model")
+    Model.objects.filter({field}__isnull=True).update({field}=0)
+
+"""
+
+
+@dataclass
+class ProjectSpec:
+    """
+    The shape of a generated project: its number of apps, their number of
+    migrations, and the weights of the operations of the migrations.
+    """
+
+    apps: int = 20
+    migrations: int = 25
+    operation_mix: dict[str, int] = field(
+        default_factory=lambda: dict(DEFAULT_OPERATION_MIX)
+    )
+    seed: int = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "apps": self.apps,
+            "migrations": self.migrations,
+            "operation_mix": self.operation_mix,
+            "seed": self.seed,
+        }
+
+
+def parse_operation_mix(value: str) -> dict[str, int]:
+    """
+    Parse an operation mix like 'add_field=4,run_sql=1'.
+    """
+    operation_mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_OPERATION_MIX:
+            raise ValueError(
+                "Unknown operation '{}', expected one of: {}".format(
+                    name, ", ".join(DEFAULT_OPERATION_MIX)
+                )
+            )
+        operation_mix[name] = int(weight or 1)
+    return operation_mix
+
+
+def get_app_label(app_index: int) -> str:
+    return f"bench_app_{app_index:03d}"
+
+
+def get_migration_name(migration_index: int) -> str:
+    if migration_index == 1:
+        return "0001_initial"
+    return f"{migration_index:04d}_change"
+
+
+class AppGenerator:
+    """
+    Writes the migrations of an app, that change a single model. The fields
+    of the model are tracked, so that each operation is valid on the state
+    left by the previous migrations.
+    """
+
+    def __init__(self, spec: ProjectSpec, app_index: int, path: str):
+        self.spec = spec
+        self.app_index = app_index
+        self.app_label = get_app_label(app_index)
+        self.path = path
+        self.random = random.Random(f"{spec.seed}-{app_index}")
+        self.fields: dict[str, str] = {}
+        self.nb_indexes = 0
+
+    def write(self) -> None:
+        app_path = os.path.join(self.path, self.app_label)
+        migrations_path = os.path.join(app_path, "migrations")
+        os.makedirs(migrations_path, exist_ok=True)
+        for package in (app_path, migrations_path):
+            open(os.path.join(package, "__init__.py"), "w").close()
+
+        for migration_index in range(1, self.spec.migrations + 1):
+            content = self.get_migration(migration_index)
+            path = os.path.join(
+                migrations_path, get_migration_name(migration_index) + ".py"
+            )
+            with open(path, "w") as file:
+                file.write(content)
+
+    def get_migration(self, migration_index: int) -> str:
+        if migration_index == 1:
+            return self.get_initial_migration()
+
+        names, weights = zip(*self.spec.operation_mix.items())
+        operation = self.random.choices(names, weights)[0]
+        imports, code = getattr(self, f"get_{operation}")(migration_index)
+        return MIGRATION_TEMPLATE.format(
+            imports=imports,
+            dependencies=self.format_dependencies(
+                [(self.app_label, get_migration_name(migration_index - 1))]
+            ),
+            operations=textwrap.indent(code, " " * 8),
+        )
+
+    def get_initial_migration(self) -> str:
+        self.fields = {"name": "CharField", "value": "IntegerField"}
+        fields = [
+            '("id", models.AutoField(primary_key=True))',
+            '("name", models.CharField(max_length=100))',
+            '("value", models.IntegerField(null=True))',
+        ]
+        dependencies = []
+        if self.app_index > 0:
+            # The apps depend on each other, like in a real project.
+            other_app_label = get_app_label(self.app_index - 1)
+            fields.append(
+                '("parent", models.ForeignKey(null=True, '
+                "on_delete=models.deletion.CASCADE, "
+                f'to="{other_app_label}.model"))'
+            )
+            dependencies.append((other_app_label, "0001_initial"))
+
+        return MIGRATION_TEMPLATE.format(
+            imports="",
+            dependencies=self.format_dependencies(dependencies),
+            operations=textwrap.indent(
+                "migrations.CreateModel(\n"
+                '    name="Model",\n'
+                "    fields=[\n"
+                + "".join(f"        {f},\n" for f in fields)
+                + "    ],\n"
+                "),",
+                " " * 8,
+            ),
+        )
+
+    def get_add_field(self, migration_index: int) -> tuple[str, str]:
+        name = f"field_{migration_index}"
+        self.fields[name] = "IntegerField"
+        return "", (
+            "migrations.AddField(\n"
+            '    model_name="model",\n'
+            f'    name="{name}",\n'
+            "    field=models.IntegerField(null=True),\n"
+            "),"
+        )
+
+    def get_alter_field(self, migration_index: int) -> tuple[str, str]:
+        name = self.random.choice(
+            [name for name, kind in self.fields.items() if kind in ALTERED_FIELD_TYPES]
+        )
+        kind = ALTERED_FIELD_TYPES[self.fields[name]]
+        self.fields[name] = kind
+        return "", (
+            "migrations.AlterField(\n"
+            '    model_name="model",\n'
+            f'    name="{name}",\n'
+            f"    field=models.{kind}(null=True),\n"
+            "),"
+        )
+
+    def get_run_python(self, migration_index: int) -> tuple[str, str]:
+        name = self.random.choice(list(self.fields))
+        imports = "\n\n" + RUN_PYTHON_TEMPLATE.format(
+            index=migration_index, app_label=self.app_label, field=name
+        )
+        return imports, (
+            f"migrations.RunPython(forward_{migration_index}, "
+            "migrations.RunPython.noop),"
+        )
+
+    def get_run_sql(self, migration_index: int) -> tuple[str, str]:
+        name = self.random.choice(list(self.fields))
+        table = f"{self.app_label}_model"
+        return "", (
+            "migrations.RunSQL(\n"
+            f'    "UPDATE {table} SET {name} = NULL WHERE id < 0;",\n'
+            "    migrations.RunSQL.noop,\n"
+            "),"
+        )
+
+    def get_add_index(self, migration_index: int) -> tuple[str, str]:
+        name = self.random.choice(list(self.fields))
+        self.nb_indexes += 1
+        index_name = f"b{self.app_index:03d}_idx_{self.nb_indexes}"
+        return "", (
+            "migrations.AddIndex(\n"
+            '    model_name="model",\n'
+            f'    index=models.Index(fields=["{name}"], name="{index_name}"),\n'
+            "),"
+        )
+
+    @staticmethod
+    def format_dependencies(dependencies: list[tuple[str, str]]) -> str:
+        return "\n".join(
+            f'        ("{app_label}", "{name}"),' for app_label, name in dependencies
+        )
+
+
+def generate_project(spec: ProjectSpec, path: str) -> list[str]:
+    """
+    Write a Django project with the apps and migrations of the spec, and
+    return the labels of its apps.
+    """
+    app_labels = []
+    for app_index in range(spec.apps):
+        generator = AppGenerator(spec, app_index, path)
+        generator.write()
+        app_labels.append(generator.app_label)
+
+    project_path = os.path.join(path, "bench_project")
+    os.makedirs(project_path, exist_ok=True)
+    open(os.path.join(project_path, "__init__.py"), "w").close()
+    with open(os.path.join(project_path, "settings.py"), "w") as file:
+        file.write(
+            SETTINGS_TEMPLATE.format(
+                apps="\n".join(f'    "{label}",' for label in app_labels)
+            )
+        )
+    return app_labels
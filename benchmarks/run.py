@@ -0,0 +1,243 @@
+"""
+Time the lintmigrations command on a generated Django project.
+
+    python -m benchmarks.run --apps 20 --migrations 25 --output results.json
+
+Each scenario runs the command in a new process, like in a CI job:
+
+- cold: lint all migrations with an empty cache,
+- warm: lint all migrations again with the cache of the cold run,
+- git_diff: lint the migrations added since a commit, with an empty cache,
+- single_app: lint the migrations of one app, with an empty cache.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable
+
+import django
+
+from django_migration_linter.constants import __version__
+
+from .project import (
+    DEFAULT_OPERATION_MIX,
+    SETTINGS_MODULE,
+    ProjectSpec,
+    generate_project,
+    get_app_label,
+    get_migration_name,
+    parse_operation_mix,
+)
+
+SCENARIOS = ("cold", "warm", "git_diff", "single_app")
+SRC_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "src")
+
+
+class Benchmark:
+    """
+    A generated project in a git repository, and the scenarios to lint it.
+    """
+
+    def __init__(self, spec: ProjectSpec, path: str, diff_apps: int = 3, jobs: int = 1):
+        self.spec = spec
+        self.path = path
+        self.diff_apps = min(diff_apps, spec.apps)
+        self.jobs = jobs
+
+    def setup(self) -> None:
+        generate_project(self.spec, self.path)
+        self.setup_git()
+
+    def setup_git(self) -> None:
+        """
+        Commit the project, then the last migration of some of its apps, so
+        that they are the migrations of the diff with the previous commit.
+        """
+        added_paths = [
+            os.path.join(
+                get_app_label(app_index),
+                "migrations",
+                get_migration_name(self.spec.migrations) + ".py",
+            )
+            for app_index in range(self.diff_apps)
+        ]
+        self.git("init", "-q")
+        self.git("add", "-A")
+        self.git("reset", "-q", "--", *added_paths)
+        self.git("commit", "-q", "-m", "Project")
+        self.git("add", "--", *added_paths)
+        self.git("commit", "-q", "-m", "New migrations")
+
+    def git(self, *args: str) -> None:
+        subprocess.run(
+            [
+                "git",
+                "-c",
+                "user.name=benchmark",
+                "-c",
+                "user.email=benchmark@example.com",
+                *args,
+            ],
+            cwd=self.path,
+            check=True,
+        )
+
+    def lint(self, cache_path: str, *args: str) -> float:
+        """
+        Run the lintmigrations command, and return its wall time.
+        """
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE=SETTINGS_MODULE,
+            PYTHONPATH=os.pathsep.join(
+                [self.path, SRC_PATH, os.environ.get("PYTHONPATH", "")]
+            ),
+        )
+        command = [
+            sys.executable,
+            "-m",
+            "django",
+            "lintmigrations",
+            "--project-root-path",
+            self.path,
+            "--cache-path",
+            cache_path,
+            "--jobs",
+            str(self.jobs),
+            *args,
+        ]
+        start = time.perf_counter()
+        process = subprocess.run(
+            command, cwd=self.path, env=env, capture_output=True, text=True
+        )
+        elapsed = time.perf_counter() - start
+        # The command fails when the migrations have errors, but not with a
+        # traceback.
+        if process.returncode not in (0, 1) or "Traceback" in process.stderr:
+            raise RuntimeError(
+                "lintmigrations failed:\n{}".format(process.stderr or process.stdout)
+            )
+        return elapsed
+
+    def run_scenario(self, scenario: str, repeat: int) -> list[float]:
+        run: Callable[[str], float] = getattr(self, f"run_{scenario}")
+        timings = []
+        for _ in range(repeat):
+            cache_path = tempfile.mkdtemp(prefix="dml-benchmark-cache-")
+            try:
+                timings.append(run(cache_path))
+            finally:
+                shutil.rmtree(cache_path)
+        return timings
+
+    def run_cold(self, cache_path: str) -> float:
+        return self.lint(cache_path)
+
+    def run_warm(self, cache_path: str) -> float:
+        self.lint(cache_path)
+        return self.lint(cache_path)
+
+    def run_git_diff(self, cache_path: str) -> float:
+        return self.lint(cache_path, "--git-commit-id", "HEAD~1")
+
+    def run_single_app(self, cache_path: str) -> float:
+        # The last app depends on all the others.
+        return self.lint(cache_path, get_app_label(self.spec.apps - 1))
+
+
+def summarize(timings: list[float]) -> dict:
+    return {
+        "timings": timings,
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "max": max(timings),
+    }
+
+
+def main(argv: list[str] | None = None) -> dict:
+    parser = argparse.ArgumentParser(
+        description="Time the lintmigrations command on a generated project."
+    )
+    parser.add_argument("--apps", type=int, default=ProjectSpec.apps)
+    parser.add_argument("--migrations", type=int, default=ProjectSpec.migrations)
+    parser.add_argument(
+        "--mix",
+        type=parse_operation_mix,
+        default=dict(DEFAULT_OPERATION_MIX),
+        help=(
+            "weights of the operations of the migrations, like "
+            "'add_field=4,alter_field=2,run_python=1,run_sql=1,add_index=2'"
+        ),
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS)
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--diff-apps",
+        type=int,
+        default=3,
+        help="number of apps with a new migration in the git diff scenario",
+    )
+    parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument(
+        "--keep", help="generate the project in this directory, and keep it"
+    )
+    args = parser.parse_args(argv)
+
+    spec = ProjectSpec(
+        apps=args.apps,
+        migrations=args.migrations,
+        operation_mix=args.mix,
+        seed=args.seed,
+    )
+    path = args.keep or tempfile.mkdtemp(prefix="dml-benchmark-")
+    os.makedirs(path, exist_ok=True)
+    try:
+        benchmark = Benchmark(spec, path, diff_apps=args.diff_apps, jobs=args.jobs)
+        benchmark.setup()
+        scenarios = {}
+        for scenario in args.scenarios:
+            scenarios[scenario] = summarize(
+                benchmark.run_scenario(scenario, args.repeat)
+            )
+            print(
+                "{:<12} median {:.3f}s".format(scenario, scenarios[scenario]["median"]),
+                file=sys.stderr,
+            )
+    finally:
+        if not args.keep:
+            shutil.rmtree(path)
+
+    results = {
+        "version": __version__,
+        "django_version": django.__version__,
+        "python_version": platform.python_version(),
+        "platform": platform.platform(),
+        "project": spec.as_dict(),
+        "jobs": args.jobs,
+        "repeat": args.repeat,
+        "scenarios": scenarios,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -2,28 +2,244 @@ from __future__ import annotations
 
 import os
 import pickle
+import sqlite3
+from typing import Any, Callable, Iterable, Iterator, Mapping
 
+_MISSING = object()
+
+# Bumped whenever the layout of the tables changes, to drop the stale entries.
+SCHEMA_VERSION = 1
+
+# Lint results, the generated SQL they are computed from, and the file digests.
+TABLES = ("lint_result", "generated_sql", "file_digest")
+
+
+class Cache:
+    """
+    Values stored in a table of an SQLite file, and looked up by migration hash.
+
+    Entries are keyed by a fingerprint as well, like the linter options for
+    the lint results, so that runs with different options share the file
+    without serving each other's values.
+
+    Entries are written as soon as they are computed. Each run gets a new
+    generation number, and the entries written or used during the run are
+    marked with it. Saving the cache prunes the entries of older generations
+    that have the same fingerprint.
+    """
+
+    def __init__(
+        self,
+        django_folder: str | None,
+        database: str,
+        cache_path: str,
+        fingerprint: str = "",
+        table: str = "lint_result",
+    ):
+        if table not in TABLES:
+            raise ValueError(f"Unknown cache table {table}")
 
-class Cache(dict):
-    def __init__(self, django_folder: str | None, database: str, cache_path: str):
         self.filename = os.path.join(
             cache_path,
-            "{}_{}.pickle".format(str(django_folder).replace(os.sep, "_"), database),
+            "{}_{}.sqlite3".format(str(django_folder).replace(os.sep, "_"), database),
         )
 
         if not os.path.exists(os.path.dirname(self.filename)):
             os.makedirs(os.path.dirname(self.filename))
 
-        super().__init__()
+        self.fingerprint = fingerprint
+        self.table = table
+        self._connection: sqlite3.Connection | None = None
+        self._generation: int | None = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.filename, timeout=30)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            (schema_version,) = self._connection.execute(
+                "PRAGMA user_version"
+            ).fetchone()
+            with self._connection:
+                if schema_version != SCHEMA_VERSION:
+                    for table in TABLES:
+                        self._connection.execute(f"DROP TABLE IF EXISTS {table}")
+                    self._connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                self._connection.execute(
+                    f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                    "fingerprint TEXT NOT NULL, "
+                    "hash TEXT NOT NULL, "
+                    "value BLOB NOT NULL, "
+                    "generation INTEGER NOT NULL, "
+                    "PRIMARY KEY (fingerprint, hash))"
+                )
+                self._connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS {self.table}_generation "
+                    f"ON {self.table} (fingerprint, generation)"
+                )
+                self._connection.execute(
+                    "CREATE TABLE IF NOT EXISTS metadata ("
+                    "key TEXT PRIMARY KEY, "
+                    "value INTEGER NOT NULL)"
+                )
+        return self._connection
+
+    @property
+    def generation(self) -> int:
+        """
+        The generation of the current run, allocated on first use.
+
+        Processes taking part in the same run share the generation by setting it.
+        """
+        if self._generation is None:
+            with self.connection:
+                self.connection.execute(
+                    "INSERT INTO metadata (key, value) VALUES ('generation', 1) "
+                    "ON CONFLICT (key) DO UPDATE SET value = value + 1"
+                )
+                (self._generation,) = self.connection.execute(
+                    "SELECT value FROM metadata WHERE key = 'generation'"
+                ).fetchone()
+        return self._generation
+
+    @generation.setter
+    def generation(self, generation: int) -> None:
+        self._generation = generation
 
     def load(self) -> None:
-        try:
-            with open(self.filename, "rb") as f:
-                tmp_dict = pickle.load(f)
-                self.update(tmp_dict)
-        except OSError:
-            pass
+        # Entries are looked up on demand, opening the file is enough.
+        self.connection
+
+    def save(self) -> None:
+        with self.connection:
+            self.connection.execute(
+                f"DELETE FROM {self.table} WHERE fingerprint = ? AND generation < ?",
+                (self.fingerprint, self.generation),
+            )
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def clear(self) -> None:
+        with self.connection:
+            self.connection.execute(f"DELETE FROM {self.table}")
+
+    def touch(self, key: str) -> None:
+        """Mark an entry as used during the current run, to keep it when pruning."""
+        self.touch_many([key])
+
+    def touch_many(self, keys: Iterable[str]) -> None:
+        with self.connection:
+            self.connection.executemany(
+                f"UPDATE {self.table} SET generation = ? "
+                "WHERE fingerprint = ? AND hash = ?",
+                ((self.generation, self.fingerprint, key) for key in keys),
+            )
+
+    def get(self, key: str, default: Any = None) -> Any:
+        row = self.connection.execute(
+            f"SELECT value FROM {self.table} WHERE fingerprint = ? AND hash = ?",
+            (self.fingerprint, key),
+        ).fetchone()
+        if row is None:
+            return default
+        return pickle.loads(row[0])
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, default=_MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.update({key: value})
+
+    def update(self, values: Mapping[str, Any]) -> None:
+        """Upsert several entries in a single transaction."""
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT INTO {self.table} (fingerprint, hash, value, generation) "
+                "VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (fingerprint, hash) DO UPDATE SET "
+                "value = excluded.value, generation = excluded.generation",
+                (
+                    (self.fingerprint, key, pickle.dumps(value), self.generation)
+                    for key, value in values.items()
+                ),
+            )
+
+    def items(self) -> Iterator[tuple[str, Any]]:
+        for key, value in self.connection.execute(
+            f"SELECT hash, value FROM {self.table} WHERE fingerprint = ?",
+            (self.fingerprint,),
+        ):
+            yield key, pickle.loads(value)
+
+    def __contains__(self, key: object) -> bool:
+        return (
+            self.connection.execute(
+                f"SELECT 1 FROM {self.table} WHERE fingerprint = ? AND hash = ?",
+                (self.fingerprint, key),
+            ).fetchone()
+            is not None
+        )
+
+    def __len__(self) -> int:
+        (count,) = self.connection.execute(
+            f"SELECT COUNT(*) FROM {self.table} WHERE fingerprint = ?",
+            (self.fingerprint,),
+        ).fetchone()
+        return count
+
+
+class StatManifest:
+    """
+    Digests of files, reused as long as the stat signature of a file is unchanged.
+
+    The signature is the (size, mtime_ns, inode) of the file, so that unchanged
+    files are not read at all. The manifest is read from the cache at once,
+    and the entries used since the last flush are written back together.
+    """
+
+    def __init__(self, cache: Cache, compute_digest: Callable[[str], str]):
+        self.cache = cache
+        self.compute_digest = compute_digest
+        self._entries: dict[str, tuple[tuple[int, int, int], str]] | None = None
+        self._changed: dict[str, tuple[tuple[int, int, int], str]] = {}
+        self._used: set[str] = set()
+
+    def get_digest(self, path: str) -> str:
+        if self._entries is None:
+            self._entries = dict(self.cache.items())
+
+        stat = os.stat(path)
+        signature = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        entry = self._entries.get(path)
+        if entry is None or entry[0] != signature:
+            entry = (signature, self.compute_digest(path))
+            self._entries[path] = entry
+            self._changed[path] = entry
+        self._used.add(path)
+        return entry[1]
+
+    def flush(self) -> None:
+        self.cache.update(self._changed)
+        self.cache.touch_many(self._used.difference(self._changed))
+        self._changed.clear()
+        self._used.clear()
 
     def save(self) -> None:
-        with open(self.filename, "wb") as f:
-            pickle.dump(self, f, protocol=2)
+        self.flush()
+        self.cache.save()
+
+    def clear(self) -> None:
+        self.cache.clear()
+        self._entries = None
+        self._changed.clear()
+        self._used.clear()
+
+    def close(self) -> None:
+        self.cache.close()
@@ -8,3 +8,4 @@ DEFAULT_CACHE_PATH = user_cache_dir("django-migration-linter", version=__version
 
 DJANGO_APPS_WITH_MIGRATIONS = ("admin", "auth", "contenttypes", "sessions")
 EXPECTED_DATA_MIGRATION_ARGS = ("apps", "schema_editor")
+PROFILE_SLOWEST_MIGRATIONS = 10
@@ -132,6 +132,74 @@ class Command(BaseCommand):
             choices=MessageType.values(),
             help="don't print linting messages to stdout",
         )
+        parser.add_argument(
+            "--use-sqlmigrate",
+            action="store_true",
+            help=(
+                "generate the SQL with one sqlmigrate call per migration, "
+                "instead of a single walk over the migration graph"
+            ),
+        )
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            nargs="?",
+            help="number of processes to lint the migrations with. Defaults to 1",
+        )
+        parser.add_argument(
+            "--offline",
+            action="store_true",
+            help=(
+                "generate the SQL without connecting to the database, "
+                "with the features of a pinned server version"
+            ),
+        )
+        parser.add_argument(
+            "--server-version",
+            type=str,
+            nargs="?",
+            help=(
+                "version of the database server to generate the SQL for "
+                "in offline mode, e.g. 14 for PostgreSQL or 8.0.11 for MySQL"
+            ),
+        )
+        parser.add_argument(
+            "--profile",
+            action="store_true",
+            help=(
+                "print the time spent in each phase of the run, "
+                "and the slowest migrations"
+            ),
+        )
+        parser.add_argument(
+            "--trace",
+            type=str,
+            nargs="?",
+            metavar="FILE_PATH",
+            help=(
+                "write the phases of the run to this file, in the trace event "
+                "format of the Chrome and Perfetto trace viewers"
+            ),
+        )
+        parser.add_argument(
+            "--check-stats",
+            type=str,
+            nargs="?",
+            metavar="FILE_PATH",
+            help=(
+                "write the number of statements that each check evaluated and "
+                "matched, and the time spent in it, to this JSON file"
+            ),
+        )
+        parser.add_argument(
+            "--applied-migrations-file",
+            type=str,
+            nargs="?",
+            help=(
+                "read the applied migrations from the output of the "
+                "'showmigrations --list' or '--plan' command, instead of the database"
+            ),
+        )
         register_linting_configuration_options(parser)
 
     def handle(self, *args, **options):
@@ -177,6 +245,14 @@ class Command(BaseCommand):
             analyser_string=options["sql_analyser"],
             ignore_sqlmigrate_errors=options["ignore_sqlmigrate_errors"],
             ignore_initial_migrations=options["ignore_initial_migrations"],
+            use_sqlmigrate=options["use_sqlmigrate"],
+            jobs=options["jobs"] or 1,
+            offline=options["offline"],
+            server_version=options["server_version"],
+            applied_migrations_file=options["applied_migrations_file"],
+            profile=options["profile"],
+            collect_check_stats=bool(options["check_stats"]),
+            trace_file=options["trace"],
         )
         linter.lint_all_migrations(
             app_label=options["app_label"],
@@ -185,6 +261,9 @@ class Command(BaseCommand):
             migrations_file_path=options["include_migrations_from"],
         )
         linter.print_summary()
+        if linter.check_stats is not None:
+            with open(options["check_stats"], "w") as file:
+                file.write(linter.check_stats.to_json(indent=2))
         if linter.has_errors:
             sys.exit(1)
 
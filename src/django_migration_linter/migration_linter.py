@@ -3,30 +3,56 @@ from __future__ import annotations
 import functools
 import hashlib
 import inspect
+import io
+import json
 import logging
+import multiprocessing
 import os
 import re
+import sys
+from contextlib import redirect_stdout
+from dataclasses import dataclass
 from enum import Enum, unique
-from importlib.util import find_spec
 from subprocess import PIPE, Popen
-from typing import Callable, Dict, Iterable
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator
 
+import django
+from django.apps import apps
 from django.conf import settings
 from django.core.management import call_command
 from django.db import DEFAULT_DB_ALIAS, ProgrammingError, connections
 from django.db.migrations import Migration, RunPython, RunSQL
+from django.db.migrations.loader import MigrationLoader
 from django.db.migrations.operations.base import Operation
 
-from .cache import Cache
+from .cache import Cache, StatManifest
 from .constants import (
     DEFAULT_CACHE_PATH,
     DJANGO_APPS_WITH_MIGRATIONS,
     EXPECTED_DATA_MIGRATION_ARGS,
+    PROFILE_SLOWEST_MIGRATIONS,
+    __version__,
 )
+from .migration_loader import ScopedMigrationLoader
+from .offline import get_offline_connection, read_applied_migrations
+from .operation_analyser import OperationAnalyser
 from .operations import IgnoreMigration
+from .profiler import Profiler
+from .runpython_analyser import analyse_runpython_function, get_function_source_files
 from .sql_analyser import analyse_sql_statements, get_sql_analyser_class
-from .sql_analyser.base import Issue
-from .utils import clean_bytes_to_str, get_migration_abspath, split_migration_path
+from .sql_analyser.base import CheckStatistics, Issue
+from .sql_analyser.statement import split_sql_statements
+from .sql_generator import SqlGenerator
+from .utils import (
+    clean_bytes_to_str,
+    get_migration_abspath,
+    get_migration_paths,
+    split_migration_path,
+    split_path,
+)
+
+if TYPE_CHECKING:
+    from django.db.backends.base.base import BaseDatabaseWrapper
 
 logger = logging.getLogger("django_migration_linter")
 
@@ -43,6 +69,18 @@ class MessageType(Enum):
         return list(map(lambda c: c.value, MessageType))
 
 
+@dataclass
+class LintChunkResult:
+    """
+    Outcome of linting a chunk of migrations in a worker process.
+    """
+
+    output: str
+    counters: dict[str, int]
+    profiler: Profiler | None = None
+    check_stats: CheckStatistics | None = None
+
+
 class MigrationLinter:
     def __init__(
         self,
@@ -66,6 +104,14 @@ class MigrationLinter:
         analyser_string: str | None = None,
         ignore_sqlmigrate_errors: bool = False,
         ignore_initial_migrations: bool = False,
+        use_sqlmigrate: bool = False,
+        jobs: int = 1,
+        offline: bool = False,
+        server_version: str | None = None,
+        applied_migrations_file: str | None = None,
+        profile: bool = False,
+        collect_check_stats: bool = False,
+        trace_file: str | None = None,
     ):
         # Store parameters and options
         self.django_path = path
@@ -85,28 +131,143 @@ class MigrationLinter:
         self.warnings_as_errors_tests = warnings_as_errors_tests
         self.all_warnings_as_errors = all_warnings_as_errors
         self.no_output = no_output
+        self.analyser_string = analyser_string
         self.sql_analyser_class = get_sql_analyser_class(
             settings.DATABASES[self.database]["ENGINE"],
             analyser_string=analyser_string,
         )
         self.ignore_sqlmigrate_errors = ignore_sqlmigrate_errors
         self.ignore_initial_migrations = ignore_initial_migrations
+        self.use_sqlmigrate = use_sqlmigrate
+        self.jobs = jobs
+        self.offline = offline
+        self.server_version = server_version
+        self.applied_migrations_file = applied_migrations_file
+        if offline and use_sqlmigrate:
+            raise ValueError("The SQL cannot be generated offline with sqlmigrate")
+        if (
+            offline
+            and (only_applied_migrations or only_unapplied_migrations)
+            and not applied_migrations_file
+        ):
+            raise ValueError(
+                "The applied migrations must be read from a file in offline mode"
+            )
+        self._offline_connection: BaseDatabaseWrapper | None = None
+        self.profile = profile
+        self.trace_file = trace_file
+        self.profiler = Profiler(
+            enabled=profile or bool(trace_file), trace=bool(trace_file)
+        )
+        self.check_stats = CheckStatistics() if collect_check_stats else None
+        self.sql_generator: SqlGenerator | None = None
+        # Issues of the migrations decided from their operations, without SQL.
+        self.operation_issues: dict[
+            tuple[str, str], tuple[list[Issue], list[Issue], list[Issue]]
+        ] = {}
+        self.state_only_migrations: set[tuple[str, str]] = set()
+        self.migration_graph_hashes: dict[tuple[str, str], str] = {}
+        self._migration_paths: dict[tuple[str, str], str] | None = None
+        self._migration_loader: MigrationLoader | None = None
+        # Apps whose migrations are loaded, with the apps they depend on.
+        # None loads the migrations of all apps. A string of included apps,
+        # like from a config file, is matched by substring and not restricted.
+        self.migration_app_labels: set[str] | None = (
+            set(include_apps)
+            if include_apps and not isinstance(include_apps, str)
+            else None
+        )
 
         # Initialise counters
         self.reset_counters()
 
-        # Initialise cache. Read from old, write to new, in order to prune old entries.
+        # Initialise cache. Entries used during this run are kept when saving it.
+        self.options_fingerprint = self.get_options_fingerprint()
         if self.should_use_cache():
-            self.old_cache = Cache(self.django_path, self.database, self.cache_path)
-            self.new_cache = Cache(self.django_path, self.database, self.cache_path)
-            self.old_cache.load()
-
-        # Initialise migrations
-        from django.db.migrations.loader import MigrationLoader
+            with self.profiler.phase("read_cache"):
+                self.cache = Cache(
+                    self.django_path,
+                    self.database,
+                    self.cache_path,
+                    fingerprint=self.options_fingerprint,
+                )
+                self.cache.load()
+                # The generated SQL only depends on the vendor, not on the options.
+                self.sql_cache = Cache(
+                    self.django_path,
+                    self.database,
+                    self.cache_path,
+                    fingerprint=self.get_sql_fingerprint(),
+                    table="generated_sql",
+                )
+                self.sql_cache.load()
+                self.stat_manifest = StatManifest(
+                    Cache(
+                        self.django_path,
+                        self.database,
+                        self.cache_path,
+                        table="file_digest",
+                    ),
+                    compute_digest=self.get_file_hash,
+                )
 
-        self.migration_loader = MigrationLoader(
-            connection=connections[self.database], load=True
+    @property
+    def migration_loader(self) -> MigrationLoader:
+        """
+        The migrations are only loaded on first use, so that the apps to load
+        can be restricted before.
+        """
+        if self._migration_loader is None:
+            with self.profiler.phase("load_migrations"):
+                self._migration_loader = self.load_migrations()
+        return self._migration_loader
+
+    def load_migrations(self) -> MigrationLoader:
+        # The applied migrations are only queried when they are needed.
+        connection = (
+            connections[self.database]
+            if (self.only_applied_migrations or self.only_unapplied_migrations)
+            and not self.applied_migrations_file
+            else None
         )
+        migration_loader: MigrationLoader
+        if self.migration_app_labels is None:
+            migration_loader = MigrationLoader(connection=connection, load=True)
+        else:
+            migration_loader = ScopedMigrationLoader(
+                connection=connection, app_labels=self.migration_app_labels
+            )
+        if self.applied_migrations_file:
+            migration_loader.applied_migrations = read_applied_migrations(
+                self.applied_migrations_file
+            )
+        return migration_loader
+
+    @property
+    def connection(self) -> BaseDatabaseWrapper:
+        """
+        The connection to generate the SQL with. In offline mode, it has the
+        features of the pinned server version and never connects.
+        """
+        if not self.offline:
+            return connections[self.database]
+        if self._offline_connection is None:
+            self._offline_connection = get_offline_connection(
+                self.database, self.server_version
+            )
+        return self._offline_connection
+
+    def restrict_migration_loading(self, app_labels: Iterable[str]) -> None:
+        """
+        Only load the migrations of these apps, and of the apps that they
+        depend on. Has no effect once the migrations are loaded.
+        """
+        if self._migration_loader is not None:
+            return
+        app_labels = set(app_labels)
+        if self.migration_app_labels is not None:
+            app_labels &= self.migration_app_labels
+        self.migration_app_labels = app_labels
 
     def reset_counters(self) -> None:
         self.nb_valid = 0
@@ -114,6 +275,17 @@ class MigrationLinter:
         self.nb_warnings = 0
         self.nb_erroneous = 0
         self.nb_total = 0
+        self.nb_without_sql = 0
+
+    def get_counters(self) -> dict[str, int]:
+        return {
+            "nb_valid": self.nb_valid,
+            "nb_ignored": self.nb_ignored,
+            "nb_warnings": self.nb_warnings,
+            "nb_erroneous": self.nb_erroneous,
+            "nb_total": self.nb_total,
+            "nb_without_sql": self.nb_without_sql,
+        }
 
     def should_use_cache(self) -> bool:
         return bool(self.django_path and not self.no_cache)
@@ -125,8 +297,12 @@ class MigrationLinter:
         git_commit_id: str | None = None,
         migrations_file_path: str | None = None,
     ) -> None:
-        # Collect migrations.
+        # Collect migrations, only loading the apps that can contain some of them.
         migrations_list = self.read_migrations_list(migrations_file_path)
+        if app_label:
+            self.restrict_migration_loading([app_label])
+        if migrations_list is not None:
+            self.restrict_migration_loading(label for label, _ in migrations_list)
         if git_commit_id:
             migrations = self._gather_migrations_git(git_commit_id, migrations_list)
         else:
@@ -139,22 +315,169 @@ class MigrationLinter:
 
         specific_target_migration = (
             self.migration_loader.get_migration_by_prefix(app_label, migration_name)
-            if app_label and migration_name
+            if (
+                app_label
+                and migration_name
+                and app_label in self.migration_loader.migrated_apps
+            )
             else None
         )
 
+        migrations_to_lint = []
         for m in sorted_migrations:
             if app_label and migration_name:
                 if m == specific_target_migration:
-                    self.lint_migration(m)
+                    migrations_to_lint.append(m)
             elif app_label:
                 if m.app_label == app_label:
-                    self.lint_migration(m)
+                    migrations_to_lint.append(m)
             else:
+                migrations_to_lint.append(m)
+
+        if self.jobs > 1 and len(migrations_to_lint) > 1:
+            self.lint_migrations_in_parallel(migrations_to_lint)
+        else:
+            self.lint_migrations(migrations_to_lint)
+
+        if self.should_use_cache():
+            with self.profiler.phase("write_cache"):
+                self.cache.save()
+                self.sql_cache.save()
+                self.stat_manifest.save()
+
+        if self.trace_file:
+            self.profiler.write_trace(self.trace_file)
+
+    def lint_migrations(self, migrations: list[Migration]) -> None:
+        keys = [(m.app_label, m.name) for m in migrations if self.requires_sql(m)]
+        operation_analyser = OperationAnalyser(
+            self.sql_analyser_class,
+            self.exclude_migration_tests,
+            report_ignored=not self.no_output,
+            database=self.database,
+        )
+        with self.profiler.phase("analyse_operations"):
+            self.operation_issues = operation_analyser.analyse_migrations(
+                self.migration_loader, keys
+            )
+        self.state_only_migrations = operation_analyser.state_only_migrations
+        if not self.use_sqlmigrate:
+            with self.profiler.phase("generate_sql"):
+                self.sql_generator = SqlGenerator(
+                    self.migration_loader,
+                    self.connection,
+                    targets=[key for key in keys if key not in self.operation_issues],
+                )
+
+        for m in migrations:
+            with self.profiler.migration((m.app_label, m.name)):
                 self.lint_migration(m)
 
+    def lint_migrations_in_parallel(self, migrations: list[Migration]) -> None:
+        """
+        Lint the migrations across a pool of worker processes.
+
+        The sorted migrations are split into contiguous chunks, so that printing
+        the results of the chunks in order keeps the (app_label, name) order.
+        """
+        keys = [(m.app_label, m.name) for m in migrations]
+        nb_chunks = min(len(keys), self.jobs * 4)
+        chunk_size = -(-len(keys) // nb_chunks)
+        chunks = [keys[i : i + chunk_size] for i in range(0, len(keys), chunk_size)]
+        logger.info(
+            "Linting %s migrations in %s chunks with %s processes",
+            len(keys),
+            len(chunks),
+            self.jobs,
+        )
+
+        # Workers write to the caches directly, with the generation of this run.
+        cache_generation = None
         if self.should_use_cache():
-            self.new_cache.save()
+            cache_generation = self.cache.generation
+            self.sql_cache.generation = cache_generation
+            self.stat_manifest.cache.generation = cache_generation
+
+        # Forked workers must not share the parent's database connections.
+        connections.close_all()
+        if self.should_use_cache():
+            self.cache.close()
+            self.sql_cache.close()
+            self.stat_manifest.close()
+        with multiprocessing.Pool(
+            processes=min(self.jobs, len(chunks)),
+            initializer=_init_worker,
+            initargs=(
+                self.get_worker_options(),
+                cache_generation,
+                self.migration_app_labels,
+            ),
+        ) as pool:
+            for result in pool.imap(_lint_chunk, chunks):
+                self.merge_chunk_result(result)
+
+    def get_worker_options(self) -> dict[str, Any]:
+        return {
+            "path": self.django_path,
+            "ignore_name_contains": self.ignore_name_contains,
+            "ignore_name": self.ignore_name,
+            "include_name_contains": self.include_name_contains,
+            "include_name": self.include_name,
+            "include_apps": self.include_apps,
+            "exclude_apps": self.exclude_apps,
+            "database": self.database,
+            "cache_path": self.cache_path,
+            "no_cache": self.no_cache,
+            "only_applied_migrations": self.only_applied_migrations,
+            "only_unapplied_migrations": self.only_unapplied_migrations,
+            "exclude_migration_tests": self.exclude_migration_tests,
+            "quiet": self.quiet,
+            "warnings_as_errors_tests": self.warnings_as_errors_tests,
+            "all_warnings_as_errors": self.all_warnings_as_errors,
+            "no_output": self.no_output,
+            "analyser_string": self.analyser_string,
+            "ignore_sqlmigrate_errors": self.ignore_sqlmigrate_errors,
+            "ignore_initial_migrations": self.ignore_initial_migrations,
+            "use_sqlmigrate": self.use_sqlmigrate,
+            "offline": self.offline,
+            "server_version": self.server_version,
+            "applied_migrations_file": self.applied_migrations_file,
+            "profile": self.profile,
+            "trace_file": self.trace_file,
+            "collect_check_stats": self.check_stats is not None,
+        }
+
+    def lint_chunk(self, keys: list[tuple[str, str]]) -> LintChunkResult:
+        self.reset_counters()
+        migrations = [self.get_migration(*key) for key in keys]
+        with redirect_stdout(io.StringIO()) as output:
+            self.lint_migrations(migrations)
+        if self.should_use_cache():
+            with self.profiler.phase("write_cache"):
+                self.stat_manifest.flush()
+
+        result = LintChunkResult(
+            output=output.getvalue(),
+            counters=self.get_counters(),
+            profiler=self.profiler if self.profiler.enabled else None,
+            check_stats=self.check_stats,
+        )
+        # The next chunks of this worker are profiled separately.
+        self.profiler = Profiler(
+            enabled=self.profiler.enabled, trace=self.profiler.trace
+        )
+        if self.check_stats is not None:
+            self.check_stats = CheckStatistics()
+        return result
+
+    def merge_chunk_result(self, result: LintChunkResult) -> None:
+        sys.stdout.write(result.output)
+        for counter, value in result.counters.items():
+            setattr(self, counter, getattr(self, counter) + value)
+        if result.profiler is not None:
+            self.profiler.merge(result.profiler)
+        if result.check_stats is not None and self.check_stats is not None:
+            self.check_stats.merge(result.check_stats)
 
     def lint_migration(self, migration: Migration) -> None:
         app_label = migration.app_label
@@ -162,8 +485,6 @@ class MigrationLinter:
         operations = migration.operations
         self.nb_total += 1
 
-        md5hash = self.get_migration_hash(app_label, migration_name)
-
         if self.should_ignore_migration(
             app_label, migration_name, operations, is_initial=migration.initial
         ):
@@ -173,18 +494,31 @@ class MigrationLinter:
             self.nb_ignored += 1
             return
 
-        if self.should_use_cache() and md5hash in self.old_cache:
-            self.lint_cached_migration(app_label, migration_name, md5hash)
-            return
-
-        sql_statements = self.get_sql(app_label, migration_name)
-        errors, ignored, warnings = analyse_sql_statements(
-            self.sql_analyser_class,
-            sql_statements,
-            self.exclude_migration_tests,
-        )
+        if self.should_use_cache():
+            migration_hash = self.get_migration_graph_hash(app_label, migration_name)
+            if self.is_cached(migration_hash):
+                self.lint_cached_migration(app_label, migration_name, migration_hash)
+                return
+
+        if (app_label, migration_name) in self.operation_issues:
+            errors, ignored, warnings = self.operation_issues.pop(
+                (app_label, migration_name)
+            )
+            without_sql = (app_label, migration_name) in self.state_only_migrations
+        else:
+            without_sql = False
+            sql_statements = self.get_sql(app_label, migration_name)
+            with self.profiler.phase("analyse_sql"):
+                errors, ignored, warnings = analyse_sql_statements(
+                    self.sql_analyser_class,
+                    sql_statements,
+                    self.exclude_migration_tests,
+                    report_ignored=not self.no_output,
+                    check_stats=self.check_stats,
+                )
 
-        err, ignored_data, warnings_data = self.analyse_data_migration(migration)
+        with self.profiler.phase("analyse_data_migration"):
+            err, ignored_data, warnings_data = self.analyse_data_migration(migration)
         if err:
             errors += err
         if ignored_data:
@@ -211,7 +545,11 @@ class MigrationLinter:
             self.print_errors(errors)
             if warnings:
                 self.print_warnings(warnings)
-            value_to_cache = {"result": "ERR", "errors": errors, "warnings": warnings}
+            value_to_cache: dict[str, Any] = {
+                "result": "ERR",
+                "errors": errors,
+                "warnings": warnings,
+            }
         elif warnings:
             self.print_linting_msg(
                 app_label, migration_name, "WARNING", MessageType.WARNING
@@ -231,21 +569,225 @@ class MigrationLinter:
             self.nb_valid += 1
             value_to_cache = {"result": "OK"}
 
+        if without_sql:
+            self.nb_without_sql += 1
+            value_to_cache["without_sql"] = True
+
+        if self.should_use_cache():
+            dependencies = self.get_data_migration_dependencies(migration)
+            if dependencies:
+                value_to_cache["dependencies"] = dependencies
+            with self.profiler.phase("write_cache"):
+                self.cache[migration_hash] = value_to_cache
+
+    def requires_sql(self, migration: Migration) -> bool:
+        if self.should_ignore_migration(
+            migration.app_label,
+            migration.name,
+            migration.operations,
+            is_initial=migration.initial,
+        ):
+            return False
         if self.should_use_cache():
-            self.new_cache[md5hash] = value_to_cache
+            migration_hash = self.get_migration_graph_hash(
+                migration.app_label, migration.name
+            )
+            if self.is_cached(migration_hash):
+                return False
+            with self.profiler.phase("read_cache"):
+                return (
+                    self.get_sql_cache_key(migration.app_label, migration.name)
+                    not in self.sql_cache
+                )
+        return True
+
+    def is_cached(self, migration_hash: str) -> bool:
+        """
+        Whether the lint result of a migration is cached, and the project source
+        files that its data migrations depend on are unchanged since.
+        """
+        with self.profiler.phase("read_cache"):
+            cached_value = self.cache.get(migration_hash)
+        if cached_value is None:
+            return False
+        with self.profiler.phase("hash_files"):
+            try:
+                return all(
+                    self.stat_manifest.get_digest(path) == digest
+                    for path, digest in cached_value.get("dependencies", {}).items()
+                )
+            except OSError:
+                return False
+
+    def is_project_file(self, path: str) -> bool:
+        """Whether the path is a Python source file of the project, not of a package."""
+        if not self.django_path:
+            return False
+        path = os.path.abspath(path)
+        return (
+            path.endswith(".py")
+            and path.startswith(os.path.join(os.path.abspath(self.django_path), ""))
+            and not {"site-packages", "dist-packages"}.intersection(path.split(os.sep))
+        )
+
+    def get_data_migration_dependencies(self, migration: Migration) -> dict[str, str]:
+        """
+        Digests of the project source files that the RunPython functions of a
+        migration depend on, like its helper modules, besides the migration
+        file itself. They are stored with the cached lint result, so that
+        modifying a helper lints the migration again.
+        """
+        paths: set[str] = set()
+        for operation in migration.operations:
+            if isinstance(operation, RunPython):
+                for code in (operation.code, operation.reverse_code):
+                    if code is not None:
+                        paths |= get_function_source_files(code, self.is_project_file)
+        paths.discard(
+            os.path.abspath(
+                self.get_migration_path(migration.app_label, migration.name)
+            )
+        )
+
+        dependencies = {}
+        with self.profiler.phase("hash_files"):
+            for path in sorted(paths):
+                try:
+                    dependencies[path] = self.stat_manifest.get_digest(path)
+                except OSError:
+                    # Not a file on disk anymore, like a module loaded from a .pyc.
+                    pass
+        return dependencies
 
     @staticmethod
-    def get_migration_hash(app_label: str, migration_name: str) -> str:
-        hash_md5 = hashlib.md5(usedforsecurity=False)
-        with open(get_migration_abspath(app_label, migration_name), "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_md5.update(chunk)
-        return hash_md5.hexdigest()
+    def get_file_hash(path: str) -> str:
+        with open(path, "rb") as f:
+            return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+    @classmethod
+    def get_migration_hash(cls, app_label: str, migration_name: str) -> str:
+        return cls.get_file_hash(get_migration_abspath(app_label, migration_name))
+
+    def get_migration_path(self, app_label: str, migration_name: str) -> str:
+        if self._migration_paths is None:
+            with self.profiler.phase("resolve_paths"):
+                self._migration_paths = get_migration_paths(
+                    self.migration_loader.migrated_apps
+                )
+        path = self._migration_paths.get((app_label, migration_name))
+        if path is None:
+            # Not a source file, like a sourceless .pyc migration.
+            return get_migration_abspath(app_label, migration_name)
+        return path
+
+    def get_migration_file_hash(self, app_label: str, migration_name: str) -> str:
+        """
+        Hash of the migration file, read only if its stat signature changed
+        since it was last hashed.
+        """
+        path = self.get_migration_path(app_label, migration_name)
+        with self.profiler.phase("hash_files"):
+            if not self.should_use_cache():
+                return self.get_file_hash(path)
+            return self.stat_manifest.get_digest(path)
+
+    def get_migration_graph_hash(self, app_label: str, migration_name: str) -> str:
+        """
+        Merkle hash of a migration in the migration graph.
+
+        The SQL of a migration depends on the project state left by its
+        ancestors, so the hash of its file is combined with the graph hashes
+        of its parents. Modifying a migration changes the hash of all of its
+        descendants, and only those are linted again. The app label and name
+        of the migration are hashed too, as identical files of different apps
+        have different tables.
+        """
+        key = (app_label, migration_name)
+        node_map = self.migration_loader.graph.node_map
+        if key not in node_map:
+            return self.get_migration_node_hash(key, [])
+
+        # Iterative post-order walk, the migration chains can be very long.
+        stack: list[tuple[tuple[str, str], bool]] = [(key, False)]
+        while stack:
+            node_key, parents_done = stack.pop()
+            if node_key in self.migration_graph_hashes:
+                continue
+            parents = sorted(parent.key for parent in node_map[node_key].parents)
+            if not parents_done:
+                stack.append((node_key, True))
+                stack.extend(
+                    (parent, False)
+                    for parent in parents
+                    if parent not in self.migration_graph_hashes
+                )
+                continue
+
+            self.migration_graph_hashes[node_key] = self.get_migration_node_hash(
+                node_key, [self.migration_graph_hashes[parent] for parent in parents]
+            )
+        return self.migration_graph_hashes[key]
+
+    def get_migration_node_hash(
+        self, key: tuple[str, str], parent_hashes: list[str]
+    ) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(json.dumps(key).encode())
+        digest.update(self.get_migration_file_hash(*key).encode())
+        for parent_hash in parent_hashes:
+            digest.update(parent_hash.encode())
+        return digest.hexdigest()
+
+    def get_sql_cache_key(self, app_label: str, migration_name: str) -> str:
+        """
+        Key of the generated SQL of a migration. The SQL names the tables of
+        the app, so identical migration files of different apps do not share it.
+        """
+        migration_hash = self.get_migration_graph_hash(app_label, migration_name)
+        return f"{app_label}.{migration_name}:{migration_hash}"
+
+    def get_options_fingerprint(self) -> str:
+        """
+        Fingerprint of the options that change the lint result of a migration.
+
+        It is part of the cache keys, so that runs with different options
+        can share the same cache file without serving each other's results.
+        """
+        options = {
+            "version": __version__,
+            "sql_analyser_class": "{}.{}".format(
+                self.sql_analyser_class.__module__,
+                self.sql_analyser_class.__qualname__,
+            ),
+            "exclude_migration_tests": sorted(self.exclude_migration_tests),
+            "warnings_as_errors_tests": sorted(self.warnings_as_errors_tests or []),
+            "all_warnings_as_errors": self.all_warnings_as_errors,
+            "ignore_sqlmigrate_errors": self.ignore_sqlmigrate_errors,
+        }
+        return hashlib.blake2b(
+            json.dumps(options, sort_keys=True).encode(), digest_size=16
+        ).hexdigest()
+
+    def get_sql_fingerprint(self) -> str:
+        """
+        Fingerprint of what the generated SQL of a migration depends on, besides
+        the content of the migration.
+        """
+        options = {
+            "version": __version__,
+            "django_version": django.__version__,
+            "vendor": connections[self.database].vendor,
+        }
+        if self.offline:
+            options["offline_server_version"] = self.server_version
+        return hashlib.blake2b(
+            json.dumps(options, sort_keys=True).encode(), digest_size=16
+        ).hexdigest()
 
     def lint_cached_migration(
-        self, app_label: str, migration_name: str, md5hash: str
+        self, app_label: str, migration_name: str, migration_hash: str
     ) -> None:
-        cached_value = self.old_cache[md5hash]
+        cached_value = self.cache[migration_hash]
         if cached_value["result"] == "IGNORE":
             self.print_linting_msg(
                 app_label, migration_name, "IGNORE (cached)", MessageType.IGNORE
@@ -271,8 +813,13 @@ class MigrationLinter:
                 self.print_errors(cached_value["errors"])
             if "warnings" in cached_value and cached_value["warnings"]:
                 self.print_warnings(cached_value["warnings"])
+        if cached_value.get("without_sql"):
+            self.nb_without_sql += 1
 
-        self.new_cache[md5hash] = cached_value
+        with self.profiler.phase("write_cache"):
+            self.cache.touch(migration_hash)
+            # Keep the generated SQL as well, for runs with other options.
+            self.sql_cache.touch(self.get_sql_cache_key(app_label, migration_name))
 
     def print_linting_msg(
         self, app_label: str, migration_name: str, msg: str, lint_result: MessageType
@@ -312,22 +859,51 @@ class MigrationLinter:
         print(f"Erroneous migrations: {self.nb_erroneous}/{self.nb_total}")
         print(f"Migrations with warnings: {self.nb_warnings}/{self.nb_total}")
         print(f"Ignored migrations: {self.nb_ignored}/{self.nb_total}")
+        print(f"Migrations without SQL: {self.nb_without_sql}/{self.nb_total}")
+        if self.profile:
+            self.print_profile()
+
+    def print_profile(self, nb_migrations: int = PROFILE_SLOWEST_MIGRATIONS) -> None:
+        """
+        Print the time of each phase of the run, and the slowest migrations
+        with the phase they spent the most time in.
+        """
+        if self.no_output:
+            return
+        total_time = self.profiler.total_time
+        print("*** Profile ***")
+        print(f"{'Phase':<24}{'Calls':>8}{'Time (s)':>12}{'%':>8}")
+        for name, stats in sorted(
+            self.profiler.phases.items(), key=lambda item: item[1].time, reverse=True
+        ):
+            share = stats.time / total_time * 100 if total_time else 0.0
+            print(f"{name:<24}{stats.calls:>8}{stats.time:>12.3f}{share:>7.1f}%")
+        print(f"{'Total':<24}{'':>8}{total_time:>12.3f}")
+
+        slowest_migrations = self.profiler.get_slowest_migrations(nb_migrations)
+        if slowest_migrations:
+            print("Slowest migrations:")
+            for (app_label, migration_name), time, phase in slowest_migrations:
+                print(f"({app_label}, {migration_name})... {time:.3f}s ({phase})")
 
     @property
     def has_errors(self) -> bool:
         return self.nb_erroneous > 0
 
     def get_sql(self, app_label: str, migration_name: str) -> list[str]:
-        logger.info(f"Calling sqlmigrate command {app_label} {migration_name}")
+        sql_cache_key = None
+        if self.should_use_cache():
+            sql_cache_key = self.get_sql_cache_key(app_label, migration_name)
+            with self.profiler.phase("read_cache"):
+                sql_statements = self.sql_cache.get(sql_cache_key)
+            if sql_statements is not None:
+                logger.info(f"Using cached SQL of {app_label} {migration_name}")
+                self.sql_cache.touch(sql_cache_key)
+                return sql_statements
+
         try:
-            with open(os.devnull, "w") as dev_null:
-                sql_statement = call_command(
-                    "sqlmigrate",
-                    app_label,
-                    migration_name,
-                    database=self.database,
-                    stdout=dev_null,
-                )
+            with self.profiler.phase("generate_sql"):
+                sql_statements = self.generate_sql(app_label, migration_name)
         except (ValueError, ProgrammingError) as err:
             if self.ignore_sqlmigrate_errors:
                 logger.warning(
@@ -337,7 +913,7 @@ class MigrationLinter:
                     migration_name,
                     str(err),
                 )
-                sql_statement = ""
+                return []
             else:
                 logger.warning(
                     "Error while executing sqlmigrate on (%s, %s) with exception: %s.",
@@ -346,7 +922,39 @@ class MigrationLinter:
                     str(err),
                 )
                 raise
-        return sql_statement.splitlines()
+
+        if sql_cache_key is not None:
+            with self.profiler.phase("write_cache"):
+                self.sql_cache[sql_cache_key] = sql_statements
+        return sql_statements
+
+    def generate_sql(self, app_label: str, migration_name: str) -> list[str]:
+        if (
+            self.sql_generator is not None
+            and (app_label, migration_name) in self.sql_generator
+        ):
+            logger.info(f"Generating SQL of {app_label} {migration_name}")
+            return list(
+                split_sql_statements(
+                    self.sql_generator.get_sql(app_label, migration_name),
+                    self.sql_analyser_class.backslash_escapes,
+                )
+            )
+
+        logger.info(f"Calling sqlmigrate command {app_label} {migration_name}")
+        with open(os.devnull, "w") as dev_null:
+            sql_statement = call_command(
+                "sqlmigrate",
+                app_label,
+                migration_name,
+                database=self.database,
+                stdout=dev_null,
+            )
+        return list(
+            split_sql_statements(
+                (sql_statement,), self.sql_analyser_class.backslash_escapes
+            )
+        )
 
     @staticmethod
     def is_migration_file(filename: str) -> bool:
@@ -396,52 +1004,72 @@ class MigrationLinter:
             "diff",
             "--relative",
             "--name-only",
+            "-z",
             "--diff-filter=AR",
             git_commit_id,
         ]
         logger.info(f"Executing {git_diff_command} (in {self.django_path})")
-        diff_process = Popen(
-            git_diff_command,
-            stdout=PIPE,
-            stderr=PIPE,
-            cwd=self.django_path,
-        )
+        with self.profiler.phase("git_diff"):
+            diff_process = Popen(
+                git_diff_command,
+                stdout=PIPE,
+                stderr=PIPE,
+                cwd=self.django_path,
+            )
+            diff_output, diff_errors = diff_process.communicate()
+        if diff_process.returncode != 0:
+            output = []
+            for line in map(clean_bytes_to_str, diff_errors.splitlines()):
+                output.append(line)
+            logger.error("Error while git diff command:\n{}".format("".join(output)))
+            raise Exception("Error while executing git diff command")
 
-        diskpath_and_migration: Dict[str, Migration] = {}
-        for migration in self._gather_all_migrations():
-            spec = find_spec(migration.__module__)
-            if spec:
-                diskpath_and_migration[str(spec.origin)] = migration
+        # Index the migration files by all the suffixes of their path
+        # components, so that each path of the diff is resolved with a single
+        # lookup. The migrations are only loaded once they are matched.
+        with self.profiler.phase("resolve_paths"):
+            migration_paths = get_migration_paths(self.get_project_app_labels())
+        if self._migration_paths is None:
+            self._migration_paths = migration_paths
+        keys_by_path_suffix: Dict[tuple[str, ...], list[tuple[str, str]]] = {}
+        for key, path in sorted(migration_paths.items()):
+            path_components = split_path(path)
+            for i in range(len(path_components)):
+                keys_by_path_suffix.setdefault(tuple(path_components[i:]), []).append(
+                    key
+                )
 
-        migrations = []
+        keys = []
         for line in map(
             clean_bytes_to_str,
-            diff_process.stdout.readlines(),  # type: ignore
+            diff_output.split(b"\0"),
         ):
             # Only gather lines that include added migrations.
             if self.is_migration_file(line):
-                # Find the migration objects with similar path.
-                suitable_migrations = [
-                    migration
-                    for path, migration in diskpath_and_migration.items()
-                    if path.endswith(line)
-                ]
-                if suitable_migrations:
-                    migration = suitable_migrations[0]
-                    if (
-                        migrations_list is None
-                        or (migration.app_label, migration.name) in migrations_list
-                    ):
-                        migrations.append(migration)
-                    if len(suitable_migrations) > 1:
-                        # If multiple migration founds, we chose one randomly, but need
-                        # to alert that it's not very precise.
+                # Find the migration files with the same path.
+                suitable_keys = keys_by_path_suffix.get(tuple(split_path(line)), [])
+                if len(suitable_keys) > 1 and self.django_path:
+                    # The diff paths are relative to the Django project.
+                    suitable_keys = keys_by_path_suffix.get(
+                        tuple(
+                            split_path(
+                                os.path.abspath(os.path.join(self.django_path, line))
+                            )
+                        ),
+                        suitable_keys,
+                    )
+                if suitable_keys:
+                    key = suitable_keys[0]
+                    if migrations_list is None or key in migrations_list:
+                        keys.append(key)
+                    if len(suitable_keys) > 1:
+                        # If multiple migration founds, we chose the first one,
+                        # but need to alert that it's not very precise.
                         logger.warning(
                             "Found multiple migration files matching altered "
                             "file path %s. Choose (%s, %s) opportunistically.",
                             line,
-                            migration.app_label,
-                            migration.name,
+                            *key,
                         )
                 else:
                     app_label, name = split_migration_path(line)
@@ -451,18 +1079,9 @@ class MigrationLinter:
                         app_label,
                         name,
                     )
-        diff_process.wait()
 
-        if diff_process.returncode != 0:
-            output = []
-            for line in map(
-                clean_bytes_to_str,
-                diff_process.stderr.readlines(),  # type: ignore
-            ):
-                output.append(line)
-            logger.error("Error while git diff command:\n{}".format("".join(output)))
-            raise Exception("Error while executing git diff command")
-        return migrations
+        self.restrict_migration_loading(app_label for app_label, _ in keys)
+        return [self.get_migration(*key) for key in keys]
 
     def _gather_all_migrations(
         self, migrations_list: list[tuple[str, str]] | None = None
@@ -475,6 +1094,37 @@ class MigrationLinter:
                 if migrations_list is None or (app_label, name) in migrations_list:
                     yield migration
 
+        # The migrations of the apps that are not included are still reported
+        # as ignored, from their files.
+        if self.include_apps and self.migration_app_labels is not None:
+            other_app_labels = [
+                app_label
+                for app_label in self.get_project_app_labels()
+                if app_label not in self.migration_loader.migrated_apps
+            ]
+            with self.profiler.phase("resolve_paths"):
+                other_migration_paths = get_migration_paths(other_app_labels)
+            for app_label, name in sorted(other_migration_paths):
+                if migrations_list is None or (app_label, name) in migrations_list:
+                    yield self.get_migration(app_label, name)
+
+    @staticmethod
+    def get_project_app_labels() -> list[str]:
+        return [
+            app_config.label
+            for app_config in apps.get_app_configs()
+            if app_config.label not in DJANGO_APPS_WITH_MIGRATIONS
+        ]
+
+    def get_migration(self, app_label: str, migration_name: str) -> Migration:
+        """
+        The loaded migration, or an empty one for the apps whose migrations are
+        not loaded. Those migrations can only be ignored.
+        """
+        if app_label in self.migration_loader.migrated_apps:
+            return self.migration_loader.disk_migrations[(app_label, migration_name)]
+        return Migration(migration_name, app_label)
+
     def should_ignore_migration(
         self,
         app_label: str,
@@ -575,38 +1225,21 @@ class MigrationLinter:
             else:
                 warning.append(issue)
 
-        # Detect wrong model imports
-        # Forward
-        issues = self.get_runpython_model_import_issues(runpython.code)
-        for issue in issues:
-            if issue.code in self.exclude_migration_tests:
-                ignored.append(issue)
-            else:
-                error.append(issue)
-
-        # Backward
+        # Detect wrong model imports, and model variable names that are not the
+        # model class name, in the forward and backward functions
+        codes = [runpython.code]
         if runpython.reversible:
-            issues = self.get_runpython_model_import_issues(runpython.reverse_code)
-            for issue in issues:
-                if issue and issue.code in self.exclude_migration_tests:
+            codes.append(runpython.reverse_code)
+        for code in codes:
+            function = self.discover_function(code)
+            models = analyse_runpython_function(function)
+            for issue in models.get_import_issues(function.__name__):
+                if issue.code in self.exclude_migration_tests:
                     ignored.append(issue)
                 else:
                     error.append(issue)
-
-        # Detect warning if model variable name is not the same as model class
-        issues = self.get_runpython_model_variable_naming_issues(runpython.code)
-        for issue in issues:
-            if issue and issue.code in self.exclude_migration_tests:
-                ignored.append(issue)
-            else:
-                warning.append(issue)
-
-        if runpython.reversible:
-            issues = self.get_runpython_model_variable_naming_issues(
-                runpython.reverse_code
-            )
-            for issue in issues:
-                if issue and issue.code in self.exclude_migration_tests:
+            for issue in models.get_variable_naming_issues(function.__name__):
+                if issue.code in self.exclude_migration_tests:
                     ignored.append(issue)
                 else:
                     warning.append(issue)
@@ -615,77 +1248,15 @@ class MigrationLinter:
 
     @staticmethod
     def get_runpython_model_import_issues(code: Callable) -> list[Issue]:
-        model_object_regex = re.compile(r"[^a-zA-Z0-9._]?([a-zA-Z0-9._]+?)\.objects")
-
         function = MigrationLinter.discover_function(code)
-        function_name = function.__name__
-        source_code = inspect.getsource(function)
-
-        called_models = model_object_regex.findall(source_code)
-        issues = []
-        for model in called_models:
-            model = model.split(".", 1)[0]
-            has_get_model_call = (
-                re.search(
-                    rf"{model}.*= +\w+\.get_model\(",
-                    source_code,
-                )
-                is not None
-            )
-            if not has_get_model_call:
-                issues.append(
-                    Issue(
-                        code="RUNPYTHON_MODEL_IMPORT",
-                        message=(
-                            "'{}': Could not find an 'apps.get_model(\"...\", \"{}\")' "
-                            "call. Importing the model directly is incorrect for "
-                            "data migrations."
-                        ).format(function_name, model),
-                    )
-                )
-        return issues
+        return analyse_runpython_function(function).get_import_issues(function.__name__)
 
     @staticmethod
     def get_runpython_model_variable_naming_issues(code: Callable) -> list[Issue]:
-        model_object_regex = re.compile(r"[^a-zA-Z]?([a-zA-Z0-9]+?)\.objects")
-
         function = MigrationLinter.discover_function(code)
-        function_name = function.__name__
-        source_code = inspect.getsource(function)
-
-        called_models = model_object_regex.findall(source_code)
-        issues = []
-        for model in called_models:
-            has_same_model_name = (
-                re.search(
-                    r"{model}.*= +\w+?\.get_model\([^)]+?\.{model}.*?\)".format(
-                        model=model
-                    ),
-                    source_code,
-                    re.MULTILINE | re.DOTALL,
-                )
-                is not None
-                or re.search(
-                    r"{model}.*= +\w+?\.get_model\([^)]+?,[^)]*?{model}.*?\)".format(
-                        model=model
-                    ),
-                    source_code,
-                    re.MULTILINE | re.DOTALL,
-                )
-                is not None
-            )
-            if not has_same_model_name:
-                issues.append(
-                    Issue(
-                        code="RUNPYTHON_MODEL_VARIABLE_NAME",
-                        message=(
-                            "'{}': Model variable name {} is different from the "
-                            "model class name that was found in the "
-                            "apps.get_model(...) call."
-                        ).format(function_name, model),
-                    )
-                )
-        return issues
+        return analyse_runpython_function(function).get_variable_naming_issues(
+            function.__name__
+        )
 
     def lint_runsql(
         self, runsql: RunSQL
@@ -707,26 +1278,12 @@ class MigrationLinter:
 
         # Put the SQL in our SQL analyser
         if runsql.sql != RunSQL.noop:
-            sql_statements = []
-            if isinstance(runsql.sql, (list, tuple)):
-                for sql in runsql.sql:
-                    params = None
-                    if isinstance(sql, (list, tuple)):
-                        elements = len(sql)
-                        if elements == 2:
-                            sql, params = sql
-                        else:
-                            raise ValueError("Expected a 2-tuple but got %d" % elements)
-                        sql_statements.append(sql % params)
-                    else:
-                        sql_statements.append(sql)
-            else:
-                sql_statements.append(runsql.sql)
-
             sql_errors, sql_ignored, sql_warnings = analyse_sql_statements(
                 self.sql_analyser_class,
-                sql_statements,
+                self.get_runsql_statements(runsql.sql),
                 self.exclude_migration_tests,
+                report_ignored=not self.no_output,
+                check_stats=self.check_stats,
             )
             if sql_errors:
                 error += sql_errors
@@ -737,26 +1294,12 @@ class MigrationLinter:
 
         # And analysse the reverse SQL
         if runsql.reversible and runsql.reverse_sql != RunSQL.noop:
-            sql_statements = []
-            if isinstance(runsql.reverse_sql, (list, tuple)):
-                for sql in runsql.reverse_sql:
-                    params = None
-                    if isinstance(sql, (list, tuple)):
-                        elements = len(sql)
-                        if elements == 2:
-                            sql, params = sql
-                        else:
-                            raise ValueError("Expected a 2-tuple but got %d" % elements)
-                        sql_statements.append(sql % params)
-                    else:
-                        sql_statements.append(sql)
-            else:
-                sql_statements.append(runsql.reverse_sql)
-
             sql_errors, sql_ignored, sql_warnings = analyse_sql_statements(
                 self.sql_analyser_class,
-                sql_statements,
+                self.get_runsql_statements(runsql.reverse_sql),
                 self.exclude_migration_tests,
+                report_ignored=not self.no_output,
+                check_stats=self.check_stats,
             )
             if sql_errors:
                 error += sql_errors
@@ -766,3 +1309,47 @@ class MigrationLinter:
                 warning += sql_warnings
 
         return error, ignored, warning
+
+    def get_runsql_statements(self, sql: str | list | tuple) -> Iterator[str]:
+        """
+        Lazily split the SQL of a RunSQL operation into statements. The items
+        of a list are executed separately, with their parameters if any.
+        """
+        backslash_escapes = self.sql_analyser_class.backslash_escapes
+        if not isinstance(sql, (list, tuple)):
+            yield from split_sql_statements((sql,), backslash_escapes)
+            return
+
+        for item in sql:
+            if isinstance(item, (list, tuple)):
+                elements = len(item)
+                if elements != 2:
+                    raise ValueError("Expected a 2-tuple but got %d" % elements)
+                item, params = item
+                item = item % params
+            yield from split_sql_statements((item,), backslash_escapes)
+
+
+_worker_linter: MigrationLinter | None = None
+
+
+def _init_worker(
+    linter_options: dict[str, Any],
+    cache_generation: int | None,
+    migration_app_labels: set[str] | None,
+) -> None:
+    global _worker_linter
+
+    if not apps.ready:
+        django.setup()
+    _worker_linter = MigrationLinter(**linter_options)
+    _worker_linter.migration_app_labels = migration_app_labels
+    if cache_generation is not None:
+        _worker_linter.cache.generation = cache_generation
+        _worker_linter.sql_cache.generation = cache_generation
+        _worker_linter.stat_manifest.cache.generation = cache_generation
+
+
+def _lint_chunk(keys: list[tuple[str, str]]) -> LintChunkResult:
+    assert _worker_linter is not None
+    return _worker_linter.lint_chunk(keys)
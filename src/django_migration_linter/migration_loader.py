@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import logging
+from importlib.util import find_spec
+from typing import TYPE_CHECKING, Iterable
+
+from django.db.migrations.loader import MigrationLoader
+
+if TYPE_CHECKING:
+    from django.db.backends.base.base import BaseDatabaseWrapper
+
+logger = logging.getLogger("django_migration_linter")
+
+
+class ScopedMigrationLoader(MigrationLoader):
+    """
+    Migration loader that only imports the migrations of some apps, and of
+    the apps that they depend on.
+
+    The migration graph then contains the migrations of these apps and all
+    their ancestors, which is enough to lint them and to generate their SQL.
+    The migrations of the other apps are neither imported nor in the graph.
+    """
+
+    def __init__(
+        self,
+        connection: BaseDatabaseWrapper | None,
+        app_labels: Iterable[str],
+        **kwargs,
+    ):
+        self.app_labels = set(app_labels)
+        self.scope = set(self.app_labels)
+        self.skipped_apps: set[str] = set()
+        super().__init__(connection, **kwargs)
+
+    def migrations_module(self, app_label: str) -> tuple[str | None, bool]:
+        module_name, explicit = super().migrations_module(app_label)
+        if app_label in self.scope or module_name is None:
+            return module_name, explicit
+
+        try:
+            spec = find_spec(module_name)
+        except ImportError:
+            spec = None
+        if (
+            spec is None
+            or spec.origin is None
+            or spec.submodule_search_locations is None
+        ):
+            # Not a migrations package, let the loader mark the app as unmigrated.
+            return module_name, explicit
+
+        self.skipped_apps.add(app_label)
+        return None, explicit
+
+    def load_disk(self) -> None:
+        # Load the apps in scope, then the apps that their migrations depend
+        # on, until the dependencies of all loaded migrations are loaded.
+        self.scope = set(self.app_labels)
+        while True:
+            self.skipped_apps = set()
+            super().load_disk()
+            dependencies = {
+                key[0]
+                for migration in self.disk_migrations.values()
+                for key in (*migration.dependencies, *migration.run_before)
+            }
+            if dependencies <= self.scope:
+                break
+            self.scope |= dependencies
+
+        # The skipped apps have migrations, they must not be rendered from
+        # their models like the unmigrated apps.
+        self.unmigrated_apps -= self.skipped_apps
+        logger.info(
+            "Loaded the migrations of %s apps, skipped %s apps",
+            len(self.migrated_apps),
+            len(self.skipped_apps),
+        )
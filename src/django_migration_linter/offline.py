@@ -0,0 +1,342 @@
+from __future__ import annotations
+
+import logging
+import re
+from copy import deepcopy
+from decimal import Decimal
+from typing import TYPE_CHECKING, Any, Type
+
+from django.db import ProgrammingError, connections
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.models import CheckConstraint, Index, UniqueConstraint
+
+if TYPE_CHECKING:
+    from django.db.backends.base.base import BaseDatabaseWrapper
+    from django.db.models import Model
+
+logger = logging.getLogger("django_migration_linter")
+
+# The oldest server versions supported by the recent Django releases.
+DEFAULT_SERVER_VERSIONS = {
+    "postgresql": "14",
+    "mysql": "8.0.11",
+}
+MYSQL_SQL_MODE = (
+    "ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,"
+    "ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION"
+)
+APPLIED_MIGRATION_RE = re.compile(r"^(?P<indent>\s*)\[X\]\s+(?P<name>\S+)")
+# The offline subclasses of the database wrappers, built once per class.
+OFFLINE_WRAPPER_CLASSES: dict[type, type] = {}
+
+
+class OfflineDatabaseError(ProgrammingError):
+    """
+    Generating the SQL needs a query to the database, which is not available
+    in offline mode.
+    """
+
+
+class OfflineSchemaEditorMixin:
+    """
+    Collects the SQL of a schema editor without any query to the database.
+    """
+
+    def execute(self, sql, params=()):
+        if not self.collect_sql:
+            raise OfflineDatabaseError("Only the SQL can be collected in offline mode")
+        # Some backends merge the parameters with the database connection.
+        return BaseDatabaseSchemaEditor.execute(self, sql, params)
+
+    def quote_value(self, value):
+        try:
+            return super().quote_value(value)
+        except OfflineDatabaseError:
+            return quote_literal(value)
+
+    def _constraint_names(
+        self,
+        model,
+        column_names=None,
+        unique=None,
+        primary_key=None,
+        index=None,
+        foreign_key=None,
+        check=None,
+        type_=None,
+        exclude=None,
+    ):
+        """
+        Like the introspected constraint names, from the model of the table.
+        """
+        result = []
+        for name, infodict in get_model_constraints(self, model).items():
+            if column_names is None or list(column_names) == infodict["columns"]:
+                if unique is not None and infodict["unique"] != unique:
+                    continue
+                if primary_key is not None and infodict["primary_key"] != primary_key:
+                    continue
+                if index is not None and infodict["index"] != index:
+                    continue
+                if check is not None and infodict["check"] != check:
+                    continue
+                if foreign_key is not None and not infodict["foreign_key"]:
+                    continue
+                if type_ is not None and infodict["type"] != type_:
+                    continue
+                if not exclude or name not in exclude:
+                    result.append(name)
+
+        if not result and column_names:
+            # Only the constraints that exist are looked up, like the
+            # constraints of a previous state of the model.
+            if primary_key:
+                suffix = "_pk"
+            elif foreign_key:
+                suffix = "_fk"
+            elif unique:
+                suffix = "_uniq"
+            elif check:
+                suffix = "_check"
+            else:
+                suffix = "_idx" if len(column_names) > 1 else ""
+            result.append(
+                self._create_index_name(
+                    model._meta.db_table, list(column_names), suffix=suffix
+                )
+            )
+        return result
+
+
+class OfflineIntrospectionMixin:
+    def get_storage_engine(self, cursor, table_name):
+        # The tables use the default storage engine of the server.
+        return self.connection.mysql_server_data["default_storage_engine"]
+
+
+class OfflineCursor:
+    """
+    Cursor of an offline connection, that fails on the first query.
+    """
+
+    def __init__(self, alias: str):
+        self.alias = alias
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        pass
+
+    def __getattr__(self, name):
+        raise OfflineDatabaseError(
+            f"No connection to the '{self.alias}' database in offline mode"
+        )
+
+
+class OfflineDatabaseWrapperMixin:
+    """
+    Database connection that never connects, with pinned server features.
+    SQLite uses an in-memory database instead.
+    """
+
+    def ensure_connection(self):
+        if self.vendor != "sqlite":
+            raise OfflineDatabaseError(
+                f"No connection to the '{self.alias}' database in offline mode"
+            )
+        super().ensure_connection()
+
+    def cursor(self):
+        if self.vendor != "sqlite":
+            return OfflineCursor(self.alias)
+        return super().cursor()
+
+    def schema_editor(self, *args, **kwargs):
+        # A transaction needs a connection. The SQL generator wraps the
+        # collected SQL in a transaction like the 'sqlmigrate' command.
+        kwargs["atomic"] = False
+        return super().schema_editor(*args, **kwargs)
+
+
+def get_offline_wrapper_class(
+    wrapper_class: Type[BaseDatabaseWrapper],
+) -> Type[BaseDatabaseWrapper]:
+    if wrapper_class in OFFLINE_WRAPPER_CLASSES:
+        return OFFLINE_WRAPPER_CLASSES[wrapper_class]
+    schema_editor_class = type(
+        f"Offline{wrapper_class.SchemaEditorClass.__name__}",
+        (OfflineSchemaEditorMixin, wrapper_class.SchemaEditorClass),
+        {},
+    )
+    introspection_class = type(
+        f"Offline{wrapper_class.introspection_class.__name__}",
+        (OfflineIntrospectionMixin, wrapper_class.introspection_class),
+        {},
+    )
+    offline_wrapper_class = type(
+        f"Offline{wrapper_class.__name__}",
+        (OfflineDatabaseWrapperMixin, wrapper_class),
+        {
+            "SchemaEditorClass": schema_editor_class,
+            "introspection_class": introspection_class,
+        },
+    )
+    OFFLINE_WRAPPER_CLASSES[wrapper_class] = offline_wrapper_class
+    return offline_wrapper_class
+
+
+def get_offline_connection(
+    alias: str, server_version: str | None = None
+) -> BaseDatabaseWrapper:
+    """
+    A connection to generate the SQL of the database of this alias, with the
+    features of the given server version, without connecting to it.
+    """
+    connection = connections[alias]
+    settings_dict = deepcopy(connection.settings_dict)
+    if connection.vendor == "sqlite":
+        settings_dict["NAME"] = ":memory:"
+    offline_connection = get_offline_wrapper_class(type(connection))(
+        settings_dict, alias
+    )
+
+    server_version = server_version or DEFAULT_SERVER_VERSIONS.get(connection.vendor)
+    if server_version:
+        pin_server_version(offline_connection, server_version)
+    logger.info(
+        "Generating the SQL offline for %s %s",
+        connection.vendor,
+        server_version or "",
+    )
+    return offline_connection
+
+
+def pin_server_version(connection: BaseDatabaseWrapper, server_version: str) -> None:
+    """
+    Set the cached server information of the connection, that the database
+    features and the schema editor read instead of querying the server.
+    """
+    if connection.vendor == "postgresql":
+        numbers = [int(n) for n in re.findall(r"\d+", server_version)[:3]] + [0, 0]
+        major, minor, patch = numbers[:3]
+        connection.__dict__["pg_version"] = (
+            major * 10000 + minor
+            if major >= 10
+            else (major * 100 + minor) * 100 + patch
+        )
+    elif connection.vendor == "mysql":
+        connection.__dict__["mysql_server_data"] = {
+            "version": server_version,
+            "sql_mode": MYSQL_SQL_MODE,
+            "default_storage_engine": "InnoDB",
+            "sql_auto_is_null": False,
+            "lower_case_table_names": False,
+            "has_zoneinfo_database": True,
+        }
+        connection.__dict__["mysql_server_info"] = server_version
+
+
+def quote_literal(value: Any) -> str:
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, (int, float, Decimal)):
+        return str(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return "X'{}'".format(bytes(value).hex())
+    return "'{}'".format(str(value).replace("\\", "\\\\").replace("'", "''"))
+
+
+def get_model_constraints(
+    schema_editor: BaseDatabaseSchemaEditor, model: Type[Model]
+) -> dict[str, dict[str, Any]]:
+    """
+    The constraints of the table of a model, in the format of the database
+    introspection, with the names that the schema editor gives them.
+    """
+    meta = model._meta
+    table = meta.db_table
+    constraints: dict[str, dict[str, Any]] = {}
+
+    def add(name: str, columns: list[str], **info: Any) -> None:
+        constraints[name] = {
+            "columns": columns,
+            "primary_key": False,
+            "unique": False,
+            "foreign_key": None,
+            "check": False,
+            "index": False,
+            "type": None,
+            **info,
+        }
+
+    def get_columns(field_names) -> list[str]:
+        return [meta.get_field(name.lstrip("-")).column for name in field_names]
+
+    for field in meta.local_concrete_fields:
+        columns = [field.column]
+        if field.primary_key:
+            name = schema_editor._create_index_name(table, columns, suffix="_pk")
+            add(name, columns, primary_key=True, unique=True)
+        elif field.unique:
+            name = schema_editor._create_index_name(table, columns, suffix="_uniq")
+            add(name, columns, unique=True)
+        elif field.db_index:
+            name = schema_editor._create_index_name(table, columns)
+            add(name, columns, index=True, type=Index.suffix)
+        if field.remote_field and field.db_constraint:
+            name = schema_editor._create_index_name(table, columns, suffix="_fk")
+            add(
+                name,
+                columns,
+                foreign_key=(
+                    field.related_model._meta.db_table,
+                    field.target_field.column,
+                ),
+            )
+
+    for field_names in meta.unique_together:
+        columns = get_columns(field_names)
+        name = schema_editor._create_index_name(table, columns, suffix="_uniq")
+        add(name, columns, unique=True)
+    for field_names in getattr(meta, "index_together", ()):
+        columns = get_columns(field_names)
+        name = schema_editor._create_index_name(table, columns, suffix="_idx")
+        add(name, columns, index=True, type=Index.suffix)
+    for index in meta.indexes:
+        add(index.name, get_columns(index.fields), index=True, type=index.suffix)
+    for constraint in meta.constraints:
+        if isinstance(constraint, UniqueConstraint):
+            add(constraint.name, get_columns(constraint.fields), unique=True)
+        elif isinstance(constraint, CheckConstraint):
+            add(constraint.name, [], check=True)
+    return constraints
+
+
+def read_applied_migrations(path: str) -> set[tuple[str, str]]:
+    """
+    Read the applied migrations from a snapshot, the output of the
+    'showmigrations --list' or 'showmigrations --plan' command.
+    """
+    applied_migrations = set()
+    app_label = None
+    with open(path) as file:
+        for line in file:
+            if line.strip() and not line[0].isspace() and not line.startswith("["):
+                # The app label of the next migrations, in the list format.
+                app_label = line.strip()
+                continue
+            match = APPLIED_MIGRATION_RE.match(line)
+            if match is None:
+                continue
+            if match.group("indent") and app_label is not None:
+                applied_migrations.add((app_label, match.group("name")))
+            elif "." in match.group("name"):
+                label, name = match.group("name").split(".", 1)
+                applied_migrations.add((label, name))
+    return applied_migrations
@@ -0,0 +1,364 @@
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Any, Iterable, Type
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.utils import truncate_name
+from django.db.migrations import (
+    AlterField,
+    AlterModelManagers,
+    AlterModelOptions,
+    CreateModel,
+    DeleteModel,
+    RemoveField,
+    RenameField,
+    RunPython,
+    SeparateDatabaseAndState,
+)
+from django.db.migrations.state import ModelState, ProjectState
+
+from .operations import IgnoreMigration
+from .sql_analyser import MySqlAnalyser, PostgresqlAnalyser, SqliteAnalyser
+from .sql_analyser.base import BaseAnalyser, Check, Issue, update_migration_checks
+from .sql_generator import AncestorState, MigrationKey, build_plan
+
+if TYPE_CHECKING:
+    from django.db.migrations import Migration
+    from django.db.migrations.loader import MigrationLoader
+    from django.db.migrations.operations.base import Operation
+    from django.db.models import Field
+
+logger = logging.getLogger("django_migration_linter")
+
+# Operations that never generate SQL.
+NO_SQL_OPERATIONS = (AlterModelManagers, AlterModelOptions, IgnoreMigration, RunPython)
+MODEL_OPERATIONS = (
+    AlterField,
+    CreateModel,
+    DeleteModel,
+    RemoveField,
+    RenameField,
+    SeparateDatabaseAndState,
+)
+# The field attributes that do not change the column, before Django 4.1.
+NON_DB_ATTRS = (
+    "blank",
+    "choices",
+    "editable",
+    "error_messages",
+    "help_text",
+    "limit_choices_to",
+    "on_delete",
+    "related_name",
+    "related_query_name",
+    "validators",
+    "verbose_name",
+)
+
+BUILTIN_ANALYSERS = (BaseAnalyser, MySqlAnalyser, PostgresqlAnalyser, SqliteAnalyser)
+
+# An issue found on an operation: (code, table, column).
+OperationIssue = tuple[str, "str | None", "str | None"]
+
+
+def get_checks(sql_analyser_class: Type[BaseAnalyser]) -> list[Check]:
+    return update_migration_checks(
+        sql_analyser_class.base_migration_checks, sql_analyser_class.migration_checks
+    )
+
+
+def get_builtin_analyser_class(
+    sql_analyser_class: Type[BaseAnalyser],
+) -> Type[BaseAnalyser] | None:
+    """
+    Return the built-in analyser class that the class derives from, or None
+    if the class runs other checks, that could find other issues in the SQL.
+    """
+    builtin_class = next(
+        cls for cls in sql_analyser_class.__mro__ if cls in BUILTIN_ANALYSERS
+    )
+    if get_checks(sql_analyser_class) != get_checks(builtin_class):
+        return None
+    return builtin_class
+
+
+class OperationAnalyser:
+    """
+    Finds the issues of migrations from their operations and the project state
+    before them, without generating their SQL.
+
+    Only the operations whose SQL is known from the project state are decided:
+    the operations that only change the state, the created models and, for
+    the vendors where their SQL does not depend on the database server, the
+    deleted models and the removed or renamed fields. A migration with any
+    other operation is left to the SQL analyser, like all the operations that
+    generate SQL when the analyser class changes the built-in checks.
+    """
+
+    def __init__(
+        self,
+        sql_analyser_class: Type[BaseAnalyser],
+        exclude_migration_tests: Iterable[str] | None = None,
+        report_ignored: bool = True,
+        database: str = DEFAULT_DB_ALIAS,
+    ):
+        self.sql_analyser_class = sql_analyser_class
+        self.database = database
+        self.exclude_migration_tests = exclude_migration_tests
+        self.report_ignored = report_ignored
+        # The issues of the operations that generate SQL are known for the
+        # checks of the built-in analysers only.
+        builtin_class = get_builtin_analyser_class(sql_analyser_class)
+        self.decides_sql_operations = builtin_class is not None
+        # SQLite remakes the table for some of these operations, and older MySQL
+        # servers rename a column with its whole definition.
+        self.decides_dropped_schema = builtin_class in (
+            MySqlAnalyser,
+            PostgresqlAnalyser,
+        )
+        self.decides_renamed_fields = builtin_class is PostgresqlAnalyser
+        # The decided migrations whose operations generate no SQL at all.
+        self.state_only_migrations: set[MigrationKey] = set()
+
+    @staticmethod
+    def is_candidate(migration: Migration) -> bool:
+        return all(
+            isinstance(operation, NO_SQL_OPERATIONS + MODEL_OPERATIONS)
+            for operation in migration.operations
+        )
+
+    def analyse_migrations(
+        self, migration_loader: MigrationLoader, keys: Iterable[MigrationKey]
+    ) -> dict[MigrationKey, tuple[list[Issue], list[Issue], list[Issue]]]:
+        """
+        Return the errors, ignored issues and warnings of the migrations that
+        can be decided. Like for the SQL generation, each migration is decided
+        on the project state of its ancestors.
+        """
+        if settings.DATABASE_ROUTERS:
+            # The routers can skip any operation on the linted database.
+            return {}
+
+        graph = migration_loader.graph
+        candidates = {
+            key
+            for key in keys
+            if key in graph.nodes and self.is_candidate(graph.nodes[key])
+        }
+        results: dict[MigrationKey, tuple[list[Issue], list[Issue], list[Issue]]] = {}
+        ancestor_state = AncestorState(migration_loader)
+        for node in build_plan(migration_loader, sorted(candidates)):
+            if node not in candidates:
+                continue
+            try:
+                state = ancestor_state.before(node)
+                issues = self.analyse(graph.nodes[node], state)
+            except Exception:
+                # Left to the SQL generation, which reports the error.
+                logger.debug("Could not walk the state at %s", node, exc_info=True)
+                ancestor_state.discard()
+                continue
+            ancestor_state.applied(node, state)
+            if issues is not None:
+                results[node] = self.report_issues(issues)
+
+        logger.info(
+            "Decided %s of %s migrations from their operations, %s without SQL",
+            len(results),
+            len(candidates),
+            len(self.state_only_migrations),
+        )
+        return results
+
+    def analyse(
+        self, migration: Migration, state: ProjectState
+    ) -> list[OperationIssue] | None:
+        """
+        Return the issues of the migration, or None if they cannot be decided.
+        The state is carried forward over the migration.
+        """
+        issues: list[OperationIssue] | None = []
+        state_only = True
+        for operation in migration.operations:
+            if issues is not None and not self.is_state_operation(
+                migration.app_label, operation, state
+            ):
+                state_only = False
+                operation_issues = self.analyse_operation(
+                    migration.app_label, operation, state
+                )
+                issues = None if operation_issues is None else issues + operation_issues
+            operation.state_forwards(migration.app_label, state)
+
+        if issues is not None and state_only:
+            self.state_only_migrations.add((migration.app_label, migration.name))
+        return issues
+
+    def is_state_operation(
+        self, app_label: str, operation: Operation, state: ProjectState
+    ) -> bool:
+        """
+        Whether the operation only changes the project state, and generates
+        no SQL on any database.
+        """
+        if isinstance(operation, NO_SQL_OPERATIONS):
+            return True
+        if isinstance(operation, SeparateDatabaseAndState):
+            database_state = state.clone()
+            for database_operation in operation.database_operations:
+                if not self.is_state_operation(
+                    app_label, database_operation, database_state
+                ):
+                    return False
+                database_operation.state_forwards(app_label, database_state)
+            return True
+        if isinstance(operation, CreateModel):
+            return self.is_unmigrated(operation.options)
+
+        model_state = self.get_model_state(app_label, operation, state)
+        if model_state is None:
+            return False
+        if self.is_unmigrated(model_state.options):
+            return True
+
+        if isinstance(operation, AlterField):
+            old_field = model_state.fields.get(operation.name)
+            return old_field is not None and not self.alters_column(
+                old_field, operation.field, operation.name
+            )
+        if isinstance(operation, RenameField):
+            field = model_state.fields.get(operation.old_name)
+            old_column = self.get_column(field, operation.old_name)
+            return old_column is not None and old_column == self.get_column(
+                field, operation.new_name
+            )
+        return False
+
+    def analyse_operation(
+        self, app_label: str, operation: Operation, state: ProjectState
+    ) -> list[OperationIssue] | None:
+        """
+        Return the issues of an operation that generates SQL, or None if they
+        cannot be decided.
+        """
+        if not self.decides_sql_operations:
+            return None
+        if isinstance(operation, CreateModel):
+            # The indexes and constraints are on the created table.
+            return []
+        if isinstance(operation, SeparateDatabaseAndState):
+            issues: list[OperationIssue] = []
+            database_state = state.clone()
+            for database_operation in operation.database_operations:
+                if not self.is_state_operation(
+                    app_label, database_operation, database_state
+                ):
+                    operation_issues = self.analyse_operation(
+                        app_label, database_operation, database_state
+                    )
+                    if operation_issues is None:
+                        return None
+                    issues += operation_issues
+                database_operation.state_forwards(app_label, database_state)
+            return issues
+
+        model_state = self.get_model_state(app_label, operation, state)
+        if (
+            model_state is None
+            or "swappable" in model_state.options
+            or not self.decides_dropped_schema
+        ):
+            return None
+
+        table = self.get_db_table(model_state)
+        if isinstance(operation, DeleteModel):
+            if any(f.many_to_many for f in model_state.fields.values()):
+                # The tables of the many-to-many fields are dropped as well.
+                return None
+            return [("DROP_TABLE", table, None)]
+
+        if isinstance(operation, RemoveField):
+            column = self.get_column(
+                model_state.fields.get(operation.name), operation.name
+            )
+            if column is None:
+                return None
+            return [("DROP_COLUMN", table, column)]
+
+        if isinstance(operation, RenameField) and self.decides_renamed_fields:
+            column = self.get_column(
+                model_state.fields.get(operation.old_name), operation.old_name
+            )
+            if column is None:
+                return None
+            return [("RENAME_COLUMN", table, column)]
+        return None
+
+    @staticmethod
+    def get_model_state(
+        app_label: str, operation: Operation, state: ProjectState
+    ) -> ModelState | None:
+        if isinstance(operation, DeleteModel):
+            return state.models.get((app_label, operation.name_lower))
+        if isinstance(operation, (AlterField, RemoveField, RenameField)):
+            return state.models.get((app_label, operation.model_name_lower))
+        return None
+
+    @staticmethod
+    def is_unmigrated(options: dict[str, Any]) -> bool:
+        """
+        Whether the operations on the model generate no SQL, with these options.
+        """
+        return "swappable" not in options and (
+            not options.get("managed", True) or bool(options.get("proxy"))
+        )
+
+    def get_db_table(self, model_state: ModelState) -> str:
+        # Same default as the options of the rendered model, shortened for the
+        # linted database rather than the default one.
+        return model_state.options.get("db_table") or truncate_name(
+            f"{model_state.app_label}_{model_state.name_lower}",
+            connections[self.database].ops.max_name_length(),
+        )
+
+    @staticmethod
+    def get_column(field: Field | None, name: str) -> str | None:
+        """
+        The column of a field with this name, None for the fields without a
+        column of the model table.
+        """
+        if field is None or field.many_to_many:
+            return None
+        field = field.clone()
+        field.set_attributes_from_name(name)
+        return field.column
+
+    @classmethod
+    def alters_column(cls, old_field: Field, new_field: Field, name: str) -> bool:
+        """
+        Like the schema editors, only alter a column when its name or the
+        attributes of its field that affect the database change.
+        """
+        old_column = cls.get_column(old_field, name)
+        if old_column is None or old_column != cls.get_column(new_field, name):
+            return True
+
+        _, old_path, old_args, old_kwargs = old_field.deconstruct()
+        _, new_path, new_args, new_kwargs = new_field.deconstruct()
+        for attr in getattr(old_field, "non_db_attrs", NON_DB_ATTRS):
+            old_kwargs.pop(attr, None)
+        for attr in getattr(new_field, "non_db_attrs", NON_DB_ATTRS):
+            new_kwargs.pop(attr, None)
+        return (old_path, old_args, old_kwargs) != (new_path, new_args, new_kwargs)
+
+    def report_issues(
+        self, issues: Iterable[OperationIssue]
+    ) -> tuple[list[Issue], list[Issue], list[Issue]]:
+        sql_analyser = self.sql_analyser_class(
+            self.exclude_migration_tests, self.report_ignored
+        )
+        for code, table, column in issues:
+            sql_analyser.report_issue(code, table=table, column=column)
+        return sql_analyser.errors, sql_analyser.ignored, sql_analyser.warnings
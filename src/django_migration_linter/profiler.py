@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+# The phase of the time spent linting a migration outside the other phases,
+# like printing its result.
+LINT_PHASE = "lint"
+
+
+@dataclass
+class PhaseStats:
+    calls: int = 0
+    time: float = 0.0
+
+
+@dataclass
+class Span:
+    """
+    A phase of a lint run, traced in a process.
+    """
+
+    name: str
+    category: str
+    start: float
+    duration: float
+    pid: int
+    migration: tuple[str, str] | None = None
+
+
+@dataclass
+class Profiler:
+    """
+    Records the wall time and the number of calls of the phases of a lint run.
+
+    The time of a phase excludes the time of the phases nested in it, so that
+    the times of all phases add up to the profiled time. The time of the
+    phases run while linting a migration is also recorded for that migration.
+
+    When tracing, each run of a phase is also kept as a span, that can be
+    exported in the trace event format of the Chrome and Perfetto viewers.
+    """
+
+    enabled: bool = True
+    trace: bool = False
+    phases: dict[str, PhaseStats] = field(default_factory=dict)
+    migrations: dict[tuple[str, str], dict[str, float]] = field(default_factory=dict)
+    spans: list[Span] = field(default_factory=list)
+    # The elapsed time of the nested phases of each running phase.
+    _nested_times: list[float] = field(default_factory=list, repr=False)
+    _migration: tuple[str, str] | None = field(default=None, repr=False)
+
+    @contextmanager
+    def phase(self, name: str, span_name: str | None = None) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+
+        self._nested_times.append(0.0)
+        # The clock is shared by the processes, the spans of the workers are
+        # on the same timeline.
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            own_time = elapsed - self._nested_times.pop()
+            if self._nested_times:
+                self._nested_times[-1] += elapsed
+            self.add(name, own_time)
+            if self.trace:
+                self.spans.append(
+                    Span(
+                        name=span_name or name,
+                        category=name,
+                        start=start,
+                        duration=elapsed,
+                        pid=os.getpid(),
+                        migration=self._migration,
+                    )
+                )
+
+    @contextmanager
+    def migration(self, key: tuple[str, str]) -> Iterator[None]:
+        """
+        Attribute the time of the phases to this migration.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        previous_migration, self._migration = self._migration, key
+        try:
+            with self.phase(LINT_PHASE, span_name="{}.{}".format(*key)):
+                yield
+        finally:
+            self._migration = previous_migration
+
+    def add(self, name: str, own_time: float, calls: int = 1) -> None:
+        stats = self.phases.setdefault(name, PhaseStats())
+        stats.calls += calls
+        stats.time += own_time
+        if self._migration is not None:
+            migration_phases = self.migrations.setdefault(self._migration, {})
+            migration_phases[name] = migration_phases.get(name, 0.0) + own_time
+
+    def merge(self, other: Profiler) -> None:
+        """
+        Add the phases and migrations of a profiler of a worker process.
+        """
+        for name, stats in other.phases.items():
+            self.add(name, stats.time, calls=stats.calls)
+        for key, phases in other.migrations.items():
+            migration_phases = self.migrations.setdefault(key, {})
+            for name, own_time in phases.items():
+                migration_phases[name] = migration_phases.get(name, 0.0) + own_time
+        self.spans += other.spans
+
+    @property
+    def total_time(self) -> float:
+        return sum(stats.time for stats in self.phases.values())
+
+    def get_slowest_migrations(
+        self, nb_migrations: int
+    ) -> list[tuple[tuple[str, str], float, str]]:
+        """
+        The slowest migrations, with their time and their dominant phase.
+        """
+        slowest = sorted(
+            self.migrations.items(),
+            key=lambda item: sum(item[1].values()),
+            reverse=True,
+        )[:nb_migrations]
+        return [
+            (key, sum(phases.values()), max(phases, key=lambda name: phases[name]))
+            for key, phases in slowest
+        ]
+
+    def get_trace_events(self) -> list[dict[str, Any]]:
+        """
+        The spans as complete events of the trace event format, in
+        microseconds. The processes are named after their role in the run.
+        """
+        main_pid = os.getpid()
+        events: list[dict[str, Any]] = [
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": pid,
+                "args": {
+                    "name": (
+                        "django-migration-linter"
+                        if pid == main_pid
+                        else f"worker {pid}"
+                    )
+                },
+            }
+            for pid in sorted({span.pid for span in self.spans} | {main_pid})
+        ]
+        for span in sorted(self.spans, key=lambda span: span.start):
+            event = {
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": span.start * 1e6,
+                "dur": span.duration * 1e6,
+                "pid": span.pid,
+                "tid": span.pid,
+            }
+            if span.migration is not None:
+                event["args"] = {"migration": "{}.{}".format(*span.migration)}
+            events.append(event)
+        return events
+
+    def write_trace(self, path: str) -> None:
+        with open(path, "w") as file:
+            json.dump(
+                {"traceEvents": self.get_trace_events(), "displayTimeUnit": "ms"}, file
+            )
@@ -0,0 +1,377 @@
+from __future__ import annotations
+
+import ast
+import functools
+import hashlib
+import inspect
+import os
+import sys
+import textwrap
+from dataclasses import dataclass, field
+from types import CodeType
+from typing import Any, Callable, Iterator, Union
+
+from .sql_analyser.base import Issue
+
+FunctionNode = Union[ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda]
+
+# The kinds of binding of a name in a function.
+GET_MODEL = "get_model"
+IMPORT = "import"
+LOCAL = "local"
+
+
+@dataclass(frozen=True)
+class RunPythonModels:
+    """
+    The models that a RunPython function uses through their manager, like in
+    "Model.objects": the ones that are not loaded with apps.get_model, and
+    the variables whose name differs from the model class given to
+    apps.get_model. A model is listed once per use.
+    """
+
+    imported: tuple[str, ...] = ()
+    misnamed: tuple[str, ...] = ()
+
+    def get_import_issues(self, function_name: str) -> list[Issue]:
+        return [
+            Issue(
+                code="RUNPYTHON_MODEL_IMPORT",
+                message=(
+                    "'{}': Could not find an 'apps.get_model(\"...\", \"{}\")' "
+                    "call. Importing the model directly is incorrect for "
+                    "data migrations."
+                ).format(function_name, model),
+            )
+            for model in self.imported
+        ]
+
+    def get_variable_naming_issues(self, function_name: str) -> list[Issue]:
+        return [
+            Issue(
+                code="RUNPYTHON_MODEL_VARIABLE_NAME",
+                message=(
+                    "'{}': Model variable name {} is different from the "
+                    "model class name that was found in the "
+                    "apps.get_model(...) call."
+                ).format(function_name, model),
+            )
+            for model in self.misnamed
+        ]
+
+
+@dataclass
+class Scope:
+    """
+    The names bound in a function, with the kind of each of their bindings
+    and the model classes they are loaded with by apps.get_model.
+    """
+
+    parent: Scope | None = None
+    bindings: dict[str, set[str]] = field(default_factory=dict)
+    model_names: dict[str, set[str]] = field(default_factory=dict)
+    global_names: set[str] = field(default_factory=set)
+
+    def bind(self, name: str, kind: str, model_name: str | None = None) -> None:
+        self.bindings.setdefault(name, set()).add(kind)
+        if model_name is not None:
+            self.model_names.setdefault(name, set()).add(model_name)
+
+    def resolve(self, name: str) -> Scope | None:
+        """The scope that binds the name, None if it is global."""
+        scope: Scope | None = self
+        while scope is not None:
+            if name in scope.global_names:
+                return None
+            if name in scope.bindings:
+                return scope
+            scope = scope.parent
+        return None
+
+
+def is_get_model_call(call: ast.Call) -> bool:
+    return isinstance(call.func, ast.Attribute) and call.func.attr == "get_model"
+
+
+def get_model_name(call: ast.Call) -> str | None:
+    """
+    The model class name of an apps.get_model call, like "Model" in
+    apps.get_model("app", "Model") or apps.get_model("app.Model"), None if
+    it is not a constant.
+    """
+    keywords = {k.arg: k.value for k in call.keywords}
+    argument = call.args[1] if len(call.args) > 1 else keywords.get("model_name")
+    is_label = argument is None
+    if is_label:
+        argument = call.args[0] if call.args else keywords.get("app_label")
+    if not (isinstance(argument, ast.Constant) and isinstance(argument.value, str)):
+        return None
+    if is_label:
+        return argument.value.rpartition(".")[2] or None
+    return argument.value
+
+
+class SymbolTableVisitor(ast.NodeVisitor):
+    """
+    Builds the scopes of a function and of the functions nested in it, and
+    collects the names whose manager is used, in the order of the source.
+    The uses are resolved once the whole function is visited, since a name
+    bound anywhere in a function is local to all of it.
+    """
+
+    def __init__(self) -> None:
+        self.scope = Scope()
+        # The "Model.objects" uses: the scope, the first name of the
+        # expression and whether the manager is directly on that name.
+        self.uses: list[tuple[Scope, str, bool]] = []
+
+    def visit_function(self, node: FunctionNode) -> None:
+        if not isinstance(node, ast.Lambda):
+            self.scope.bind(node.name, LOCAL)
+            for decorator in node.decorator_list:
+                self.visit(decorator)
+        for default in node.args.defaults + node.args.kw_defaults:
+            if default is not None:
+                self.visit(default)
+
+        self.scope = Scope(parent=self.scope)
+        arguments = node.args
+        for argument in (
+            arguments.posonlyargs
+            + arguments.args
+            + arguments.kwonlyargs
+            + [a for a in (arguments.vararg, arguments.kwarg) if a is not None]
+        ):
+            self.scope.bind(argument.arg, LOCAL)
+        if isinstance(node, ast.Lambda):
+            self.visit(node.body)
+        else:
+            for statement in node.body:
+                self.visit(statement)
+        assert self.scope.parent is not None
+        self.scope = self.scope.parent
+
+    visit_FunctionDef = visit_function
+    visit_AsyncFunctionDef = visit_function
+    visit_Lambda = visit_function
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        self.scope.bind(node.name, LOCAL)
+        self.generic_visit(node)
+
+    def visit_Global(self, node: ast.Global) -> None:
+        self.scope.global_names.update(node.names)
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            self.scope.bind(alias.asname or alias.name.split(".", 1)[0], IMPORT)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        for alias in node.names:
+            self.scope.bind(alias.asname or alias.name, IMPORT)
+
+    def visit_Assign(self, node: ast.Assign) -> None:
+        for target in node.targets:
+            self.bind_target(target, node.value)
+        self.visit(node.value)
+
+    def visit_AnnAssign(self, node: ast.AnnAssign) -> None:
+        self.bind_target(node.target, node.value)
+        self.visit(node.annotation)
+        if node.value is not None:
+            self.visit(node.value)
+
+    def visit_NamedExpr(self, node: ast.NamedExpr) -> None:
+        self.bind_target(node.target, node.value)
+        self.visit(node.value)
+
+    def bind_target(self, target: ast.expr, value: ast.expr | None) -> None:
+        if (
+            isinstance(target, ast.Name)
+            and isinstance(value, ast.Call)
+            and is_get_model_call(value)
+        ):
+            self.scope.bind(target.id, GET_MODEL, get_model_name(value))
+        elif (
+            isinstance(target, (ast.Tuple, ast.List))
+            and isinstance(value, (ast.Tuple, ast.List))
+            and len(target.elts) == len(value.elts)
+        ):
+            for target_element, value_element in zip(target.elts, value.elts):
+                self.bind_target(target_element, value_element)
+        else:
+            self.visit(target)
+
+    def visit_Name(self, node: ast.Name) -> None:
+        # The names bound by the assignments to other values, the loops, the
+        # with statements and the comprehensions.
+        if isinstance(node.ctx, (ast.Store, ast.Del)):
+            self.scope.bind(node.id, LOCAL)
+
+    def visit_ExceptHandler(self, node: ast.ExceptHandler) -> None:
+        if node.name:
+            self.scope.bind(node.name, LOCAL)
+        self.generic_visit(node)
+
+    def visit_Attribute(self, node: ast.Attribute) -> None:
+        if node.attr == "objects":
+            value = node.value
+            while isinstance(value, ast.Attribute):
+                value = value.value
+            if isinstance(value, ast.Name):
+                self.uses.append(
+                    (self.scope, value.id, isinstance(node.value, ast.Name))
+                )
+        self.generic_visit(node)
+
+    def get_models(self) -> RunPythonModels:
+        imported = []
+        misnamed = []
+        for scope, name, is_direct in self.uses:
+            binding_scope = scope.resolve(name)
+            kinds = binding_scope.bindings[name] if binding_scope else {IMPORT}
+            if kinds == {IMPORT}:
+                imported.append(name)
+            elif is_direct and binding_scope and GET_MODEL in kinds:
+                model_names = binding_scope.model_names.get(name, set())
+                if model_names and name not in model_names:
+                    misnamed.append(name)
+        return RunPythonModels(imported=tuple(imported), misnamed=tuple(misnamed))
+
+
+def parse_function(function: Callable, source: str) -> FunctionNode | None:
+    """
+    The node of the function in its source. The source of a lambda is the
+    statement that it is part of, that may not be valid on its own.
+    """
+    source = textwrap.dedent(source)
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        try:
+            tree = ast.parse("(\n{}\n)".format(source.strip().rstrip(",")))
+        except SyntaxError:
+            return None
+
+    nodes = (
+        node
+        for node in ast.walk(tree)
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda))
+    )
+    if function.__name__ != "<lambda>":
+        return next(
+            (n for n in nodes if not isinstance(n, ast.Lambda)),
+            None,
+        )
+    # The lambda with the same arguments, the first one of the statement when
+    # several have them.
+    code = getattr(function, "__code__", None)
+    arg_names = code.co_varnames[: code.co_argcount] if code else ()
+    return next(
+        (
+            n
+            for n in nodes
+            if isinstance(n, ast.Lambda)
+            and tuple(a.arg for a in n.args.args) == arg_names
+        ),
+        None,
+    )
+
+
+_analysed_functions: dict[tuple[str, str], RunPythonModels] = {}
+
+
+def analyse_runpython_function(function: Callable) -> RunPythonModels:
+    """
+    Find the models that a RunPython function uses through their manager,
+    from the syntax tree of its source.
+
+    The analysis is memoized by the qualified name of the function and the
+    hash of its source, so that a function shared by several migrations is
+    parsed once.
+    """
+    source = inspect.getsource(function)
+    key = (
+        getattr(function, "__qualname__", function.__name__),
+        hashlib.blake2b(source.encode(), digest_size=16).hexdigest(),
+    )
+    if key in _analysed_functions:
+        return _analysed_functions[key]
+
+    node = parse_function(function, source)
+    if node is None:
+        models = RunPythonModels()
+    else:
+        visitor = SymbolTableVisitor()
+        visitor.visit(node)
+        models = visitor.get_models()
+    _analysed_functions[key] = models
+    return models
+
+
+def get_code_names(code: CodeType) -> Iterator[str]:
+    """The global and attribute names of a code object and of the nested ones."""
+    yield from code.co_names
+    for constant in code.co_consts:
+        if isinstance(constant, CodeType):
+            yield from get_code_names(constant)
+
+
+def get_function_source_files(
+    function: Callable, is_project_file: Callable[[str], bool]
+) -> set[str]:
+    """
+    The project source files that a RunPython function depends on: the file
+    it is defined in, and the files of the functions, classes and modules it
+    references through its globals and its closure, followed transitively.
+    The objects defined out of the project are not followed.
+
+    Only the attributes whose name appears in the code are followed on a
+    module, like "helper" in "migration_utils.helper(apps)".
+    """
+    files: set[str] = set()
+    seen: set[int] = set()
+    stack: list[tuple[Any, frozenset[str]]] = [(function, frozenset())]
+    while stack:
+        obj, names = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+
+        if isinstance(obj, functools.partial):
+            stack.extend(
+                (o, names) for o in (obj.func, *obj.args, *obj.keywords.values())
+            )
+        elif inspect.ismethod(obj) or isinstance(obj, (staticmethod, classmethod)):
+            stack.append((obj.__func__, names))
+        elif inspect.ismodule(obj):
+            path = getattr(obj, "__file__", None)
+            if path and is_project_file(path):
+                files.add(os.path.abspath(path))
+                stack.extend(
+                    (getattr(obj, name), names) for name in names if hasattr(obj, name)
+                )
+        elif inspect.isclass(obj):
+            module = sys.modules.get(obj.__module__)
+            path = getattr(module, "__file__", None)
+            if path and is_project_file(path):
+                files.add(os.path.abspath(path))
+                stack.extend((o, names) for o in vars(obj).values())
+        elif inspect.isfunction(obj):
+            code = obj.__code__
+            if not is_project_file(code.co_filename):
+                continue
+            files.add(os.path.abspath(code.co_filename))
+            code_names = frozenset(get_code_names(code))
+            stack.extend(
+                (obj.__globals__[name], code_names)
+                for name in code_names
+                if name in obj.__globals__
+            )
+            for cell in obj.__closure__ or ():
+                try:
+                    stack.append((cell.cell_contents, code_names))
+                except ValueError:
+                    # An empty cell, like a variable that is not assigned yet.
+                    pass
+    return files
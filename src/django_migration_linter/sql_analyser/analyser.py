@@ -4,7 +4,7 @@ import logging
 from typing import TYPE_CHECKING, Iterable, Type
 
 if TYPE_CHECKING:
-    from sql_analyser.base import Issue
+    from sql_analyser.base import CheckStatistics, Issue
 
 from django_migration_linter.sql_analyser import (
     BaseAnalyser,
@@ -62,9 +62,13 @@ def get_sql_analyser_class_from_db_vendor(database_vendor: str) -> Type[BaseAnal
 
 def analyse_sql_statements(
     sql_analyser_class: Type[BaseAnalyser],
-    sql_statements: list[str],
+    sql_statements: Iterable[str],
     exclude_migration_tests: Iterable[str] | None = None,
+    report_ignored: bool = True,
+    check_stats: CheckStatistics | None = None,
 ) -> tuple[list[Issue], list[Issue], list[Issue]]:
-    sql_analyser = sql_analyser_class(exclude_migration_tests)
+    sql_analyser = sql_analyser_class(
+        exclude_migration_tests, report_ignored, check_stats=check_stats
+    )
     sql_analyser.analyse(sql_statements)
     return sql_analyser.errors, sql_analyser.ignored, sql_analyser.warnings
@@ -1,78 +1,117 @@
 from __future__ import annotations
 
+import json
 import logging
 import re
-from copy import deepcopy
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field, replace
 from enum import Enum
-from typing import Callable, Iterable
+from typing import Callable, Iterable, Type
+
+from .statement import (
+    Statement,
+    parse_sql_statements,
+    parse_statement,
+    parse_statements,
+)
 
 logger = logging.getLogger("django_migration_linter")
 
 
-def find_check_from_code(checks: list[Check], code: str) -> Check | None:
+def find_check_from_code(checks: Iterable[Check], code: str) -> Check | None:
     return next((c for c in checks if c.code == code), None)
 
 
 def update_migration_checks(
-    base_checks: list[Check], specific_checks: list[Check]
+    base_checks: Iterable[Check], specific_checks: Iterable[Check]
 ) -> list[Check]:
-    new_checks = deepcopy(base_checks)
+    """
+    Return the base checks, where the specific checks replace the base checks
+    with the same code, and the other specific checks are appended.
+    """
+    new_checks = list(base_checks)
     for override_check in specific_checks:
         migration_check = find_check_from_code(new_checks, override_check.code)
 
         if migration_check is None or not override_check.code:
-            migration_check = deepcopy(override_check)
-            new_checks.append(migration_check)
-
-        for field in override_check.__dataclass_fields__:
-            setattr(migration_check, field, getattr(override_check, field))
+            new_checks.append(override_check)
+        else:
+            new_checks[new_checks.index(migration_check)] = override_check
     return new_checks
 
 
-def has_not_null_column(sql_statements: list[str], **kwargs) -> bool:
-    # TODO: improve to detect that the same column is concerned
-    not_null_column = False
-    has_default_value = False
-
-    for sql in sql_statements:
-        if re.search("(?<!DROP )(?<!IS )NOT NULL", sql) and not (
-            sql.startswith("CREATE TABLE")
-            or sql.startswith("CREATE INDEX")
-            or sql.startswith("CREATE UNIQUE INDEX")
-        ):
-            not_null_column = True
-        if re.search("DEFAULT (?!NULL).*NOT NULL", sql):
-            has_default_value = True
-        if "SET DEFAULT" in sql and "SET DEFAULT NULL" not in sql:
-            has_default_value = True
-        if "DROP DEFAULT" in sql:
-            has_default_value = False
-
-    return not_null_column and not has_default_value
-
-
-def has_add_unique(sql_statements: list[str], **kwargs) -> bool:
-    regex_result = None
-    for sql in sql_statements:
-        regex_result = re.search(
-            "ALTER TABLE (.*) ADD CONSTRAINT .* UNIQUE", sql
-        ) or re.search('CREATE UNIQUE INDEX .* ON (".*?")', sql)
-        if regex_result:
-            break
-    if not regex_result:
-        return False
-
-    concerned_table = regex_result.group(1)
-    table_is_added_in_transaction = any(
-        sql.startswith(f"CREATE TABLE {concerned_table}") for sql in sql_statements
+def has_not_null_column(
+    sql_statements: list[str], statements: Iterable[Statement] | None = None, **kwargs
+) -> Statement | None:
+    """
+    Return the statement that makes a column NOT NULL, when that column has no
+    default value at the end of the migration.
+    """
+    if statements is None:
+        statements = parse_sql_statements(sql_statements)
+
+    not_null_columns: dict[tuple[str | None, str | None], Statement] = {}
+    has_default_value: dict[tuple[str | None, str | None], bool] = {}
+    for statement in statements:
+        if statement.is_create("TABLE", "INDEX"):
+            continue
+        for clause in statement.clauses:
+            column = (statement.table, clause.column)
+            if "NOT NULL" in clause.flags:
+                not_null_columns.setdefault(
+                    column, replace(statement, column=clause.column)
+                )
+            if "DEFAULT" in clause.flags:
+                has_default_value[column] = True
+            if "DROP DEFAULT" in clause.flags:
+                has_default_value[column] = False
+
+    return next(
+        (
+            statement
+            for column, statement in not_null_columns.items()
+            if not has_default_value.get(column)
+        ),
+        None,
+    )
+
+
+def has_add_unique(
+    sql_statements: list[str], statements: Iterable[Statement] | None = None, **kwargs
+) -> Statement | None:
+    """
+    Return the statement that adds a unique constraint on a table that is not
+    created in the same migration.
+    """
+    if statements is None:
+        statements = parse_sql_statements(sql_statements)
+    statements = tuple(statements)
+
+    created_tables = {s.table for s in statements if s.is_create("TABLE")}
+    return next(
+        (
+            statement
+            for statement in statements
+            if (
+                statement.is_create("INDEX")
+                and "UNIQUE" in statement.flags
+                or any(
+                    "UNIQUE" in c.flags for c in statement.get_clauses("ADD CONSTRAINT")
+                )
+            )
+            and statement.table not in created_tables
+        ),
+        None,
     )
-    return not table_is_added_in_transaction
 
 
 class CheckMode(Enum):
     """
     Defines whether the Check.fn gets a str or a list[str] as first parameter.
+
+    The parsed statement is also given to ONE_LINER checks as the `statement`
+    keyword argument, and the parsed statements to TRANSACTION checks as the
+    `statements` keyword argument.
     """
 
     ONE_LINER = 1
@@ -84,10 +123,13 @@ class CheckType(Enum):
     WARNING = 2
 
 
-@dataclass
+@dataclass(frozen=True)
 class Check:
     """
     Represents a check that will be done against SQL statement(s).
+
+    A ONE_LINER check with keywords is only run on the statements that
+    contain at least one of them.
     """
 
     code: str
@@ -95,6 +137,156 @@ class Check:
     message: str
     mode: CheckMode
     type: CheckType
+    keywords: tuple[str, ...] = ()
+
+
+def normalize_keyword(keyword: str) -> str:
+    return " ".join(keyword.split()).upper()
+
+
+@dataclass(frozen=True)
+class CompiledChecks:
+    """
+    The effective checks of an analyser class for a set of excluded checks,
+    partitioned by mode.
+    """
+
+    checks: tuple[Check, ...]
+    one_liner: tuple[Check, ...]
+    transaction: tuple[Check, ...]
+    excluded_codes: frozenset[str]
+    keywords_re: re.Pattern[str] | None = None
+    implied_keywords: dict[str, frozenset[str]] = field(default_factory=dict)
+    _candidates: dict[frozenset[str], tuple[Check, ...]] = field(
+        default_factory=dict, compare=False, repr=False
+    )
+
+    def get_one_liner_candidates(self, statement: str) -> tuple[Check, ...]:
+        """
+        The ONE_LINER checks that can match the statement, from the keywords
+        found in a single pass over it.
+        """
+        if self.keywords_re is None:
+            return self.one_liner
+
+        keywords = frozenset().union(
+            *(
+                self.implied_keywords[normalize_keyword(k)]
+                for k in self.keywords_re.findall(statement)
+            )
+        )
+        candidates = self._candidates.get(keywords)
+        if candidates is None:
+            candidates = tuple(
+                c
+                for c in self.one_liner
+                if not c.keywords
+                or not keywords.isdisjoint(map(normalize_keyword, c.keywords))
+            )
+            self._candidates[keywords] = candidates
+        return candidates
+
+
+_compiled_checks: dict[
+    tuple[Type[BaseAnalyser], frozenset[str] | str, bool], CompiledChecks
+] = {}
+
+
+def compile_migration_checks(
+    analyser_class: Type[BaseAnalyser],
+    exclude_migration_tests: frozenset[str] | str,
+    report_ignored: bool = True,
+) -> CompiledChecks:
+    """
+    Compute the effective checks of an analyser class once per set of excluded
+    checks. When the ignored issues are not reported, the excluded checks are
+    not run at all.
+    """
+    key = (analyser_class, exclude_migration_tests, report_ignored)
+    if key in _compiled_checks:
+        return _compiled_checks[key]
+
+    checks = update_migration_checks(
+        analyser_class.base_migration_checks, analyser_class.migration_checks
+    )
+    excluded_codes = frozenset(
+        c.code for c in checks if c.code in exclude_migration_tests
+    )
+    if not report_ignored:
+        checks = [c for c in checks if c.code not in excluded_codes]
+    one_liner = tuple(c for c in checks if c.mode == CheckMode.ONE_LINER)
+
+    # The lookahead finds the longest keyword at each position of the
+    # statement, the keywords that it contains are found with it. Like SQL,
+    # the keywords ignore the case and the whitespaces between their words.
+    keywords = {normalize_keyword(k) for c in one_liner for k in c.keywords}
+    keywords_re = None
+    if keywords:
+        keywords_re = re.compile(
+            "(?=({}))".format(
+                "|".join(
+                    r"\s+".join(map(re.escape, keyword.split()))
+                    for keyword in sorted(keywords, key=len, reverse=True)
+                )
+            ),
+            re.IGNORECASE,
+        )
+
+    _compiled_checks[key] = CompiledChecks(
+        checks=tuple(checks),
+        one_liner=one_liner,
+        transaction=tuple(c for c in checks if c.mode == CheckMode.TRANSACTION),
+        excluded_codes=excluded_codes,
+        keywords_re=keywords_re,
+        implied_keywords={
+            keyword: frozenset(k for k in keywords if k in keyword)
+            for keyword in keywords
+        },
+    )
+    return _compiled_checks[key]
+
+
+@dataclass
+class CheckStats:
+    evaluated: int = 0
+    matched: int = 0
+    time: float = 0.0
+
+
+@dataclass
+class CheckStatistics:
+    """
+    Counts, per check code, the statements or transactions that the check
+    evaluated and matched, and the time spent in its function.
+    """
+
+    checks: dict[str, CheckStats] = field(default_factory=dict)
+
+    def add(self, code: str, elapsed: float, matched: bool, evaluated: int = 1) -> None:
+        stats = self.checks.setdefault(code, CheckStats())
+        stats.evaluated += evaluated
+        stats.matched += int(matched)
+        stats.time += elapsed
+
+    def merge(self, other: CheckStatistics) -> None:
+        for code, stats in other.checks.items():
+            merged_stats = self.checks.setdefault(code, CheckStats())
+            merged_stats.evaluated += stats.evaluated
+            merged_stats.matched += stats.matched
+            merged_stats.time += stats.time
+
+    def as_dict(self) -> dict[str, dict[str, int | float]]:
+        return {
+            code: {
+                "evaluated": stats.evaluated,
+                "matched": stats.matched,
+                "time": stats.time,
+            }
+            for code, stats in sorted(self.checks.items())
+        }
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.as_dict(), **kwargs)
 
 
 @dataclass
@@ -109,11 +301,14 @@ class BaseAnalyser:
     base_migration_checks: list[Check] = [
         Check(
             code="RENAME_TABLE",
-            fn=lambda sql, **kw: re.search("RENAME TABLE", sql)
-            or re.search("ALTER TABLE .* RENAME TO", sql),
+            fn=lambda sql, statement, **kw: (
+                statement.verb == "RENAME" and statement.object_kind == "TABLE"
+            )
+            or bool(statement.get_clauses("RENAME TO")),
             message="RENAMING tables",
             mode=CheckMode.ONE_LINER,
             type=CheckType.ERROR,
+            keywords=("RENAME",),
         ),
         Check(
             code="NOT_NULL",
@@ -124,35 +319,42 @@ class BaseAnalyser:
         ),
         Check(
             code="DROP_COLUMN",
-            fn=lambda sql, **kw: re.search("DROP COLUMN", sql),
+            fn=lambda sql, statement, **kw: bool(statement.get_clauses("DROP COLUMN")),
             message="DROPPING columns",
             mode=CheckMode.ONE_LINER,
             type=CheckType.ERROR,
+            keywords=("DROP",),
         ),
         Check(
             code="DROP_TABLE",
-            fn=lambda sql, **kw: sql.startswith("DROP TABLE"),
+            fn=lambda sql, statement, **kw: statement.is_drop("TABLE"),
             message="DROPPING table",
             mode=CheckMode.ONE_LINER,
             type=CheckType.ERROR,
+            keywords=("DROP TABLE",),
         ),
         Check(
             code="RENAME_COLUMN",
-            fn=lambda sql, **kw: re.search("ALTER TABLE .* CHANGE", sql)
-            or re.search("ALTER TABLE .* RENAME COLUMN", sql),
+            fn=lambda sql, statement, **kw: bool(
+                statement.get_clauses("CHANGE", "RENAME COLUMN")
+            ),
             message="RENAMING columns",
             mode=CheckMode.ONE_LINER,
             type=CheckType.ERROR,
+            keywords=("CHANGE", "RENAME"),
         ),
         Check(
             code="ALTER_COLUMN",
-            fn=lambda sql, **kw: re.search("ALTER TABLE .* ALTER COLUMN .* TYPE", sql),
+            fn=lambda sql, statement, **kw: any(
+                "TYPE" in c.flags for c in statement.get_clauses("ALTER COLUMN")
+            ),
             message=(
                 "ALTERING columns (Could be backward compatible. "
                 "You may ignore this migration.)"
             ),
             mode=CheckMode.ONE_LINER,
             type=CheckType.ERROR,
+            keywords=("TYPE",),
         ),
         Check(
             code="ADD_UNIQUE",
@@ -165,53 +367,121 @@ class BaseAnalyser:
 
     migration_checks: list[Check] = []
 
-    def __init__(self, exclude_migration_tests: Iterable[str] | None):
+    # Whether a backslash escapes the next character in all the quoted strings.
+    backslash_escapes: bool = False
+
+    def __init__(
+        self,
+        exclude_migration_tests: Iterable[str] | None,
+        report_ignored: bool = True,
+        check_stats: CheckStatistics | None = None,
+    ):
         self.exclude_migration_tests: Iterable[str] = exclude_migration_tests or []
+        self.check_stats = check_stats
         self.errors: list[Issue] = []
         self.warnings: list[Issue] = []
         self.ignored: list[Issue] = []
-        self.migration_checks = update_migration_checks(
-            self.base_migration_checks, self.migration_checks
+        self.compiled_checks = compile_migration_checks(
+            type(self),
+            (
+                self.exclude_migration_tests
+                if isinstance(self.exclude_migration_tests, str)
+                else frozenset(self.exclude_migration_tests)
+            ),
+            report_ignored,
         )
-
-    def analyse(self, sql_statements: list[str]) -> None:
-        for statement in sql_statements:
-            for test in self.one_line_migration_checks:
-                self._check_sql(test, sql=statement)
-
-        for test in self.transaction_migration_checks:
-            self._check_sql(test, sql=sql_statements)
+        self.migration_checks = list(self.compiled_checks.checks)
+
+    def analyse(self, sql_statements: Iterable[str]) -> None:
+        """
+        Run the checks on the SQL statements, that can be generated lazily.
+        The ONE_LINER checks run while the statements are read.
+        """
+        statements: list[Statement] = []
+        for sql in sql_statements:
+            for statement in parse_statements(sql, self.backslash_escapes):
+                statements.append(statement)
+                for test in self.compiled_checks.get_one_liner_candidates(
+                    statement.sql
+                ):
+                    self._check_sql(test, sql=statement.sql, statement=statement)
+
+        if not self.compiled_checks.transaction:
+            return
+        sql_list = [statement.sql for statement in statements]
+        for test in self.compiled_checks.transaction:
+            self._check_sql(test, sql=sql_list, statements=tuple(statements))
 
     @property
     def one_line_migration_checks(self) -> Iterable[Check]:
-        return (c for c in self.migration_checks if c.mode == CheckMode.ONE_LINER)
+        return self.compiled_checks.one_liner
 
     @property
     def transaction_migration_checks(self) -> Iterable[Check]:
-        return (c for c in self.migration_checks if c.mode == CheckMode.TRANSACTION)
-
-    def _check_sql(self, check: Check, sql: list[str] | str) -> None:
-        if check.fn(sql, errors=self.errors):
-            if check.code in self.exclude_migration_tests:
-                action = "IGNORED"
-                list_to_add = self.ignored
-            elif check.type == CheckType.WARNING:
-                action = "WARNING"
-                list_to_add = self.warnings
-            else:
-                action = "ERROR"
-                list_to_add = self.errors
+        return self.compiled_checks.transaction
+
+    def report_issue(
+        self, code: str, table: str | None = None, column: str | None = None
+    ) -> None:
+        """
+        Report the issue of a check that is known without analysing the SQL,
+        like the check would report it.
+        """
+        check = find_check_from_code(self.compiled_checks.checks, code)
+        if check is None:
+            return
+        self._add_issue(
+            check,
+            Issue(code=check.code, message=check.message, table=table, column=column),
+        )
+
+    def _check_sql(self, check: Check, sql: list[str] | str, **records) -> None:
+        if self.check_stats is None:
+            result = check.fn(sql, errors=self.errors, **records)
+        else:
+            start = time.perf_counter()
+            result = check.fn(sql, errors=self.errors, **records)
+            self.check_stats.add(
+                check.code, time.perf_counter() - start, matched=bool(result)
+            )
+        if result:
+            action = self._add_issue(
+                check,
+                self.build_issue(
+                    migration_check=check,
+                    sql_statement=sql,
+                    statement=(
+                        result
+                        if isinstance(result, Statement)
+                        else records.get("statement")
+                    ),
+                ),
+            )
             logger.debug("Testing %s -- %s", sql, action)
-            issue = self.build_issue(migration_check=check, sql_statement=sql)
-            list_to_add.append(issue)
         else:
             logger.debug("Testing %s -- PASSED", sql)
 
+    def _add_issue(self, check: Check, issue: Issue) -> str:
+        if check.code in self.compiled_checks.excluded_codes:
+            self.ignored.append(issue)
+            return "IGNORED"
+        elif check.type == CheckType.WARNING:
+            self.warnings.append(issue)
+            return "WARNING"
+        self.errors.append(issue)
+        return "ERROR"
+
     def build_issue(
-        self, migration_check: Check, sql_statement: list[str] | str
+        self,
+        migration_check: Check,
+        sql_statement: list[str] | str,
+        statement: Statement | None = None,
     ) -> Issue:
-        table = self.detect_table(sql_statement)
-        col = self.detect_column(sql_statement)
+        if statement is not None:
+            table, col = statement.table, statement.column
+        else:
+            table = self.detect_table(sql_statement)
+            col = self.detect_column(sql_statement)
         return Issue(
             code=migration_check.code,
             message=migration_check.message,
@@ -222,15 +492,11 @@ class BaseAnalyser:
     @staticmethod
     def detect_table(sql: list[str] | str) -> str | None:
         if isinstance(sql, str):
-            regex_result = re.search("TABLE [`\"'](.*?)[`\"']", sql, re.IGNORECASE)
-            if regex_result:
-                return regex_result.group(1)
+            return parse_statement(sql).table
         return None
 
     @staticmethod
     def detect_column(sql: list[str] | str) -> str | None:
         if isinstance(sql, str):
-            regex_result = re.search("COLUMN [`\"'](.*?)[`\"']", sql, re.IGNORECASE)
-            if regex_result:
-                return regex_result.group(1)
+            return parse_statement(sql).column
         return None
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
-import re
+from typing import Iterable
 
 from .base import BaseAnalyser, Check, CheckMode, CheckType
+from .statement import Statement, parse_sql_statements
 
 
-def has_create_index_in_transaction(sql_statements: list[str], **kwargs) -> bool:
+def has_create_index_in_transaction(
+    sql_statements: list[str], statements: Iterable[Statement] | None = None, **kwargs
+) -> Statement | None:
     """Return if a migration opens a transaction, acquires EXCLUSIVE lock, then indexes.
 
     Any locks that are obtained after a transaction is opened will not be released
@@ -22,41 +25,50 @@ def has_create_index_in_transaction(sql_statements: list[str], **kwargs) -> bool
     This check is a stricter version of `CREATE_INDEX` -- if a team wishes
     to build indices nonconcurrently, it's imperative to be mindful of locks.
     """
-    if not (sql_statements and sql_statements[0].startswith("BEGIN")):
-        return False
+    if statements is None:
+        statements = parse_sql_statements(sql_statements)
+    statements = tuple(statements)
+    if not (statements and statements[0].verb == "BEGIN"):
+        return None
 
-    for i, sql in enumerate(sql_statements):
+    for statement in statements:
         # If any statements acquire an exclusive lock, complain about index creation
         # later.
         # Nearly every single `ALTER TABLE` command requires an exclusive lock:
         #     https://www.postgresql.org/docs/current/sql-altertable.html
         # (Most common example is `ALTER TABLE... ADD COLUMN`, then later
         # `CREATE INDEX`)
-        if sql.startswith("ALTER TABLE"):
-            return has_create_index(sql_statements, ignore_concurrently=False)
-    return False
+        if statement.verb == "ALTER" and statement.object_kind == "TABLE":
+            return has_create_index(
+                sql_statements, ignore_concurrently=False, statements=statements
+            )
+    return None
 
 
 def has_create_index(
-    sql_statements: list[str], ignore_concurrently: bool = True, **kwargs
-) -> bool:
-    regex_result = None
-    for i, sql in enumerate(sql_statements):
-        regex_result = re.search(r"CREATE (UNIQUE )?INDEX.*ON (.*) \(", sql)
-        if ignore_concurrently and re.search("INDEX CONCURRENTLY", sql):
-            regex_result = None
-        if regex_result:
-            break
-    if not regex_result:
-        return False
+    sql_statements: list[str],
+    ignore_concurrently: bool = True,
+    statements: Iterable[Statement] | None = None,
+    **kwargs,
+) -> Statement | None:
+    """
+    Return the statement that creates an index on a table that is not created
+    by a preceding statement.
+    """
+    if statements is None:
+        statements = parse_sql_statements(sql_statements)
 
-    preceding_sql_statements = sql_statements[:i]
-    concerned_table = regex_result.group(2)
-    table_is_added_in_transaction = any(
-        sql.startswith(f"CREATE TABLE {concerned_table}")
-        for sql in preceding_sql_statements
-    )
-    return not table_is_added_in_transaction
+    created_tables = set()
+    for statement in statements:
+        if statement.is_create("TABLE"):
+            created_tables.add(statement.table)
+        elif (
+            statement.is_create("INDEX")
+            and not (ignore_concurrently and "CONCURRENTLY" in statement.flags)
+            and statement.table not in created_tables
+        ):
+            return statement
+    return None
 
 
 class PostgresqlAnalyser(BaseAnalyser):
@@ -77,17 +89,21 @@ class PostgresqlAnalyser(BaseAnalyser):
         ),
         Check(
             code="DROP_INDEX",
-            fn=lambda sql, **kw: re.search("DROP INDEX", sql)
-            and not re.search("INDEX CONCURRENTLY", sql),
+            fn=lambda sql, statement, **kw: (
+                statement.is_drop("INDEX") or bool(statement.get_clauses("DROP INDEX"))
+            )
+            and "CONCURRENTLY" not in statement.flags,
             message="DROP INDEX locks table",
             mode=CheckMode.ONE_LINER,
             type=CheckType.WARNING,
+            keywords=("DROP INDEX",),
         ),
         Check(
             code="REINDEX",
-            fn=lambda sql, **kw: sql.startswith("REINDEX"),
+            fn=lambda sql, statement, **kw: statement.verb == "REINDEX",
             message="REINDEX locks table",
             mode=CheckMode.ONE_LINER,
             type=CheckType.WARNING,
+            keywords=("REINDEX",),
         ),
     ]
@@ -1,56 +1,78 @@
 from __future__ import annotations
 
-import re
+from dataclasses import replace
+from typing import Iterable
 
 from .base import BaseAnalyser, Check, CheckMode, CheckType
+from .statement import Statement
+
+
+def get_remade_table(statement: Statement) -> str | None:
+    """
+    Return the table that SQLite copies to alter it, when the statement
+    renames it from or to its temporary name.
+    """
+    for clause in statement.get_clauses("RENAME TO"):
+        if statement.table and "__old" in (clause.name or ""):
+            return statement.table
+        if clause.name and "new__" in (statement.table or ""):
+            return clause.name
+    return None
+
+
+def has_not_null_column(
+    sql_statements: list[str], statements: Iterable[Statement], **kwargs
+) -> Statement | None:
+    """
+    Return the statement that renames a copied table with a NOT NULL column
+    without default value.
+
+    The column is not known: all the columns of the table are copied.
+    """
+    statements = tuple(statements)
+    has_not_null_column = any(
+        "NOT NULL" in clause.flags
+        and clause.flags.isdisjoint(("PRIMARY KEY", "DEFAULT"))
+        for statement in statements
+        for clause in statement.get_clauses("COLUMN", "ADD COLUMN")
+    )
+    if not has_not_null_column:
+        return None
+
+    for statement in statements:
+        table = get_remade_table(statement)
+        if table is not None:
+            return replace(statement, table=table, column=None)
+    return None
 
 
 class SqliteAnalyser(BaseAnalyser):
     migration_checks: list[Check] = [
         Check(
             code="RENAME_TABLE",
-            fn=lambda sql, **kw: re.search("ALTER TABLE .* RENAME TO", sql)
-            and "__old" not in sql
-            and "new__" not in sql,
+            fn=lambda sql, statement, **kw: bool(statement.get_clauses("RENAME TO"))
+            and get_remade_table(statement) is None,
             message="RENAMING tables",
             mode=CheckMode.ONE_LINER,
             type=CheckType.ERROR,
+            keywords=("RENAME",),
         ),
         Check(
             code="DROP_TABLE",
             # TODO: improve to detect that the table names overlap
-            fn=lambda sql_statements, **kw: any(
-                sql.startswith("DROP TABLE") for sql in sql_statements
+            fn=lambda sql_statements, statements, **kw: not any(
+                s.is_create("TABLE") for s in statements
             )
-            and not any(sql.startswith("CREATE TABLE") for sql in sql_statements),
+            and next((s for s in statements if s.is_drop("TABLE")), None),
             message="DROPPING table",
             mode=CheckMode.TRANSACTION,
             type=CheckType.ERROR,
         ),
         Check(
             code="NOT_NULL",
-            fn=lambda sql_statements, **kw: any(
-                re.search("NOT NULL(?! PRIMARY)(?! DEFAULT)", sql)
-                for sql in sql_statements
-            )
-            and any(
-                re.search("ALTER TABLE .* RENAME TO", sql)
-                and ("__old" in sql or "new__" in sql)
-                for sql in sql_statements
-            ),
+            fn=has_not_null_column,
             message="NOT NULL constraint on columns",
             mode=CheckMode.TRANSACTION,
             type=CheckType.ERROR,
         ),
     ]
-
-    @staticmethod
-    def detect_table(sql: list[str] | str) -> str | None:
-        if isinstance(sql, str):
-            regex_result = re.search("TABLE [`\"'](.*?)[`\"']", sql, re.IGNORECASE)
-            if regex_result:
-                return regex_result.group(1)
-            regex_result = re.search("ON [`\"'](.*?)[`\"']", sql, re.IGNORECASE)
-            if regex_result:
-                return regex_result.group(1)
-        return None
@@ -0,0 +1,569 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Iterable, Iterator, NamedTuple, Union
+
+# A quote or comment that is not terminated runs to the end of the SQL, like
+# in the lexer of the database, instead of being read again from each of its
+# characters: every token is matched on its first try, in linear time.
+TOKEN_PATTERN = r"""
+    (?P<space>\s+)
+    |(?P<comment>--[^\n]*|/\*.*?(?:\*/|\Z))
+    |(?P<dollar>\$(?P<tag>[A-Za-z_]\w*|)\$.*?(?:\$(?P=tag)\$|\Z))
+    |(?P<ident>{ident})
+    |(?P<string>{string})
+    |(?P<word>\w[\w$]*)
+    |(?P<punct>.)
+    """
+
+# A string where a backslash escapes the next character.
+ESCAPE_STRING_PATTERN = r"'[^'\\]*(?:(?:''|\\.)[^'\\]*)*(?:'|\\?\Z)"
+
+# Standard SQL strings only escape a quote by doubling it, a backslash is
+# an escape in the E'...' strings of PostgreSQL only.
+TOKEN_RE = re.compile(
+    TOKEN_PATTERN.format(
+        ident=r'"[^"]*(?:""[^"]*)*"?|`[^`]*(?:``[^`]*)*`?',
+        string=rf"[Ee]{ESCAPE_STRING_PATTERN}|'[^']*(?:''[^']*)*'?",
+    ),
+    re.VERBOSE | re.DOTALL,
+)
+# MySQL reads a backslash as an escape in all the quoted strings.
+BACKSLASH_TOKEN_RE = re.compile(
+    TOKEN_PATTERN.format(
+        ident=r'"[^"\\]*(?:(?:""|\\.)[^"\\]*)*(?:"|\\?\Z)|`[^`]*(?:``[^`]*)*`?',
+        string=ESCAPE_STRING_PATTERN,
+    ),
+    re.VERBOSE | re.DOTALL,
+)
+
+# The size of the chunks that an SQL string is fed to the splitter in.
+CHUNK_SIZE = 64 * 1024
+
+# The start of a dollar quote, that may be cut at the end of a chunk.
+DOLLAR_QUOTE_START_RE = re.compile(r"\$(?:[A-Za-z_]\w*)?(?:\$|\Z)")
+
+WORD = "word"
+IDENT = "ident"
+STRING = "string"
+PUNCT = "punct"
+
+# Words that start a table constraint instead of a column definition.
+CONSTRAINT_KEYWORDS = frozenset(
+    (
+        "CONSTRAINT",
+        "PRIMARY",
+        "UNIQUE",
+        "FOREIGN",
+        "CHECK",
+        "KEY",
+        "INDEX",
+        "EXCLUDE",
+        "FULLTEXT",
+        "SPATIAL",
+    )
+)
+# The ALTER TABLE clauses that act on a column.
+COLUMN_ACTIONS = frozenset(
+    (
+        "ADD COLUMN",
+        "DROP COLUMN",
+        "ALTER COLUMN",
+        "RENAME COLUMN",
+        "CHANGE",
+        "MODIFY",
+    )
+)
+
+
+class Token(NamedTuple):
+    kind: str
+    value: str
+    start: int
+    end: int
+
+    @property
+    def keyword(self) -> str | None:
+        return self.value.upper() if self.kind == WORD else None
+
+    @property
+    def name(self) -> str:
+        if self.kind == IDENT:
+            quote = self.value[0]
+            return self.value[1:-1].replace(quote * 2, quote)
+        return self.value
+
+
+# A parenthesised group of tokens is nested in a list.
+Item = Union[Token, list]
+
+
+@dataclass(frozen=True)
+class Clause:
+    """
+    A clause of an ALTER TABLE statement, or a column definition of a
+    CREATE TABLE statement.
+
+    The action is normalised, e.g. "ADD COLUMN", "ALTER COLUMN", "RENAME TO"
+    or "COLUMN" for a column definition. The name is the other object of the
+    clause: the constraint, index or new name of the table or column.
+    """
+
+    action: str | None
+    column: str | None = None
+    name: str | None = None
+    flags: frozenset[str] = frozenset()
+
+
+@dataclass(frozen=True)
+class Statement:
+    """
+    A SQL statement, classified from a single pass of the tokenizer over it.
+
+    The flags are the upper case keywords that matter to the checks, like
+    "CONCURRENTLY", "UNIQUE", "NOT NULL", "DEFAULT" or "DROP DEFAULT", of the
+    statement and of all its clauses.
+    """
+
+    sql: str
+    verb: str | None = None
+    object_kind: str | None = None
+    name: str | None = None
+    table: str | None = None
+    column: str | None = None
+    clauses: tuple[Clause, ...] = ()
+    flags: frozenset[str] = frozenset()
+
+    def get_clauses(self, *actions: str) -> tuple[Clause, ...]:
+        return tuple(c for c in self.clauses if c.action in actions)
+
+    def is_create(self, *object_kinds: str) -> bool:
+        return self.verb == "CREATE" and self.object_kind in object_kinds
+
+    def is_drop(self, *object_kinds: str) -> bool:
+        return self.verb == "DROP" and self.object_kind in object_kinds
+
+
+class _ItemStream:
+    def __init__(self, items: list[Item]):
+        self.items = items
+        self.pos = 0
+
+    def at_end(self) -> bool:
+        return self.pos >= len(self.items)
+
+    def keyword(self, offset: int = 0) -> str | None:
+        index = self.pos + offset
+        if index < len(self.items):
+            item = self.items[index]
+            if isinstance(item, Token):
+                return item.keyword
+        return None
+
+    def accept(self, *keywords: str) -> bool:
+        if all(self.keyword(i) == k for i, k in enumerate(keywords)):
+            self.pos += len(keywords)
+            return True
+        return False
+
+    def accept_any(self, *keywords: str) -> str | None:
+        keyword = self.keyword()
+        if keyword in keywords:
+            self.pos += 1
+            return keyword
+        return None
+
+    def next_keyword(self) -> str | None:
+        keyword = self.keyword()
+        if keyword is not None:
+            self.pos += 1
+        return keyword
+
+    def group(self) -> list[Item] | None:
+        if self.at_end():
+            return None
+        item = self.items[self.pos]
+        if not isinstance(item, list):
+            return None
+        self.pos += 1
+        return item
+
+    def name(self) -> str | None:
+        """Consume a name, that can be qualified by a schema."""
+        parts: list[str] = []
+        while not self.at_end():
+            item = self.items[self.pos]
+            if not isinstance(item, Token) or item.kind not in (WORD, IDENT):
+                break
+            parts.append(item.name)
+            self.pos += 1
+            if not self._is_punct("."):
+                break
+            self.pos += 1
+        return ".".join(parts) or None
+
+    def rest(self) -> list[Item]:
+        return self.items[self.pos :]
+
+    def _is_punct(self, value: str) -> bool:
+        if self.at_end():
+            return False
+        item = self.items[self.pos]
+        return isinstance(item, Token) and item.kind == PUNCT and item.value == value
+
+
+def get_token_re(backslash_escapes: bool = False) -> re.Pattern[str]:
+    return BACKSLASH_TOKEN_RE if backslash_escapes else TOKEN_RE
+
+
+def tokenize(sql: str, backslash_escapes: bool = False) -> Iterable[Token]:
+    """Yield the tokens of the SQL, without the whitespaces and comments."""
+    for match in get_token_re(backslash_escapes).finditer(sql):
+        kind = match.lastgroup
+        if kind in ("space", "comment"):
+            continue
+        if kind == "dollar":
+            kind = STRING
+        yield Token(kind or PUNCT, match.group(), match.start(), match.end())
+
+
+def nest(tokens: Iterable[Token]) -> list[Item]:
+    """Nest the tokens between parentheses into lists."""
+    stack: list[list[Item]] = [[]]
+    for token in tokens:
+        if token.kind == PUNCT and token.value == "(":
+            stack.append([])
+        elif token.kind == PUNCT and token.value == ")" and len(stack) > 1:
+            group = stack.pop()
+            stack[-1].append(group)
+        else:
+            stack[-1].append(token)
+    while len(stack) > 1:
+        group = stack.pop()
+        stack[-1].append(group)
+    return stack[0]
+
+
+def split_items(items: list[Item], separator: str = ",") -> list[list[Item]]:
+    parts: list[list[Item]] = [[]]
+    for item in items:
+        if isinstance(item, Token) and item.kind == PUNCT and item.value == separator:
+            parts.append([])
+        else:
+            parts[-1].append(item)
+    return [part for part in parts if part]
+
+
+def get_flags(items: list[Item]) -> frozenset[str]:
+    """The flags of a column definition or of an ALTER TABLE clause."""
+    keywords = [item.keyword if isinstance(item, Token) else None for item in items]
+    flags = set()
+    for i, keyword in enumerate(keywords):
+        previous = keywords[i - 1] if i else None
+        following = keywords[i + 1] if i + 1 < len(keywords) else None
+        if keyword == "NULL":
+            if previous == "NOT":
+                if i > 1 and keywords[i - 2] == "DROP":
+                    flags.add("DROP NOT NULL")
+                elif not (i > 1 and keywords[i - 2] == "IS"):
+                    flags.add("NOT NULL")
+            elif previous not in ("IS", "DEFAULT"):
+                flags.add("NULL")
+        elif keyword == "DEFAULT":
+            if previous == "DROP":
+                flags.add("DROP DEFAULT")
+            elif following == "NULL":
+                flags.add("DEFAULT NULL")
+            else:
+                flags.add("DEFAULT")
+        elif keyword == "KEY" and previous in ("PRIMARY", "FOREIGN"):
+            flags.add(f"{previous} KEY")
+        elif keyword in ("UNIQUE", "REFERENCES", "CHECK", "TYPE"):
+            flags.add(keyword)
+    return frozenset(flags)
+
+
+def parse_column_definition(items: list[Item]) -> Clause:
+    stream = _ItemStream(items)
+    if stream.keyword() in CONSTRAINT_KEYWORDS:
+        name = stream.name() if stream.accept("CONSTRAINT") else None
+        return Clause(action="CONSTRAINT", name=name, flags=get_flags(stream.rest()))
+    column = stream.name()
+    return Clause(action="COLUMN", column=column, flags=get_flags(stream.rest()))
+
+
+def parse_alter_table_clause(items: list[Item]) -> Clause:
+    stream = _ItemStream(items)
+    action = stream.next_keyword()
+    column = name = None
+
+    if action == "ADD":
+        if stream.keyword() in CONSTRAINT_KEYWORDS:
+            action = "ADD CONSTRAINT"
+            if stream.accept("CONSTRAINT"):
+                name = stream.name()
+        else:
+            action = "ADD COLUMN"
+            stream.accept("COLUMN")
+            stream.accept("IF", "NOT", "EXISTS")
+            column = stream.name()
+    elif action == "DROP":
+        if stream.accept_any("CONSTRAINT", "CHECK", "FOREIGN", "PRIMARY"):
+            action = "DROP CONSTRAINT"
+            stream.accept("KEY")
+            name = stream.name()
+        elif stream.accept_any("INDEX", "KEY"):
+            action = "DROP INDEX"
+            name = stream.name()
+        elif stream.keyword() != "DEFAULT":
+            action = "DROP COLUMN"
+            stream.accept("COLUMN")
+            stream.accept("IF", "EXISTS")
+            column = stream.name()
+    elif action == "ALTER":
+        action = "ALTER COLUMN"
+        stream.accept("COLUMN")
+        column = stream.name()
+    elif action == "RENAME":
+        if stream.accept_any("TO", "AS"):
+            action = "RENAME TO"
+            name = stream.name()
+        elif stream.accept("CONSTRAINT"):
+            action = "RENAME CONSTRAINT"
+            name = stream.name()
+        elif stream.accept_any("INDEX", "KEY"):
+            action = "RENAME INDEX"
+            name = stream.name()
+        else:
+            action = "RENAME COLUMN"
+            stream.accept("COLUMN")
+            column = stream.name()
+            if stream.accept("TO"):
+                name = stream.name()
+    elif action == "CHANGE":
+        stream.accept("COLUMN")
+        column = stream.name()
+        name = stream.name()
+    elif action == "MODIFY":
+        stream.accept("COLUMN")
+        column = stream.name()
+
+    return Clause(
+        action=action, column=column, name=name, flags=get_flags(stream.rest())
+    )
+
+
+def parse_statement_items(sql: str, items: list[Item]) -> Statement:
+    stream = _ItemStream(items)
+    verb = stream.next_keyword()
+    object_kind = name = table = None
+    clauses: tuple[Clause, ...] = ()
+    flags = set()
+
+    if verb == "CREATE":
+        stream.accept("OR", "REPLACE")
+        while True:
+            modifier = stream.accept_any("UNIQUE", "TEMPORARY", "TEMP", "UNLOGGED")
+            if modifier is None:
+                break
+            flags.add(modifier)
+        object_kind = stream.next_keyword()
+        if stream.accept("CONCURRENTLY"):
+            flags.add("CONCURRENTLY")
+        stream.accept("IF", "NOT", "EXISTS")
+        if object_kind == "TABLE":
+            name = table = stream.name()
+            columns = stream.group()
+            if columns is not None:
+                clauses = tuple(map(parse_column_definition, split_items(columns)))
+        else:
+            if stream.keyword() != "ON":
+                name = stream.name()
+            if object_kind == "INDEX" and stream.accept("ON"):
+                stream.accept("ONLY")
+                table = stream.name()
+    elif verb == "ALTER":
+        object_kind = stream.next_keyword()
+        stream.accept("IF", "EXISTS")
+        stream.accept("ONLY")
+        name = stream.name()
+        if object_kind == "TABLE":
+            table = name
+            clauses = tuple(map(parse_alter_table_clause, split_items(stream.rest())))
+    elif verb == "DROP":
+        object_kind = stream.next_keyword()
+        if stream.accept("CONCURRENTLY"):
+            flags.add("CONCURRENTLY")
+        stream.accept("IF", "EXISTS")
+        if stream.keyword() != "ON":
+            name = stream.name()
+        if object_kind == "TABLE":
+            table = name
+        elif stream.accept("ON"):
+            table = stream.name()
+    elif verb in ("RENAME", "REINDEX"):
+        object_kind = stream.next_keyword()
+        if stream.accept("CONCURRENTLY"):
+            flags.add("CONCURRENTLY")
+        name = stream.name()
+        if object_kind == "TABLE":
+            table = name
+
+    column = next(
+        (c.column for c in clauses if c.action in COLUMN_ACTIONS and c.column), None
+    )
+    return Statement(
+        sql=sql,
+        verb=verb,
+        object_kind=object_kind,
+        name=name,
+        table=table,
+        column=column,
+        clauses=clauses,
+        flags=frozenset(flags).union(*(c.flags for c in clauses)),
+    )
+
+
+class StatementSplitter:
+    """
+    Split SQL that is fed in chunks into statements, separated by semicolons
+    out of the parentheses, quotes and comments.
+
+    Only the statement being read is kept in memory. A token that reaches
+    the end of the fed SQL, like an unterminated quote or comment, is read
+    again when the next chunk is fed.
+    """
+
+    def __init__(self, backslash_escapes: bool = False) -> None:
+        self.token_re = get_token_re(backslash_escapes)
+        self.buffer = ""
+        self.pos = 0
+        self.start: int | None = None
+        self.depth = 0
+
+    def feed(self, chunk: str) -> Iterator[str]:
+        self.buffer += chunk
+        yield from self._split(final=False)
+
+    def close(self) -> Iterator[str]:
+        yield from self._split(final=True)
+        if self.start is not None:
+            yield self.buffer[self.start : self.pos]
+        self.buffer = ""
+        self.pos = 0
+        self.start = None
+        self.depth = 0
+
+    def _split(self, final: bool) -> Iterator[str]:
+        for match in self.token_re.finditer(self.buffer, self.pos):
+            if not final and self._may_continue(match):
+                break
+            self.pos = match.end()
+            kind = match.lastgroup
+            if kind in ("space", "comment"):
+                continue
+            if self.start is None:
+                self.start = match.start()
+            if kind != "punct":
+                continue
+
+            value = match.group()
+            if value == "(":
+                self.depth += 1
+            elif value == ")":
+                self.depth = max(self.depth - 1, 0)
+            elif value == ";" and self.depth == 0:
+                statement = self.buffer[self.start : self.pos]
+                self.start = None
+                if statement != ";":
+                    yield statement
+
+        # Forget the SQL of the statements that were yielded.
+        consumed = self.pos if self.start is None else self.start
+        self.buffer = self.buffer[consumed:]
+        self.pos -= consumed
+        if self.start is not None:
+            self.start -= consumed
+
+    def _may_continue(self, match: re.Match) -> bool:
+        # A quote or comment that is not terminated yet reaches the end too.
+        if match.end() == len(self.buffer):
+            return True
+        # The start of a dollar quote, whose tag is not complete yet.
+        return (
+            match.group() == "$"
+            and DOLLAR_QUOTE_START_RE.match(self.buffer, match.start()) is not None
+        )
+
+
+def iter_chunks(sql: str, size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Lazily cut the SQL into chunks, to split it without copying it at once."""
+    for start in range(0, len(sql), size):
+        yield sql[start : start + size]
+
+
+def split_sql(chunks: Iterable[str], backslash_escapes: bool = False) -> Iterator[str]:
+    """Lazily split the SQL given in chunks into statements."""
+    splitter = StatementSplitter(backslash_escapes)
+    for chunk in chunks:
+        yield from splitter.feed(chunk)
+    yield from splitter.close()
+
+
+def split_sql_statements(
+    sql_statements: Iterable[str], backslash_escapes: bool = False
+) -> Iterator[str]:
+    """
+    Lazily split each of the SQL strings into statements. A statement does
+    not continue from one string to the next.
+    """
+    for sql in sql_statements:
+        yield from split_sql(iter_chunks(sql), backslash_escapes)
+
+
+def parse_statements(
+    sql: str, backslash_escapes: bool = False
+) -> tuple[Statement, ...]:
+    """
+    Parse the statements of the SQL, that are separated by semicolons out of
+    the parentheses, quotes and comments.
+    """
+    statements = []
+    tokens: list[Token] = []
+    depth = 0
+    for token in tokenize(sql, backslash_escapes):
+        tokens.append(token)
+        if token.kind != PUNCT:
+            continue
+        if token.value == "(":
+            depth += 1
+        elif token.value == ")":
+            depth = max(depth - 1, 0)
+        elif token.value == ";" and depth == 0:
+            if len(tokens) > 1:
+                statements.append(
+                    parse_statement_items(
+                        sql[tokens[0].start : token.end], nest(tokens[:-1])
+                    )
+                )
+            tokens = []
+    if tokens:
+        statements.append(
+            parse_statement_items(sql[tokens[0].start : tokens[-1].end], nest(tokens))
+        )
+    return tuple(statements)
+
+
+def parse_statement(sql: str, backslash_escapes: bool = False) -> Statement:
+    """Parse the first statement of the SQL."""
+    statements = parse_statements(sql, backslash_escapes)
+    return statements[0] if statements else Statement(sql=sql)
+
+
+def parse_sql_statements(
+    sql_statements: Iterable[str], backslash_escapes: bool = False
+) -> tuple[Statement, ...]:
+    return tuple(
+        s for sql in sql_statements for s in parse_statements(sql, backslash_escapes)
+    )
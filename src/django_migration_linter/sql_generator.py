@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Iterable
+
+from django.db.migrations.state import ProjectState
+
+if TYPE_CHECKING:
+    from django.db.backends.base.base import BaseDatabaseWrapper
+    from django.db.migrations import Migration
+    from django.db.migrations.loader import MigrationLoader
+
+logger = logging.getLogger("django_migration_linter")
+
+MigrationKey = tuple[str, str]
+
+
+def build_plan(
+    migration_loader: MigrationLoader, targets: Iterable[MigrationKey]
+) -> list[MigrationKey]:
+    """
+    Return the targets and all their ancestors in topological order.
+
+    The visited nodes are shared between all targets, so that the whole
+    plan is computed in linear time over the graph.
+    """
+    node_map = migration_loader.graph.node_map
+    plan: list[MigrationKey] = []
+    visited: set[MigrationKey] = set()
+    for target in targets:
+        stack: list[tuple[MigrationKey, bool]] = [(target, False)]
+        while stack:
+            key, parents_done = stack.pop()
+            if parents_done:
+                plan.append(key)
+                continue
+            if key in visited:
+                continue
+            visited.add(key)
+            stack.append((key, True))
+            for parent in sorted(node_map[key].parents, reverse=True):
+                if parent.key not in visited:
+                    stack.append((parent.key, False))
+    return plan
+
+
+class AncestorState:
+    """
+    The project state of the ancestors of a migration, like 'sqlmigrate'
+    builds it, for migrations visited in topological order.
+
+    The state is carried forward when the previous migration is an ancestor
+    of the next one, like along the migrations of an app, by applying only the
+    missing ancestors. Otherwise, it is rebuilt from the ancestors.
+    """
+
+    def __init__(self, migration_loader: MigrationLoader):
+        self.migration_loader = migration_loader
+        self.state: ProjectState | None = None
+        # The migrations applied to the state: the last migration and its ancestors.
+        self._applied: set[MigrationKey] = set()
+        self._head: MigrationKey | None = None
+
+    def before(self, target: MigrationKey) -> ProjectState:
+        """Return the state of the ancestors of the target, to apply it on."""
+        state = self.state
+        missing = None if state is None else self._get_missing_ancestors(target)
+        if state is None or missing is None:
+            state = ProjectState(real_apps=self.migration_loader.unmigrated_apps)
+            self._applied = set()
+            self._head = None
+            missing = self._get_missing_ancestors(target)
+            # Nothing is applied anymore, so all the ancestors are missing.
+            assert missing is not None
+
+        for node in missing:
+            migration = self.migration_loader.graph.nodes[node]
+            state = migration.mutate_state(state, preserve=False)
+            self._applied.add(node)
+        self.state = state
+        return state
+
+    def applied(self, target: MigrationKey, state: ProjectState) -> None:
+        """Carry forward the state that the target was applied on."""
+        self.state = state
+        self._applied.add(target)
+        self._head = target
+
+    def discard(self) -> None:
+        """Forget the state, that may be half mutated, to rebuild it next time."""
+        self.state = None
+
+    def _get_missing_ancestors(self, target: MigrationKey) -> list[MigrationKey] | None:
+        """
+        Return the ancestors of the target that are not applied yet, in
+        topological order, or None when the applied migrations are not all
+        ancestors of the target.
+
+        The applied migrations are the previous migration and its ancestors,
+        so they are all ancestors of the target when the previous one is.
+        """
+        node_map = self.migration_loader.graph.node_map
+        missing: list[MigrationKey] = []
+        visited: set[MigrationKey] = {target}
+        head_found = self._head is None
+        stack: list[tuple[MigrationKey, bool]] = [
+            (parent.key, False)
+            for parent in sorted(node_map[target].parents, reverse=True)
+        ]
+        while stack:
+            key, parents_done = stack.pop()
+            if parents_done:
+                missing.append(key)
+                continue
+            if key in visited:
+                continue
+            visited.add(key)
+            if key in self._applied:
+                head_found = head_found or key == self._head
+                continue
+            stack.append((key, True))
+            for parent in sorted(node_map[key].parents, reverse=True):
+                if parent.key not in visited:
+                    stack.append((parent.key, False))
+        return missing if head_found else None
+
+
+class SqlGenerator:
+    """
+    Generates the SQL of many migrations with a single walk over the migration graph.
+
+    Calling 'sqlmigrate' once per migration rebuilds a loader and replays the
+    project state from the root each time, which is quadratic in the number
+    of migrations. Here, the targets are visited in topological order and the
+    ProjectState is carried forward from one target to the next, and the SQL
+    of each target is captured with a collecting schema editor.
+
+    Like with 'sqlmigrate', a target sees the state of its ancestors only.
+    """
+
+    def __init__(
+        self,
+        migration_loader: MigrationLoader,
+        connection: BaseDatabaseWrapper,
+        targets: Iterable[MigrationKey],
+    ):
+        self.migration_loader = migration_loader
+        self.connection = connection
+        self.targets = {
+            target for target in targets if target in migration_loader.graph.nodes
+        }
+        self.plan = build_plan(migration_loader, sorted(self.targets))
+        self._position = 0
+        self._ancestor_state = AncestorState(migration_loader)
+        self._generated: dict[MigrationKey, list[str] | Exception] = {}
+
+    def __contains__(self, key: MigrationKey) -> bool:
+        return key in self.targets
+
+    def get_sql(self, app_label: str, migration_name: str) -> list[str]:
+        key = (app_label, migration_name)
+        if key not in self.targets:
+            raise KeyError(f"Migration {key} is not a target of the SQL generator")
+
+        self._generate_until(key)
+        self.targets.discard(key)
+        result = self._generated.pop(key)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def _generate_until(self, key: MigrationKey) -> None:
+        while key not in self._generated:
+            node = self.plan[self._position]
+            self._position += 1
+            if node not in self.targets:
+                continue
+
+            logger.debug("Collecting SQL of %s", node)
+            try:
+                state = self._ancestor_state.before(node)
+                migration = self.migration_loader.graph.nodes[node]
+                self._generated[node], state = self._collect_sql(migration, state)
+            except Exception as exc:
+                self._generated[node] = exc
+                self._ancestor_state.discard()
+            else:
+                self._ancestor_state.applied(node, state)
+
+    def _collect_sql(
+        self, migration: Migration, state: ProjectState
+    ) -> tuple[list[str], ProjectState]:
+        """Return the SQL of the migration, and the state it is applied on."""
+        with self.connection.schema_editor(
+            collect_sql=True, atomic=migration.atomic
+        ) as schema_editor:
+            state = migration.apply(state, schema_editor, collect_sql=True)
+
+        statements = schema_editor.collected_sql
+        # Same transaction wrapping as the 'sqlmigrate' command output.
+        if (
+            statements
+            and migration.atomic
+            and self.connection.features.can_rollback_ddl
+        ):
+            statements = [
+                self.connection.ops.start_transaction_sql(),
+                *statements,
+                self.connection.ops.end_transaction_sql(),
+            ]
+        return statements, state
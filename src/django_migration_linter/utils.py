@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import os
+import sys
 from importlib import import_module
+from typing import Iterable
 
 
 def split_path(path: str) -> list[str]:
@@ -51,3 +53,38 @@ def get_migration_abspath(app_label: str, migration_name: str) -> str:
     if migration_file.endswith(".pyc"):
         migration_file = migration_file[:-1]
     return migration_file
+
+
+def get_migration_paths(app_labels: Iterable[str]) -> dict[tuple[str, str], str]:
+    """
+    Map the migrations of the apps to their file, without importing them.
+
+    The migration files are listed from the ``__path__`` of the migrations
+    packages, which are imported if the migration loader did not already.
+    The apps without migrations package are skipped.
+    """
+    from django.db.migrations.loader import MigrationLoader
+
+    paths: dict[tuple[str, str], str] = {}
+    for app_label in app_labels:
+        module_name, _ = MigrationLoader.migrations_module(app_label)
+        if module_name is None:
+            continue
+        module = sys.modules.get(module_name)
+        if module is None:
+            try:
+                module = import_module(module_name)
+            except ImportError:
+                continue
+        for directory in getattr(module, "__path__", []):
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                name, extension = os.path.splitext(entry.name)
+                # Same rules as the migration loader.
+                if extension != ".py" or name[0] in "_~" or not entry.is_file():
+                    continue
+                paths.setdefault((app_label, name), os.path.abspath(entry.path))
+    return paths
@@ -33,29 +33,30 @@ class CacheTestCase(unittest.TestCase):
     )
     def test_cache_normal(self, *args):
         linter = MigrationLinter(self.test_project_path, database="mysql")
-        linter.old_cache.clear()
-        linter.old_cache.save()
+        linter.cache.clear()
 
         with mock.patch(
             "django_migration_linter.migration_linter.analyse_sql_statements",
             wraps=analyse_sql_statements,
         ) as analyse_sql_statements_mock:
             linter.lint_all_migrations()
-            self.assertEqual(2, analyse_sql_statements_mock.call_count)
+            # The migration that creates the table is analysed from its operations.
+            self.assertEqual(1, analyse_sql_statements_mock.call_count)
 
-        cache = linter.new_cache
-        cache.load()
+        cache = linter.cache
 
-        self.assertEqual("OK", cache["eb6832d34f7ad40903a51a8b053ac13c"]["result"])
-        self.assertEqual("ERR", cache["31fa92230495861937bd6fd35b63c4e7"]["result"])
+        self.assertEqual("OK", cache["e71569dcf0fc3b4a03a02af78da0921a"]["result"])
+        self.assertEqual("ERR", cache["18207c0ac15ccf67552b695b3c6074fa"]["result"])
         self.assertListEqual(
             [
                 Issue(
                     code="NOT_NULL",
                     message="NOT NULL constraint on columns",
+                    table="app_add_not_null_column_a",
+                    column="new_not_null_field",
                 ),
             ],
-            cache["31fa92230495861937bd6fd35b63c4e7"]["errors"],
+            cache["18207c0ac15ccf67552b695b3c6074fa"]["errors"],
         )
 
         # Start the Linter again -> should use cache now.
@@ -79,33 +80,32 @@ class CacheTestCase(unittest.TestCase):
     )
     def test_cache_different_databases(self, *args):
         linter = MigrationLinter(self.test_project_path, database="mysql")
-        linter.old_cache.clear()
-        linter.old_cache.save()
+        linter.cache.clear()
 
         linter = MigrationLinter(self.test_project_path, database="sqlite")
-        linter.old_cache.clear()
-        linter.old_cache.save()
+        linter.cache.clear()
 
         with mock.patch(
             "django_migration_linter.migration_linter.analyse_sql_statements",
             wraps=analyse_sql_statements,
         ) as analyse_sql_statements_mock:
             linter.lint_all_migrations()
-            self.assertEqual(2, analyse_sql_statements_mock.call_count)
+            # The migration that creates the table is analysed from its operations.
+            self.assertEqual(1, analyse_sql_statements_mock.call_count)
 
-        cache = linter.new_cache
-        cache.load()
+        cache = linter.cache
 
-        self.assertEqual("OK", cache["eb6832d34f7ad40903a51a8b053ac13c"]["result"])
-        self.assertEqual("ERR", cache["31fa92230495861937bd6fd35b63c4e7"]["result"])
+        self.assertEqual("OK", cache["e71569dcf0fc3b4a03a02af78da0921a"]["result"])
+        self.assertEqual("ERR", cache["18207c0ac15ccf67552b695b3c6074fa"]["result"])
         self.assertListEqual(
             [
                 Issue(
                     code="NOT_NULL",
                     message="NOT NULL constraint on columns",
+                    table="app_add_not_null_column_a",
                 ),
             ],
-            cache["31fa92230495861937bd6fd35b63c4e7"]["errors"],
+            cache["18207c0ac15ccf67552b695b3c6074fa"]["errors"],
         )
 
         # Start the Linter again but with different database, should not be the same cache
@@ -116,21 +116,23 @@ class CacheTestCase(unittest.TestCase):
             wraps=analyse_sql_statements,
         ) as analyse_sql_statements_mock:
             linter.lint_all_migrations()
-            self.assertEqual(2, analyse_sql_statements_mock.call_count)
+            # The migration that creates the table is analysed from its operations.
+            self.assertEqual(1, analyse_sql_statements_mock.call_count)
 
-        cache = linter.new_cache
-        cache.load()
+        cache = linter.cache
 
-        self.assertEqual("OK", cache["eb6832d34f7ad40903a51a8b053ac13c"]["result"])
-        self.assertEqual("ERR", cache["31fa92230495861937bd6fd35b63c4e7"]["result"])
+        self.assertEqual("OK", cache["e71569dcf0fc3b4a03a02af78da0921a"]["result"])
+        self.assertEqual("ERR", cache["18207c0ac15ccf67552b695b3c6074fa"]["result"])
         self.assertListEqual(
             [
                 Issue(
                     code="NOT_NULL",
                     message="NOT NULL constraint on columns",
+                    table="app_add_not_null_column_a",
+                    column="new_not_null_field",
                 ),
             ],
-            cache["31fa92230495861937bd6fd35b63c4e7"]["errors"],
+            cache["18207c0ac15ccf67552b695b3c6074fa"]["errors"],
         )
 
         self.assertTrue(linter.has_errors)
@@ -144,8 +146,7 @@ class CacheTestCase(unittest.TestCase):
     )
     def test_cache_ignored(self, *args):
         linter = MigrationLinter(self.test_project_path, ignore_name_contains="0001")
-        linter.old_cache.clear()
-        linter.old_cache.save()
+        linter.cache.clear()
 
         with mock.patch(
             "django_migration_linter.migration_linter.analyse_sql_statements",
@@ -154,8 +155,7 @@ class CacheTestCase(unittest.TestCase):
             linter.lint_all_migrations()
             analyse_sql_statements_mock.assert_not_called()
 
-        cache = linter.new_cache
-        cache.load()
+        cache = linter.cache
 
         self.assertFalse(cache)
 
@@ -167,8 +167,7 @@ class CacheTestCase(unittest.TestCase):
     )
     def test_cache_modified(self, *args):
         linter = MigrationLinter(self.test_project_path, database="mysql")
-        linter.old_cache.clear()
-        linter.old_cache.save()
+        linter.cache.clear()
 
         with mock.patch(
             "django_migration_linter.migration_linter.analyse_sql_statements",
@@ -177,10 +176,9 @@ class CacheTestCase(unittest.TestCase):
             linter.lint_all_migrations()
             self.assertEqual(1, analyse_sql_statements_mock.call_count)
 
-        cache = linter.new_cache
-        cache.load()
+        cache = linter.cache
 
-        self.assertEqual("ERR", cache["31fa92230495861937bd6fd35b63c4e7"]["result"])
+        self.assertEqual("ERR", cache["18207c0ac15ccf67552b695b3c6074fa"]["result"])
 
         # Get the content of the migration file and mock the open call to append
         # some content to change the hash
@@ -192,6 +190,8 @@ class CacheTestCase(unittest.TestCase):
         file_content += b"# test comment"
 
         linter = MigrationLinter(self.test_project_path)
+        # The file is unchanged on disk, don't reuse its digest.
+        linter.stat_manifest.clear()
         with mock.patch(
             "django_migration_linter.migration_linter.open",
             mock.mock_open(read_data=file_content),
@@ -203,12 +203,11 @@ class CacheTestCase(unittest.TestCase):
                 linter.lint_all_migrations()
                 self.assertEqual(1, analyse_sql_statements_mock.call_count)
 
-        cache = linter.new_cache
-        cache.load()
+        cache = linter.cache
 
-        self.assertNotIn("31fa92230495861937bd6fd35b63c4e7", cache)
+        self.assertNotIn("18207c0ac15ccf67552b695b3c6074fa", cache)
         self.assertEqual(1, len(cache))
-        self.assertEqual("ERR", cache["864f9dc59e9dccd57ef6fa45143f1ef0"]["result"])
+        self.assertEqual("ERR", cache["e1df40f7ce5466ecf72b239887b455fe"]["result"])
 
     @mock.patch(
         "django_migration_linter.MigrationLinter._gather_all_migrations",
@@ -219,29 +218,30 @@ class CacheTestCase(unittest.TestCase):
     )
     def test_ignore_cached_migration(self, *args):
         linter = MigrationLinter(self.test_project_path, database="mysql")
-        linter.old_cache.clear()
-        linter.old_cache.save()
+        linter.cache.clear()
 
         with mock.patch(
             "django_migration_linter.migration_linter.analyse_sql_statements",
             wraps=analyse_sql_statements,
         ) as analyse_sql_statements_mock:
             linter.lint_all_migrations()
-            self.assertEqual(2, analyse_sql_statements_mock.call_count)
+            # The migration that creates the table is analysed from its operations.
+            self.assertEqual(1, analyse_sql_statements_mock.call_count)
 
-        cache = linter.new_cache
-        cache.load()
+        cache = linter.cache
 
-        self.assertEqual("OK", cache["eb6832d34f7ad40903a51a8b053ac13c"]["result"])
-        self.assertEqual("ERR", cache["31fa92230495861937bd6fd35b63c4e7"]["result"])
+        self.assertEqual("OK", cache["e71569dcf0fc3b4a03a02af78da0921a"]["result"])
+        self.assertEqual("ERR", cache["18207c0ac15ccf67552b695b3c6074fa"]["result"])
         self.assertListEqual(
             [
                 Issue(
                     code="NOT_NULL",
                     message="NOT NULL constraint on columns",
+                    table="app_add_not_null_column_a",
+                    column="new_not_null_field",
                 ),
             ],
-            cache["31fa92230495861937bd6fd35b63c4e7"]["errors"],
+            cache["18207c0ac15ccf67552b695b3c6074fa"]["errors"],
         )
 
         # Start the Linter again -> should use cache now but ignore the erroneous
@@ -260,7 +260,6 @@ class CacheTestCase(unittest.TestCase):
 
         self.assertFalse(linter.has_errors)
 
-        cache = linter.new_cache
-        cache.load()
+        cache = linter.cache
         self.assertEqual(1, len(cache))
-        self.assertEqual("OK", cache["eb6832d34f7ad40903a51a8b053ac13c"]["result"])
+        self.assertEqual("OK", cache["e71569dcf0fc3b4a03a02af78da0921a"]["result"])
@@ -340,3 +340,21 @@ class RunSQLMigrationTestCase(unittest.TestCase):
 
         error, ignored, warning = self.linter.lint_runsql(runsql)
         self.assertEqual("DROP_COLUMN", error[0].code)
+
+    def test_sql_linting_error_multiline_statements(self):
+        runsql = migrations.RunSQL(
+            """
+            UPDATE t
+            SET c = 'a; b';
+            ALTER TABLE t
+                DROP COLUMN c;
+            ALTER TABLE t
+                RENAME COLUMN d TO e;
+            """
+        )
+
+        error, ignored, warning = self.linter.lint_runsql(runsql)
+        self.assertEqual(
+            [("DROP_COLUMN", "c"), ("RENAME_COLUMN", "d")],
+            [(e.code, e.column) for e in error],
+        )
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import io
+import json
+import os
+import py_compile
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+from benchmarks.analysers import CorpusGenerator
+from benchmarks.analysers import main as analysers_main
+from benchmarks.project import (
+    DEFAULT_OPERATION_MIX,
+    ProjectSpec,
+    generate_project,
+    parse_operation_mix,
+)
+from benchmarks.run import main
+
+
+class BenchmarkProjectTestCase(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+
+    def test_generate_project(self):
+        spec = ProjectSpec(apps=2, migrations=30, seed=1)
+        app_labels = generate_project(spec, self.path)
+        self.assertEqual(["bench_app_000", "bench_app_001"], app_labels)
+
+        migrations_path = os.path.join(self.path, "bench_app_001", "migrations")
+        migration_files = sorted(
+            name for name in os.listdir(migrations_path) if name != "__init__.py"
+        )
+        self.assertEqual(30, len(migration_files))
+        self.assertEqual("0001_initial.py", migration_files[0])
+        content = ""
+        for name in migration_files:
+            path = os.path.join(migrations_path, name)
+            py_compile.compile(path, doraise=True)
+            with open(path) as file:
+                content += file.read()
+        for operation in ("AddField", "AlterField", "RunPython", "RunSQL", "AddIndex"):
+            self.assertIn(f"migrations.{operation}(", content)
+
+    def test_operation_mix(self):
+        self.assertEqual(
+            {"add_field": 3, "run_sql": 1}, parse_operation_mix("add_field=3,run_sql")
+        )
+        with self.assertRaises(ValueError):
+            parse_operation_mix("delete_model=1")
+        self.assertEqual(DEFAULT_OPERATION_MIX, ProjectSpec().operation_mix)
+
+    def test_run(self):
+        output = os.path.join(self.path, "results.json")
+        with redirect_stderr(io.StringIO()):
+            main(
+                [
+                    "--apps=2",
+                    "--migrations=3",
+                    "--repeat=1",
+                    "--scenarios",
+                    "cold",
+                    "git_diff",
+                    f"--output={output}",
+                ]
+            )
+        with open(output) as file:
+            results = json.load(file)
+        self.assertEqual(2, results["project"]["apps"])
+        self.assertEqual({"cold", "git_diff"}, set(results["scenarios"]))
+        self.assertGreater(results["scenarios"]["cold"]["median"], 0)
+
+
+class AnalyserBenchmarkTestCase(unittest.TestCase):
+    def test_corpus(self):
+        migrations = CorpusGenerator("mysql", seed=1).generate("realistic", 20)
+        self.assertEqual(20, len(migrations))
+        statements = [s for statements in migrations for s in statements]
+        self.assertEqual(len(statements), len(set(statements)) + 2 * 19)
+        self.assertTrue(
+            all("`" in s for s in statements if s not in ("BEGIN;", "COMMIT;"))
+        )
+
+    def test_run(self):
+        with redirect_stderr(io.StringIO()), redirect_stdout(io.StringIO()):
+            results = analysers_main(
+                ["--migrations=5", "--repeat=1", "--analysers", "postgresql", "sqlite"]
+            )
+        self.assertEqual({"postgresql", "sqlite"}, set(results["analysers"]))
+        adversarial = results["analysers"]["postgresql"]["adversarial"]
+        self.assertGreater(adversarial["statements"], 5)
+        self.assertGreater(adversarial["reuse"]["statements_per_second"], 0)
+        self.assertGreater(
+            adversarial["analyse_sql_statements"]["statements_per_second"], 0
+        )
+        self.assertIn("NOT_NULL", adversarial["checks"])
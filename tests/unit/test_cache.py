@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+import unittest.mock as mock
+
+from django_migration_linter import MigrationLinter
+from django_migration_linter.cache import Cache, StatManifest
+
+
+class CacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.cache_path = tempfile.mkdtemp()
+
+    def get_cache(self):
+        cache = Cache("project", "default", self.cache_path)
+        cache.load()
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_get_set(self):
+        cache = self.get_cache()
+        self.assertNotIn("hash", cache)
+        self.assertIsNone(cache.get("hash"))
+        with self.assertRaises(KeyError):
+            cache["hash"]
+
+        cache["hash"] = {"result": "OK"}
+        cache["hash"] = {"result": "ERR"}
+        self.assertIn("hash", cache)
+        self.assertEqual({"result": "ERR"}, cache["hash"])
+        self.assertEqual(1, len(cache))
+
+    def test_save_prunes_unused_entries(self):
+        cache = self.get_cache()
+        cache["used"] = {"result": "OK"}
+        cache["unused"] = {"result": "OK"}
+        cache.save()
+
+        cache = self.get_cache()
+        self.assertEqual(2, len(cache))
+        cache.touch("used")
+        cache["new"] = {"result": "ERR"}
+        cache.save()
+
+        cache = self.get_cache()
+        self.assertIn("used", cache)
+        self.assertIn("new", cache)
+        self.assertNotIn("unused", cache)
+
+    def test_shared_generation(self):
+        cache = self.get_cache()
+        cache["old"] = {"result": "OK"}
+        cache.save()
+
+        cache = self.get_cache()
+        worker_cache = self.get_cache()
+        worker_cache.generation = cache.generation
+        worker_cache["written_by_worker"] = {"result": "OK"}
+        cache.save()
+
+        self.assertIn("written_by_worker", cache)
+        self.assertNotIn("old", cache)
+
+    def test_fingerprints(self):
+        cache = Cache("project", "default", self.cache_path, fingerprint="a")
+        cache["hash"] = {"result": "OK"}
+        cache.save()
+        cache.close()
+
+        other_cache = Cache("project", "default", self.cache_path, fingerprint="b")
+        self.addCleanup(other_cache.close)
+        self.assertNotIn("hash", other_cache)
+        other_cache["hash"] = {"result": "ERR"}
+        other_cache.save()
+
+        cache = Cache("project", "default", self.cache_path, fingerprint="a")
+        self.addCleanup(cache.close)
+        self.assertEqual({"result": "OK"}, cache["hash"])
+        self.assertEqual({"result": "ERR"}, other_cache["hash"])
+
+
+class StatManifestTestCase(unittest.TestCase):
+    def setUp(self):
+        self.cache_path = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.cache_path, "0001_initial.py")
+        with open(self.file_path, "w") as f:
+            f.write("operations = []\n")
+
+    def get_manifest(self):
+        compute_digest = mock.Mock(side_effect=MigrationLinter.get_file_hash)
+        manifest = StatManifest(
+            Cache("project", "default", self.cache_path, table="file_digest"),
+            compute_digest=compute_digest,
+        )
+        self.addCleanup(manifest.close)
+        return manifest, compute_digest
+
+    def test_unchanged_file_not_read(self):
+        manifest, compute_digest = self.get_manifest()
+        digest = manifest.get_digest(self.file_path)
+        manifest.save()
+        compute_digest.assert_called_once_with(self.file_path)
+
+        manifest, compute_digest = self.get_manifest()
+        self.assertEqual(digest, manifest.get_digest(self.file_path))
+        compute_digest.assert_not_called()
+
+    def test_changed_file(self):
+        manifest, _ = self.get_manifest()
+        digest = manifest.get_digest(self.file_path)
+        manifest.save()
+
+        with open(self.file_path, "a") as f:
+            f.write("# comment\n")
+
+        manifest, compute_digest = self.get_manifest()
+        self.assertNotEqual(digest, manifest.get_digest(self.file_path))
+        compute_digest.assert_called_once_with(self.file_path)
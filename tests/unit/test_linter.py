@@ -1,21 +1,30 @@
 from __future__ import annotations
 
+import io
+import os
 import tempfile
 import unittest
+from contextlib import redirect_stdout
 from unittest.mock import patch
 
+from django.conf import settings
 from django.db import ProgrammingError
 from django.db.migrations import Migration
 
-from django_migration_linter import MigrationLinter
+from django_migration_linter import (
+    MigrationLinter,
+    analyse_sql_statements,
+    get_migration_abspath,
+)
 
 
 class LinterFunctionsTestCase(unittest.TestCase):
     def test_get_sql(self):
         linter = MigrationLinter()
         sql_statements = linter.get_sql("app_add_not_null_column", "0001")
-        self.assertEqual(len(sql_statements), 6)
+        self.assertEqual(len(sql_statements), 3)
         self.assertEqual(sql_statements[0], "BEGIN;")
+        self.assertTrue(sql_statements[1].startswith("CREATE TABLE"))
         self.assertEqual(sql_statements[-1], "COMMIT;")
 
     def test_has_errors(self):
@@ -182,3 +191,291 @@ class LinterFunctionsTestCase(unittest.TestCase):
         self.assertFalse(
             linter.should_ignore_migration("app_correct", "0002_foo", is_initial=False)
         )
+
+    @patch(
+        "django_migration_linter.MigrationLinter._gather_all_migrations",
+        return_value=[
+            Migration("0001_create_table", "app_add_not_null_column"),
+            Migration("0002_add_new_not_null_field", "app_add_not_null_column"),
+        ],
+    )
+    def test_lint_all_migrations_without_sqlmigrate(self, *args):
+        linter = MigrationLinter(no_cache=True)
+        with patch(
+            "django_migration_linter.migration_linter.call_command"
+        ) as call_command_mock:
+            linter.lint_all_migrations()
+            call_command_mock.assert_not_called()
+        self.assertTrue(linter.has_errors)
+        self.assertEqual(2, linter.nb_total)
+
+    @patch(
+        "django_migration_linter.MigrationLinter._gather_all_migrations",
+        return_value=[
+            Migration("0002_add_new_not_null_field", "app_add_not_null_column")
+        ],
+    )
+    def test_lint_all_migrations_with_sqlmigrate(self, *args):
+        linter = MigrationLinter(no_cache=True, use_sqlmigrate=True)
+        with patch(
+            "django_migration_linter.migration_linter.call_command",
+            return_value="",
+        ) as call_command_mock:
+            linter.lint_all_migrations()
+            call_command_mock.assert_called_once()
+
+    def test_lint_all_migrations_in_parallel(self):
+        outputs = []
+        counters = []
+        for jobs in (1, 3):
+            linter = MigrationLinter(
+                no_cache=True,
+                include_apps=(
+                    "app_add_not_null_column",
+                    "app_correct",
+                    "app_drop_column",
+                    "app_rename_table",
+                ),
+                jobs=jobs,
+            )
+            with redirect_stdout(io.StringIO()) as output:
+                linter.lint_all_migrations()
+            outputs.append(output.getvalue())
+            counters.append(linter.get_counters())
+
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(counters[0], counters[1])
+        self.assertGreater(counters[1]["nb_erroneous"], 0)
+
+    def test_options_fingerprint(self):
+        linter = MigrationLinter(
+            cache_path=tempfile.mkdtemp(),
+            exclude_migration_tests=["NOT_NULL", "DROP_COLUMN"],
+        )
+        same_linter = MigrationLinter(
+            cache_path=tempfile.mkdtemp(),
+            exclude_migration_tests=["DROP_COLUMN", "NOT_NULL"],
+        )
+        self.assertEqual(linter.options_fingerprint, same_linter.options_fingerprint)
+
+        for options in (
+            {"exclude_migration_tests": ["NOT_NULL"]},
+            {"warnings_as_errors_tests": ["RUNPYTHON_REVERSIBLE"]},
+            {"all_warnings_as_errors": True},
+            {"analyser_string": "mysql"},
+        ):
+            with self.subTest(options=options):
+                other_linter = MigrationLinter(cache_path=tempfile.mkdtemp(), **options)
+                self.assertNotEqual(
+                    linter.options_fingerprint, other_linter.options_fingerprint
+                )
+
+    @patch(
+        "django_migration_linter.MigrationLinter._gather_all_migrations",
+        return_value=[
+            Migration("0001_create_table", "app_add_not_null_column"),
+            Migration("0002_add_new_not_null_field", "app_add_not_null_column"),
+        ],
+    )
+    def test_cache_shared_between_options(self, *args):
+        cache_path = tempfile.mkdtemp()
+        # The migration that creates the table is analysed from its operations.
+        for exclude_migration_tests, has_errors, nb_analysed in (
+            ([], True, 1),
+            (["NOT_NULL"], False, 1),
+            ([], True, 0),
+        ):
+            linter = MigrationLinter(
+                os.path.dirname(settings.BASE_DIR),
+                cache_path=cache_path,
+                exclude_migration_tests=exclude_migration_tests,
+            )
+            with patch(
+                "django_migration_linter.migration_linter.analyse_sql_statements",
+                wraps=analyse_sql_statements,
+            ) as analyse_sql_statements_mock:
+                linter.lint_all_migrations()
+            self.assertEqual(nb_analysed, analyse_sql_statements_mock.call_count)
+            self.assertEqual(has_errors, linter.has_errors)
+
+    @patch(
+        "django_migration_linter.MigrationLinter._gather_all_migrations",
+        return_value=[
+            Migration("0001_create_table", "app_add_not_null_column"),
+            Migration("0002_add_new_not_null_field", "app_add_not_null_column"),
+        ],
+    )
+    def test_sql_cache_shared_between_options(self, *args):
+        cache_path = tempfile.mkdtemp()
+        for exclude_migration_tests, nb_generated in (
+            ([], 1),
+            (["NOT_NULL"], 0),
+            (["NOT_NULL", "DROP_COLUMN"], 0),
+        ):
+            linter = MigrationLinter(
+                os.path.dirname(settings.BASE_DIR),
+                cache_path=cache_path,
+                exclude_migration_tests=exclude_migration_tests,
+            )
+            with patch.object(
+                linter, "generate_sql", wraps=linter.generate_sql
+            ) as generate_sql_mock:
+                linter.lint_all_migrations()
+            self.assertEqual(nb_generated, generate_sql_mock.call_count)
+            self.assertEqual(2, linter.nb_total)
+
+    def test_sql_cache_of_identical_migrations(self):
+        # Same migration file in both apps, but the SQL names their own tables.
+        keys = [
+            ("app_unique_together", "0001_initial"),
+            ("my_custom_name", "0001_initial"),
+        ]
+        linter = MigrationLinter(
+            os.path.dirname(settings.BASE_DIR), cache_path=tempfile.mkdtemp()
+        )
+        sql = {key: linter.get_sql(*key) for key in keys}
+        self.assertNotEqual(sql[keys[0]], sql[keys[1]])
+        self.assertEqual(
+            sql,
+            {key: linter.sql_cache[linter.get_sql_cache_key(*key)] for key in keys},
+        )
+
+    @patch("django_migration_linter.migration_linter.get_function_source_files")
+    def test_cache_data_migration_dependencies(self, get_function_source_files_mock):
+        cache_path = tempfile.mkdtemp()
+        helper_path = os.path.join(tempfile.mkdtemp(), "migration_utils.py")
+        get_function_source_files_mock.return_value = {helper_path}
+        migration = MigrationLinter(no_cache=True).get_migration(
+            "app_data_migrations", "0002_missing_reverse"
+        )
+        for helper_content, nb_analysed in (
+            ("def helper(): pass\n", 1),
+            ("def helper(): pass\n", 0),
+            ("def helper(): return 1\n", 1),
+        ):
+            with open(helper_path, "w") as f:
+                f.write(helper_content)
+            linter = MigrationLinter(
+                os.path.dirname(settings.BASE_DIR), cache_path=cache_path
+            )
+            with patch.object(
+                linter, "_gather_all_migrations", return_value=[migration]
+            ):
+                with patch.object(
+                    linter,
+                    "analyse_data_migration",
+                    wraps=linter.analyse_data_migration,
+                ) as analyse_data_migration_mock:
+                    linter.lint_all_migrations()
+            self.assertEqual(nb_analysed, analyse_data_migration_mock.call_count)
+            self.assertEqual(1, linter.nb_warnings)
+
+        os.remove(helper_path)
+        linter = MigrationLinter(
+            os.path.dirname(settings.BASE_DIR), cache_path=cache_path
+        )
+        self.assertFalse(
+            linter.is_cached(
+                linter.get_migration_graph_hash(
+                    "app_data_migrations", "0002_missing_reverse"
+                )
+            )
+        )
+
+    def test_is_project_file(self):
+        project_path = os.path.dirname(settings.BASE_DIR)
+        linter = MigrationLinter(project_path, no_cache=True)
+        self.assertTrue(
+            linter.is_project_file(os.path.join(project_path, "app", "utils.py"))
+        )
+        for path in (
+            os.path.join(project_path, "app", "utils.pyc"),
+            os.path.join(project_path, ".venv", "site-packages", "lib", "utils.py"),
+            project_path + "_other.py",
+            os.path.__file__,
+        ):
+            with self.subTest(path=path):
+                self.assertFalse(linter.is_project_file(path))
+
+    def test_migration_graph_hash(self):
+        linter = MigrationLinter(no_cache=True)
+        parent = ("app_add_not_null_column", "0001_create_table")
+        child = ("app_add_not_null_column", "0002_add_new_not_null_field")
+        hashes = {key: linter.get_migration_graph_hash(*key) for key in (parent, child)}
+        self.assertNotEqual(hashes[parent], hashes[child])
+
+        # Modifying the parent changes the hash of the child as well.
+        linter = MigrationLinter(no_cache=True)
+        get_migration_file_hash = linter.get_migration_file_hash
+        with patch.object(
+            linter,
+            "get_migration_file_hash",
+            side_effect=lambda *key: (
+                "modified" if key == parent else get_migration_file_hash(*key)
+            ),
+        ):
+            self.assertNotEqual(
+                hashes[parent], linter.get_migration_graph_hash(*parent)
+            )
+            self.assertNotEqual(hashes[child], linter.get_migration_graph_hash(*child))
+
+    @patch(
+        "django_migration_linter.MigrationLinter._gather_all_migrations",
+        return_value=[
+            Migration("0001_initial", "app_unique_together"),
+            Migration("0001_initial", "my_custom_name"),
+        ],
+    )
+    def test_migration_graph_hash_of_identical_migrations(self, *args):
+        # Same migration file in both apps, but they create different tables.
+        keys = [
+            ("app_unique_together", "0001_initial"),
+            ("my_custom_name", "0001_initial"),
+        ]
+        linter = MigrationLinter(
+            os.path.dirname(settings.BASE_DIR), cache_path=tempfile.mkdtemp()
+        )
+        self.assertEqual(
+            linter.get_migration_file_hash(*keys[0]),
+            linter.get_migration_file_hash(*keys[1]),
+        )
+        self.assertNotEqual(
+            linter.get_migration_graph_hash(*keys[0]),
+            linter.get_migration_graph_hash(*keys[1]),
+        )
+
+        with redirect_stdout(io.StringIO()) as stdout:
+            linter.lint_all_migrations()
+        self.assertNotIn("(cached)", stdout.getvalue())
+        self.assertEqual(2, len(linter.cache))
+
+    def test_get_migration_path(self):
+        linter = MigrationLinter(no_cache=True)
+        for app_label, migration_name in linter.migration_loader.disk_migrations:
+            with self.subTest(app_label=app_label, migration_name=migration_name):
+                self.assertEqual(
+                    get_migration_abspath(app_label, migration_name),
+                    linter.get_migration_path(app_label, migration_name),
+                )
+
+    def test_gather_migrations_git(self):
+        linter = MigrationLinter(os.path.dirname(settings.BASE_DIR), no_cache=True)
+        diff_output = (
+            b"tests/test_project/app_add_not_null_column/migrations/0001_create_table.py"
+            b"\0app_correct/migrations/0002_foo.py"
+            b"\0rrect/migrations/0001_initial.py"
+            b"\0README.md\0"
+        )
+        with patch("django_migration_linter.migration_linter.Popen") as popen_mock:
+            popen_mock.return_value.communicate.return_value = (diff_output, b"")
+            popen_mock.return_value.returncode = 0
+            migrations = linter._gather_migrations_git("main")
+
+        self.assertIn("-z", popen_mock.call_args.args[0])
+        self.assertEqual(
+            [
+                ("app_add_not_null_column", "0001_create_table"),
+                ("app_correct", "0002_foo"),
+            ],
+            [(m.app_label, m.name) for m in migrations],
+        )
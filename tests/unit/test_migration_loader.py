@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import unittest
+from unittest.mock import patch
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.loader import MigrationLoader
+
+from django_migration_linter import MigrationLinter
+from django_migration_linter.migration_loader import ScopedMigrationLoader
+
+
+class ScopedMigrationLoaderTestCase(unittest.TestCase):
+    def test_loads_only_app_in_scope(self):
+        loader = ScopedMigrationLoader(None, app_labels=["app_add_not_null_column"])
+        self.assertEqual({"app_add_not_null_column"}, loader.migrated_apps)
+        self.assertEqual(
+            {
+                ("app_add_not_null_column", "0001_create_table"),
+                ("app_add_not_null_column", "0002_add_new_not_null_field"),
+            },
+            set(loader.disk_migrations),
+        )
+        self.assertIn("app_correct", loader.skipped_apps)
+        self.assertNotIn("app_correct", loader.unmigrated_apps)
+
+    def test_loads_dependencies(self):
+        loader = ScopedMigrationLoader(None, app_labels=["admin"])
+        self.assertEqual({"admin", "auth", "contenttypes"}, loader.migrated_apps)
+        self.assertNotIn("sessions", loader.migrated_apps)
+
+        full_loader = MigrationLoader(None)
+        self.assertEqual(full_loader.unmigrated_apps, loader.unmigrated_apps)
+        for key in loader.graph.nodes:
+            with self.subTest(key=key):
+                self.assertEqual(
+                    full_loader.graph.forwards_plan(key),
+                    loader.graph.forwards_plan(key),
+                )
+
+
+class LazyMigrationLoadingTestCase(unittest.TestCase):
+    def test_loaded_on_first_use(self):
+        linter = MigrationLinter(no_cache=True)
+        self.assertIsNone(linter._migration_loader)
+        self.assertIsInstance(linter.migration_loader, MigrationLoader)
+        self.assertIs(linter._migration_loader, linter.migration_loader)
+
+    def test_lint_app_label(self):
+        linter = MigrationLinter(no_cache=True, no_output=True)
+        linter.lint_all_migrations(app_label="app_correct")
+        self.assertEqual({"app_correct"}, linter.migration_loader.migrated_apps)
+        self.assertEqual(2, linter.nb_total)
+
+    def test_include_apps_reports_other_apps_as_ignored(self):
+        counters = []
+        for include_apps in (("app_correct",), "app_correct"):
+            linter = MigrationLinter(
+                no_cache=True, no_output=True, include_apps=include_apps
+            )
+            linter.lint_all_migrations()
+            counters.append(linter.get_counters())
+        self.assertEqual(counters[0], counters[1])
+        self.assertEqual(2, counters[0]["nb_valid"])
+        self.assertGreater(counters[0]["nb_ignored"], 0)
+
+    def test_applied_migrations_only_queried_when_needed(self):
+        with patch(
+            "django.db.migrations.recorder.MigrationRecorder.applied_migrations"
+        ) as applied_migrations_mock:
+            linter = MigrationLinter(no_cache=True, no_output=True)
+            linter.lint_all_migrations(app_label="app_correct")
+            applied_migrations_mock.assert_not_called()
+
+            linter = MigrationLinter(
+                no_cache=True, no_output=True, only_applied_migrations=True
+            )
+            linter.lint_all_migrations(app_label="app_correct")
+            applied_migrations_mock.assert_called_once()
+
+    def test_connection_of_database(self):
+        linter = MigrationLinter(
+            database=DEFAULT_DB_ALIAS, no_cache=True, only_unapplied_migrations=True
+        )
+        self.assertIs(connections[DEFAULT_DB_ALIAS], linter.migration_loader.connection)
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+
+from django.db.migrations.loader import MigrationLoader
+
+from django_migration_linter import MigrationLinter, SqlGenerator
+from django_migration_linter.constants import DJANGO_APPS_WITH_MIGRATIONS
+from django_migration_linter.offline import (
+    OfflineDatabaseError,
+    get_offline_connection,
+    read_applied_migrations,
+)
+from django_migration_linter.operation_analyser import OperationAnalyser
+from django_migration_linter.sql_analyser import (
+    MySqlAnalyser,
+    PostgresqlAnalyser,
+    analyse_sql_statements,
+)
+
+
+class OfflineSqlGenerationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.loader = MigrationLoader(None)
+        self.keys = sorted(
+            key
+            for key in self.loader.disk_migrations
+            if key[0] not in DJANGO_APPS_WITH_MIGRATIONS
+        )
+
+    def test_generate_sql_of_all_migrations(self):
+        for alias, analyser_class in (
+            ("postgresql", PostgresqlAnalyser),
+            ("mysql", MySqlAnalyser),
+        ):
+            generator = SqlGenerator(
+                self.loader, get_offline_connection(alias), targets=self.keys
+            )
+            sql = {key: generator.get_sql(*key) for key in self.keys}
+
+            # The operations are decided like their offline SQL.
+            results = OperationAnalyser(analyser_class).analyse_migrations(
+                self.loader, self.keys
+            )
+            self.assertTrue(results)
+            for key, issues in sorted(results.items()):
+                with self.subTest(alias=alias, key=key):
+                    self.assertEqual(
+                        analyse_sql_statements(analyser_class, sql[key]), issues
+                    )
+
+    def test_constraint_names_from_state(self):
+        key = ("app_unique_together", "0003_auto_20190729_2122")
+        sql = SqlGenerator(
+            self.loader, get_offline_connection("postgresql"), targets=[key]
+        ).get_sql(*key)
+        self.assertIn(
+            'ALTER TABLE "app_unique_together_a" DROP CONSTRAINT', "".join(sql)
+        )
+
+    def test_server_version(self):
+        key = ("app_rename_column", "0002_auto_20190414_1502")
+        for server_version, rename in (
+            ("8.0.11", "RENAME COLUMN"),
+            ("10.4.0-MariaDB", "CHANGE"),
+        ):
+            with self.subTest(server_version=server_version):
+                connection = get_offline_connection("mysql", server_version)
+                sql = "".join(
+                    SqlGenerator(self.loader, connection, targets=[key]).get_sql(*key)
+                )
+                self.assertIn(rename, sql)
+
+        connection = get_offline_connection("postgresql", "12.4")
+        self.assertEqual(120004, connection.pg_version)
+
+    def test_no_query(self):
+        connection = get_offline_connection("postgresql")
+        with self.assertRaises(OfflineDatabaseError):
+            connection.cursor().execute("SELECT 1")
+        with self.assertRaises(OfflineDatabaseError):
+            connection.ensure_connection()
+
+
+class AppliedMigrationsFileTestCase(unittest.TestCase):
+    def read(self, content):
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as file:
+            file.write(content)
+        self.addCleanup(os.remove, file.name)
+        return read_applied_migrations(file.name)
+
+    def test_list_format(self):
+        self.assertEqual(
+            {("app_add_not_null_column", "0001_create_table")},
+            self.read(
+                "app_add_not_null_column\n"
+                " [X] 0001_create_table\n"
+                " [ ] 0002_add_new_not_null_field\n"
+                "app_correct\n"
+                " (no migrations)\n"
+            ),
+        )
+
+    def test_plan_format(self):
+        self.assertEqual(
+            {("app_correct", "0001_initial")},
+            self.read("[X]  app_correct.0001_initial\n[ ]  app_correct.0002_foo\n"),
+        )
+
+    def test_lint_unapplied_migrations_offline(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as file:
+            file.write("app_add_not_null_column\n [X] 0001_create_table\n")
+        self.addCleanup(os.remove, file.name)
+
+        linter = MigrationLinter(
+            database="postgresql",
+            offline=True,
+            only_unapplied_migrations=True,
+            applied_migrations_file=file.name,
+            no_cache=True,
+            no_output=True,
+        )
+        linter.lint_all_migrations(app_label="app_add_not_null_column")
+        self.assertEqual(1, linter.nb_erroneous)
+        self.assertEqual(0, linter.nb_valid)
+
+    def test_offline_options(self):
+        with self.assertRaises(ValueError):
+            MigrationLinter(offline=True, use_sqlmigrate=True)
+        with self.assertRaises(ValueError):
+            MigrationLinter(offline=True, only_applied_migrations=True)
@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, migrations, models
+from django.db.backends.utils import truncate_name
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.state import ModelState, ProjectState
+
+from django_migration_linter import MigrationLinter, SqlGenerator
+from django_migration_linter.constants import DJANGO_APPS_WITH_MIGRATIONS
+from django_migration_linter.operation_analyser import OperationAnalyser
+from django_migration_linter.sql_analyser import (
+    MySqlAnalyser,
+    PostgresqlAnalyser,
+    SqliteAnalyser,
+    analyse_sql_statements,
+)
+from django_migration_linter.sql_analyser.base import Check, CheckMode, CheckType, Issue
+
+
+class OperationAnalyserTestCase(unittest.TestCase):
+    def setUp(self):
+        self.loader = MigrationLoader(None)
+
+    def test_same_issues_as_sql(self):
+        keys = sorted(
+            key
+            for key in self.loader.disk_migrations
+            if key[0] not in DJANGO_APPS_WITH_MIGRATIONS
+        )
+        results = OperationAnalyser(SqliteAnalyser).analyse_migrations(
+            self.loader, keys
+        )
+        self.assertIn(("app_correct", "0001_initial"), results)
+        self.assertNotIn(("app_correct", "0002_foo"), results)
+
+        generator = SqlGenerator(
+            self.loader, connections[DEFAULT_DB_ALIAS], targets=results
+        )
+        for key, issues in sorted(results.items()):
+            with self.subTest(key=key):
+                self.assertEqual(
+                    analyse_sql_statements(SqliteAnalyser, generator.get_sql(*key)),
+                    issues,
+                )
+
+    def test_dropped_and_renamed_columns(self):
+        keys = [
+            ("app_drop_column", "0002_remove_a_field_b"),
+            ("app_drop_table", "0002_delete_a"),
+            ("app_rename_column", "0002_auto_20190414_1502"),
+        ]
+        results = OperationAnalyser(PostgresqlAnalyser).analyse_migrations(
+            self.loader, keys
+        )
+        self.assertEqual(
+            [
+                Issue(
+                    "DROP_COLUMN", "DROPPING columns", "app_drop_column_a", "field_b"
+                ),
+                Issue("DROP_TABLE", "DROPPING table", "app_drop_table_a"),
+                Issue(
+                    "RENAME_COLUMN", "RENAMING columns", "app_rename_column_a", "field"
+                ),
+            ],
+            [results[key][0][0] for key in keys],
+        )
+
+        # Renaming a column depends on the version of the MySQL server.
+        results = OperationAnalyser(MySqlAnalyser).analyse_migrations(self.loader, keys)
+        self.assertEqual(set(keys[:2]), set(results))
+
+        # SQLite can remake the table instead.
+        results = OperationAnalyser(SqliteAnalyser).analyse_migrations(
+            self.loader, keys
+        )
+        self.assertEqual({}, results)
+
+    def test_custom_checks(self):
+        keys = [
+            ("app_drop_column", "0002_remove_a_field_b"),
+            ("app_drop_table", "0002_delete_a"),
+            ("app_rename_column", "0002_auto_20190414_1502"),
+        ]
+
+        class SubclassedAnalyser(PostgresqlAnalyser):
+            pass
+
+        results = OperationAnalyser(SubclassedAnalyser).analyse_migrations(
+            self.loader, keys
+        )
+        self.assertEqual(set(keys), set(results))
+
+        class CustomAnalyser(PostgresqlAnalyser):
+            migration_checks = PostgresqlAnalyser.migration_checks + [
+                Check(
+                    code="DROP_TABLE",
+                    fn=lambda sql, statement, **kw: False,
+                    message="DROPPING table",
+                    mode=CheckMode.ONE_LINER,
+                    type=CheckType.ERROR,
+                ),
+            ]
+
+        results = OperationAnalyser(CustomAnalyser).analyse_migrations(
+            self.loader, keys + [("app_correct", "0001_initial")]
+        )
+        self.assertEqual({}, results)
+
+    def test_migration_sees_its_ancestors_only(self):
+        keys = [
+            ("app_drop_column", "0002_remove_a_field_b"),
+            ("app_drop_table", "0002_delete_a"),
+        ]
+        analyser = OperationAnalyser(PostgresqlAnalyser)
+        analyse = analyser.analyse
+        analysed_apps = {}
+
+        def analyse_spy(migration, state):
+            analysed_apps[migration.app_label] = {
+                app_label for app_label, _ in state.models
+            }
+            return analyse(migration, state)
+
+        with patch.object(analyser, "analyse", analyse_spy):
+            results = analyser.analyse_migrations(self.loader, keys)
+
+        self.assertEqual(set(keys), set(results))
+        self.assertEqual(
+            {
+                "app_drop_column": {"app_drop_column"},
+                "app_drop_table": {"app_drop_table"},
+            },
+            analysed_apps,
+        )
+
+    def test_excluded_checks(self):
+        key = ("app_drop_column", "0002_remove_a_field_b")
+        results = OperationAnalyser(
+            PostgresqlAnalyser, exclude_migration_tests=["DROP_COLUMN"]
+        ).analyse_migrations(self.loader, [key])
+        errors, ignored, warnings = results[key]
+        self.assertEqual([], errors)
+        self.assertEqual(["DROP_COLUMN"], [issue.code for issue in ignored])
+
+        results = OperationAnalyser(
+            PostgresqlAnalyser,
+            exclude_migration_tests=["DROP_COLUMN"],
+            report_ignored=False,
+        ).analyse_migrations(self.loader, [key])
+        self.assertEqual(([], [], []), results[key])
+
+    def test_unmanaged_model_and_db_column(self):
+        state = ProjectState()
+        state.add_model(
+            ModelState(
+                "app",
+                "Unmanaged",
+                [("id", models.AutoField(primary_key=True))],
+                options={"managed": False},
+            )
+        )
+        state.add_model(
+            ModelState(
+                "app",
+                "A",
+                [
+                    ("id", models.AutoField(primary_key=True)),
+                    ("b", models.IntegerField(db_column="c")),
+                    ("d", models.ForeignKey("app.Unmanaged", models.CASCADE)),
+                    ("e", models.ManyToManyField("app.Unmanaged")),
+                ],
+            )
+        )
+        migration = migrations.Migration("0002_change", "app")
+        analyser = OperationAnalyser(PostgresqlAnalyser)
+
+        migration.operations = [
+            migrations.DeleteModel("Unmanaged"),
+            migrations.RenameField("A", "b", "renamed"),
+            migrations.AlterModelOptions("A", {"ordering": ["id"]}),
+        ]
+        self.assertEqual([], analyser.analyse(migration, state.clone()))
+
+        migration.operations = [migrations.RemoveField("A", "d")]
+        self.assertEqual(
+            [("DROP_COLUMN", "app_a", "d_id")],
+            analyser.analyse(migration, state.clone()),
+        )
+
+        migration.operations = [migrations.RemoveField("A", "e")]
+        self.assertIsNone(analyser.analyse(migration, state.clone()))
+
+    def test_table_name_of_linted_database(self):
+        state = ProjectState()
+        state.add_model(
+            ModelState("app", "A" * 70, [("id", models.AutoField(primary_key=True))])
+        )
+        migration = migrations.Migration("0002_delete", "app")
+        migration.operations = [migrations.DeleteModel("A" * 70)]
+
+        # SQLite does not shorten the table names, unlike MySQL.
+        for database in (DEFAULT_DB_ALIAS, "mysql"):
+            with self.subTest(database=database):
+                analyser = OperationAnalyser(MySqlAnalyser, database=database)
+                self.assertEqual(
+                    [
+                        (
+                            "DROP_TABLE",
+                            truncate_name(
+                                "app_" + "a" * 70,
+                                connections[database].ops.max_name_length(),
+                            ),
+                            None,
+                        )
+                    ],
+                    analyser.analyse(migration, state.clone()),
+                )
+
+    def test_state_operations(self):
+        state = ProjectState()
+        state.add_model(
+            ModelState(
+                "app",
+                "A",
+                [
+                    ("id", models.AutoField(primary_key=True)),
+                    ("b", models.IntegerField(choices=[(1, "one")])),
+                ],
+            )
+        )
+        migration = migrations.Migration("0002_change", "app")
+        analyser = OperationAnalyser(SqliteAnalyser)
+
+        migration.operations = [
+            migrations.AlterField(
+                "A",
+                "b",
+                models.IntegerField(
+                    choices=[(1, "one"), (2, "two")], help_text="Number"
+                ),
+            ),
+            migrations.SeparateDatabaseAndState(
+                state_operations=[migrations.RemoveField("A", "b")]
+            ),
+            migrations.AlterModelManagers("A", []),
+        ]
+        self.assertEqual([], analyser.analyse(migration, state.clone()))
+        self.assertEqual({("app", "0002_change")}, analyser.state_only_migrations)
+
+        analyser = OperationAnalyser(SqliteAnalyser)
+        migration.operations = [
+            migrations.AlterField("A", "b", models.IntegerField(null=True))
+        ]
+        self.assertIsNone(analyser.analyse(migration, state.clone()))
+
+        migration.operations = [
+            migrations.SeparateDatabaseAndState(
+                database_operations=[migrations.RemoveField("A", "b")],
+                state_operations=[migrations.RemoveField("A", "b")],
+            )
+        ]
+        self.assertIsNone(analyser.analyse(migration, state.clone()))
+        self.assertEqual(
+            [("DROP_COLUMN", "app_a", "b")],
+            OperationAnalyser(PostgresqlAnalyser).analyse(migration, state.clone()),
+        )
+        self.assertEqual(set(), analyser.state_only_migrations)
+
+    def test_lint_without_sql(self):
+        linter = MigrationLinter(no_cache=True, no_output=True)
+        with patch.object(SqlGenerator, "get_sql") as get_sql_mock:
+            linter.lint_all_migrations(
+                app_label="app_create_table_with_not_null_column"
+            )
+        get_sql_mock.assert_not_called()
+        self.assertEqual(1, linter.nb_valid)
+        self.assertEqual(set(), linter.sql_generator.targets)
+
+    def test_summary_of_migrations_without_sql(self):
+        linter = MigrationLinter(no_cache=True)
+        with redirect_stdout(io.StringIO()) as output:
+            linter.lint_all_migrations(app_label="app_data_migrations")
+            linter.print_summary()
+        self.assertEqual(3, linter.nb_without_sql)
+        self.assertEqual(3, linter.nb_warnings)
+        self.assertIn("Migrations without SQL: 3/4", output.getvalue())
+
+    def test_summary_of_cached_migrations_without_sql(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            for _ in range(2):
+                linter = MigrationLinter(
+                    os.path.dirname(settings.BASE_DIR), cache_path=cache_dir
+                )
+                with redirect_stdout(io.StringIO()) as output:
+                    linter.lint_all_migrations(app_label="app_data_migrations")
+                    linter.print_summary()
+                self.assertEqual(3, linter.nb_without_sql)
+                self.assertIn("Migrations without SQL: 3/4", output.getvalue())
+            self.assertIn("(cached)", output.getvalue())
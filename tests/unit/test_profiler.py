@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+from django_migration_linter import MigrationLinter
+from django_migration_linter.profiler import Profiler
+
+
+class ProfilerTestCase(unittest.TestCase):
+    def test_nested_phases(self):
+        profiler = Profiler()
+        with patch("time.perf_counter", side_effect=[0.0, 1.0, 3.0, 6.0]):
+            with profiler.phase("outer"):
+                with profiler.migration(("app", "0001_initial")):
+                    pass
+
+        self.assertEqual(1, profiler.phases["outer"].calls)
+        self.assertEqual(4.0, profiler.phases["outer"].time)
+        self.assertEqual(2.0, profiler.phases["lint"].time)
+        self.assertEqual(6.0, profiler.total_time)
+        self.assertEqual(
+            [(("app", "0001_initial"), 2.0, "lint")],
+            profiler.get_slowest_migrations(5),
+        )
+
+    def test_dominant_phase(self):
+        profiler = Profiler()
+        with profiler.migration(("app", "0002_change")):
+            profiler.add("generate_sql", 3.0)
+            profiler.add("analyse_sql", 1.0, calls=2)
+        profiler.add("load_migrations", 5.0)
+
+        [(key, time, phase)] = profiler.get_slowest_migrations(5)
+        self.assertEqual(("app", "0002_change"), key)
+        self.assertGreaterEqual(time, 4.0)
+        self.assertEqual("generate_sql", phase)
+        self.assertEqual(2, profiler.phases["analyse_sql"].calls)
+
+    def test_merge(self):
+        profiler = Profiler()
+        profiler.add("generate_sql", 1.0)
+        other = Profiler()
+        with other.migration(("app", "0001_initial")):
+            other.add("generate_sql", 2.0)
+        profiler.merge(other)
+
+        self.assertEqual(2, profiler.phases["generate_sql"].calls)
+        self.assertEqual(3.0, profiler.phases["generate_sql"].time)
+        self.assertIn(("app", "0001_initial"), profiler.migrations)
+
+    def test_trace_events(self):
+        profiler = Profiler(trace=True)
+        with patch("time.perf_counter", side_effect=[1.0, 1.5, 2.0, 4.0]):
+            with profiler.migration(("app", "0001_initial")):
+                with profiler.phase("generate_sql"):
+                    pass
+
+        events = profiler.get_trace_events()
+        self.assertEqual("M", events[0]["ph"])
+        self.assertEqual(
+            [
+                ("app.0001_initial", "lint", 1e6, 3e6),
+                ("generate_sql", "generate_sql", 1.5e6, 0.5e6),
+            ],
+            [(e["name"], e["cat"], e["ts"], e["dur"]) for e in events[1:]],
+        )
+        self.assertEqual({"migration": "app.0001_initial"}, events[2]["args"])
+
+        # Only the phases are profiled without tracing.
+        profiler = Profiler()
+        with profiler.phase("generate_sql"):
+            pass
+        self.assertEqual([], profiler.spans)
+
+    def test_disabled(self):
+        profiler = Profiler(enabled=False)
+        with profiler.phase("generate_sql"):
+            with profiler.migration(("app", "0001_initial")):
+                pass
+        self.assertEqual({}, profiler.phases)
+        self.assertEqual({}, profiler.migrations)
+
+
+class LinterProfileTestCase(unittest.TestCase):
+    def test_print_profile(self):
+        linter = MigrationLinter(no_cache=True, profile=True)
+        with redirect_stdout(io.StringIO()) as output:
+            linter.lint_all_migrations(app_label="app_add_not_null_column")
+            linter.print_summary()
+
+        self.assertIn("generate_sql", linter.profiler.phases)
+        self.assertIn("load_migrations", linter.profiler.phases)
+        self.assertEqual(2, linter.profiler.phases["lint"].calls)
+        self.assertIn(
+            ("app_add_not_null_column", "0002_add_new_not_null_field"),
+            linter.profiler.migrations,
+        )
+        output = output.getvalue()
+        self.assertLess(
+            output.index("*** Summary ***"), output.index("*** Profile ***")
+        )
+        self.assertIn("Slowest migrations:", output)
+
+    def test_no_profile(self):
+        linter = MigrationLinter(no_cache=True)
+        with redirect_stdout(io.StringIO()) as output:
+            linter.lint_all_migrations(app_label="app_add_not_null_column")
+            linter.print_summary()
+        self.assertEqual({}, linter.profiler.phases)
+        self.assertNotIn("*** Profile ***", output.getvalue())
+
+    def test_trace_file(self):
+        trace_file = os.path.join(tempfile.mkdtemp(), "trace.json")
+        linter = MigrationLinter(no_cache=True, no_output=True, trace_file=trace_file)
+        linter.lint_all_migrations(app_label="app_add_not_null_column")
+
+        with open(trace_file) as file:
+            events = json.load(file)["traceEvents"]
+        self.assertIn(
+            "app_add_not_null_column.0002_add_new_not_null_field",
+            [event["name"] for event in events],
+        )
+        self.assertIn("load_migrations", [event["name"] for event in events])
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import functools
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from django.db import migrations
+
+from django_migration_linter import runpython_analyser
+from django_migration_linter.runpython_analyser import (
+    RunPythonModels,
+    analyse_runpython_function,
+    get_function_source_files,
+)
+
+
+class RunPythonAnalyserTestCase(unittest.TestCase):
+    def test_symbol_table(self):
+        def forward(apps, schema_editor):
+            from app.models import Imported
+
+            Model, Other = apps.get_model("app", "Model"), apps.get_model("app.B")
+            named = apps.get_model(app_label="app", model_name="Named")
+            dynamic = apps.get_model("app", schema_editor.model_name)
+
+            def helper(Param):
+                Param.objects.all()
+                Model.objects.all()
+                Other.objects.all()
+
+            for model in (Model, Other):
+                model.objects.all()
+            Imported.objects.all()
+            Imported.many_to_many.through.objects.all()
+            NotImported.objects.all()  # noqa: F821
+            named.objects.all()
+            dynamic.objects.all()
+            apps.get_model("app", "C").objects.all()
+
+        self.assertEqual(
+            RunPythonModels(
+                imported=("Imported", "Imported", "NotImported"),
+                misnamed=("Other", "named"),
+            ),
+            analyse_runpython_function(forward),
+        )
+
+    def test_global(self):
+        def forward(apps, schema_editor):
+            global Model
+            Model.objects.all()
+
+            def nested():
+                Model = apps.get_model("app", "Model")
+                Model.objects.all()
+
+        self.assertEqual(
+            RunPythonModels(imported=("Model",)), analyse_runpython_function(forward)
+        )
+
+    def test_lambda(self):
+        operation = migrations.RunPython(
+            lambda apps, schema_editor: MyModel.objects.all(),  # noqa: F821
+            lambda apps, editor: None,
+        )
+        self.assertEqual(
+            RunPythonModels(imported=("MyModel",)),
+            analyse_runpython_function(operation.code),
+        )
+        self.assertEqual(
+            RunPythonModels(), analyse_runpython_function(operation.reverse_code)
+        )
+
+    def test_memoized(self):
+        def forward(apps, schema_editor):
+            Model = apps.get_model("app", "Other")
+            Model.objects.all()
+
+        with patch.object(
+            runpython_analyser,
+            "parse_function",
+            wraps=runpython_analyser.parse_function,
+        ) as parse_function:
+            models = analyse_runpython_function(forward)
+            self.assertIs(models, analyse_runpython_function(forward))
+        self.assertEqual(1, parse_function.call_count)
+        self.assertEqual(("Model",), models.misnamed)
+
+    def test_memoized_by_source(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+
+        functions = []
+        for index, model_name in enumerate(("Model", "Other")):
+            module_path = os.path.join(path, f"migration_{index}.py")
+            with open(module_path, "w") as file:
+                file.write(
+                    "def forward(apps, schema_editor):\n"
+                    f'    Model = apps.get_model("app", "{model_name}")\n'
+                    "    Model.objects.all()\n"
+                )
+            spec = importlib.util.spec_from_file_location(
+                f"migration_{index}", module_path
+            )
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            functions.append(module.forward)
+
+        self.assertEqual((), analyse_runpython_function(functions[0]).misnamed)
+        self.assertEqual(("Model",), analyse_runpython_function(functions[1]).misnamed)
+
+    def test_function_source_files(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        sys.path.insert(0, path)
+        self.addCleanup(sys.path.remove, path)
+
+        modules = {
+            "dml_migration": (
+                "import functools\n"
+                "import os\n"
+                "import dml_utils\n"
+                "from dml_models import Manager\n"
+                "def forward(apps, schema_editor):\n"
+                "    dml_utils.copy_rows(apps)\n"
+                "    os.path.join('a', 'b')\n"
+                "    def nested():\n"
+                "        return Manager\n"
+                "partial_forward = functools.partial(dml_utils.copy_rows, 1)\n"
+            ),
+            "dml_utils": (
+                "import dml_helpers\n"
+                "import dml_unused\n"
+                "def copy_rows(apps):\n"
+                "    return dml_helpers.batch\n"
+            ),
+            "dml_helpers": "def batch():\n    pass\n",
+            "dml_unused": "",
+            "dml_models": (
+                "import dml_helpers\n"
+                "class Manager:\n"
+                "    @staticmethod\n"
+                "    def create():\n"
+                "        return dml_helpers.batch()\n"
+            ),
+        }
+        for name, source in modules.items():
+            with open(os.path.join(path, f"{name}.py"), "w") as file:
+                file.write(source)
+            self.addCleanup(sys.modules.pop, name, None)
+        migration = importlib.import_module("dml_migration")
+
+        def is_project_file(file_path):
+            return file_path.startswith(path)
+
+        def get_files(*names):
+            return {os.path.join(path, f"{name}.py") for name in names}
+
+        self.assertEqual(
+            get_files("dml_migration", "dml_utils", "dml_helpers", "dml_models"),
+            get_function_source_files(migration.forward, is_project_file),
+        )
+        self.assertEqual(
+            get_files("dml_utils", "dml_helpers"),
+            get_function_source_files(migration.partial_forward, is_project_file),
+        )
+        self.assertEqual(
+            set(), get_function_source_files(migration.forward, lambda _: False)
+        )
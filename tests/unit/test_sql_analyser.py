@@ -1,11 +1,23 @@
 from __future__ import annotations
 
+import json
 import unittest
 
+from django_migration_linter import MigrationLinter
 from django_migration_linter.sql_analyser import (
+    BaseAnalyser,
+    PostgresqlAnalyser,
+    SqliteAnalyser,
     analyse_sql_statements,
     get_sql_analyser_class,
 )
+from django_migration_linter.sql_analyser.base import (
+    Check,
+    CheckMode,
+    CheckStatistics,
+    CheckType,
+    compile_migration_checks,
+)
 
 
 class SqlAnalyserTestCase(unittest.TestCase):
@@ -337,7 +349,9 @@ class PostgresqlAnalyserTestCase(SqlAnalyserTestCase):
         sql = "CREATE INDEX CONCURRENTLY ON films (lower(title));"
         self.assertValidSql(sql)
         sql = "CREATE UNIQUE INDEX CONCURRENTLY title_idx ON films (title);"
-        self.assertValidSql(sql)
+        errors, _, warnings = self.analyse_sql(sql)
+        self.assertEqual(["ADD_UNIQUE"], [e.code for e in errors])
+        self.assertEqual([], warnings)
 
     def test_create_index_concurrently_where(self):
         sql = 'CREATE INDEX CONCURRENTLY "index_name" ON "table_name" ("a_column") WHERE ("some_column" IS NOT NULL);'
@@ -413,6 +427,37 @@ class PostgresqlAnalyserTestCase(SqlAnalyserTestCase):
         ]
         self.assertValidSql(sql)
 
+    def test_not_null_default_of_other_column(self):
+        sql = [
+            'ALTER TABLE "a" ALTER COLUMN "other" SET DEFAULT 42;',
+            'ALTER TABLE "a" ALTER COLUMN "col" SET NOT NULL;',
+        ]
+        errors, _, _ = self.analyse_sql(sql)
+        self.assertEqual(
+            [("NOT_NULL", "a", "col")], [(e.code, e.table, e.column) for e in errors]
+        )
+
+    def test_backslash_not_an_escape(self):
+        self.assertBackwardIncompatibleSql(
+            ["UPDATE t SET p = 'C:\\';\nDROP TABLE x;\nUPDATE t SET p = 'D:\\';"],
+            code="DROP_TABLE",
+        )
+
+    def test_issue_location(self):
+        errors, _, warnings = self.analyse_sql(
+            [
+                'ALTER TABLE "a" DROP COLUMN "col";',
+                "CREATE INDEX idx ON a (col);",
+            ]
+        )
+        self.assertEqual(
+            [("DROP_COLUMN", "a", "col")], [(e.code, e.table, e.column) for e in errors]
+        )
+        self.assertEqual(
+            [("CREATE_INDEX", "a", None)],
+            [(w.code, w.table, w.column) for w in warnings],
+        )
+
 
 class SqlUtilsTestCase(unittest.TestCase):
     def test_unknown_analyser_string(self):
@@ -428,3 +473,193 @@ class SqlUtilsTestCase(unittest.TestCase):
             "Unsupported database vendor 'unknown'. Try specifying an SQL analyser.",
         ):
             get_sql_analyser_class("unknown")
+
+
+class CompiledChecksTestCase(unittest.TestCase):
+    def test_compiled_once_per_exclusion(self):
+        analyser = SqliteAnalyser(["NOT_NULL", "DROP_COLUMN"])
+        same_analyser = SqliteAnalyser(("DROP_COLUMN", "NOT_NULL"))
+        self.assertIs(analyser.compiled_checks, same_analyser.compiled_checks)
+        self.assertIsNot(analyser.compiled_checks, SqliteAnalyser(None).compiled_checks)
+        self.assertIsNot(
+            analyser.compiled_checks,
+            PostgresqlAnalyser(["NOT_NULL", "DROP_COLUMN"]).compiled_checks,
+        )
+
+    def test_checks_partitioned_by_mode(self):
+        analyser = PostgresqlAnalyser(None)
+        self.assertTrue(
+            all(
+                c.mode == CheckMode.ONE_LINER
+                for c in analyser.one_line_migration_checks
+            )
+        )
+        self.assertTrue(
+            all(
+                c.mode == CheckMode.TRANSACTION
+                for c in analyser.transaction_migration_checks
+            )
+        )
+        self.assertEqual(
+            len(analyser.migration_checks),
+            len(analyser.one_line_migration_checks)
+            + len(analyser.transaction_migration_checks),
+        )
+
+    def test_specific_checks_override_base_checks(self):
+        codes = [c.code for c in SqliteAnalyser(None).migration_checks]
+        self.assertEqual(len(codes), len(set(codes)))
+        self.assertEqual([c.code for c in BaseAnalyser.base_migration_checks], codes)
+        drop_table = next(
+            c for c in SqliteAnalyser(None).migration_checks if c.code == "DROP_TABLE"
+        )
+        self.assertEqual(CheckMode.TRANSACTION, drop_table.mode)
+
+    def test_excluded_checks_reported_as_ignored(self):
+        sql = 'ALTER TABLE "t" DROP COLUMN "c";'
+        errors, ignored, _ = analyse_sql_statements(
+            SqliteAnalyser, [sql], exclude_migration_tests=["DROP_COLUMN"]
+        )
+        self.assertEqual([], errors)
+        self.assertEqual(["DROP_COLUMN"], [issue.code for issue in ignored])
+
+        errors, ignored, _ = analyse_sql_statements(
+            SqliteAnalyser,
+            [sql],
+            exclude_migration_tests=["DROP_COLUMN"],
+            report_ignored=False,
+        )
+        self.assertEqual([], errors)
+        self.assertEqual([], ignored)
+        self.assertNotIn(
+            "DROP_COLUMN",
+            [
+                c.code
+                for c in SqliteAnalyser(
+                    ["DROP_COLUMN"], report_ignored=False
+                ).migration_checks
+            ],
+        )
+
+    def test_one_liner_candidates_from_keywords(self):
+        compiled_checks = PostgresqlAnalyser(None).compiled_checks
+        self.assertEqual(
+            (),
+            compiled_checks.get_one_liner_candidates(
+                'CREATE TABLE "t" ("id" integer NOT NULL PRIMARY KEY);'
+            ),
+        )
+        self.assertEqual(
+            ["RENAME_TABLE", "RENAME_COLUMN"],
+            [
+                c.code
+                for c in compiled_checks.get_one_liner_candidates(
+                    'ALTER TABLE "t" RENAME COLUMN "a" TO "b";'
+                )
+            ],
+        )
+        self.assertEqual(
+            ["REINDEX"],
+            [c.code for c in compiled_checks.get_one_liner_candidates("REINDEX t;")],
+        )
+
+    def test_one_liner_candidates_ignore_case_and_whitespaces(self):
+        compiled_checks = PostgresqlAnalyser(None).compiled_checks
+        for statement in (
+            "drop table foo;",
+            "DROP  TABLE foo;",
+            "DROP\n\tTABLE foo;",
+        ):
+            with self.subTest(statement=statement):
+                self.assertIn(
+                    "DROP_TABLE",
+                    [
+                        c.code
+                        for c in compiled_checks.get_one_liner_candidates(statement)
+                    ],
+                )
+        self.assertIn(
+            "DROP_COLUMN",
+            [
+                c.code
+                for c in compiled_checks.get_one_liner_candidates(
+                    "alter table t drop column c;"
+                )
+            ],
+        )
+
+    def test_one_liner_candidates_overlapping_keywords(self):
+        class KeywordsAnalyser(BaseAnalyser):
+            base_migration_checks = []
+            migration_checks = [
+                Check(
+                    code=code,
+                    fn=lambda sql, **kw: True,
+                    message=code,
+                    mode=CheckMode.ONE_LINER,
+                    type=CheckType.WARNING,
+                    keywords=keywords,
+                )
+                for code, keywords in (
+                    ("INDEX", ("INDEX",)),
+                    ("REINDEX", ("REINDEX",)),
+                    ("DEXTER", ("DEXTER",)),
+                    ("ALWAYS", ()),
+                )
+            ]
+
+        compiled_checks = compile_migration_checks(KeywordsAnalyser, frozenset())
+        self.assertEqual(
+            ["INDEX", "REINDEX", "DEXTER", "ALWAYS"],
+            [c.code for c in compiled_checks.get_one_liner_candidates("REINDEXTER")],
+        )
+        self.assertEqual(
+            ["ALWAYS"],
+            [c.code for c in compiled_checks.get_one_liner_candidates("COMMIT;")],
+        )
+
+
+class CheckStatisticsTestCase(unittest.TestCase):
+    def test_counters(self):
+        check_stats = CheckStatistics()
+        analyse_sql_statements(
+            PostgresqlAnalyser,
+            [
+                'ALTER TABLE "a" DROP COLUMN "b";',
+                'ALTER TABLE "a" RENAME COLUMN "c" TO "d";',
+                "COMMIT;",
+            ],
+            check_stats=check_stats,
+        )
+        stats = check_stats.as_dict()
+        # The keywords of the statements select the checks to evaluate.
+        self.assertEqual(1, stats["DROP_COLUMN"]["evaluated"])
+        self.assertEqual(1, stats["DROP_COLUMN"]["matched"])
+        self.assertEqual(1, stats["RENAME_COLUMN"]["evaluated"])
+        self.assertEqual(1, stats["RENAME_COLUMN"]["matched"])
+        self.assertNotIn("DROP_TABLE", stats)
+        self.assertEqual(1, stats["NOT_NULL"]["evaluated"])
+        self.assertEqual(0, stats["NOT_NULL"]["matched"])
+        self.assertGreaterEqual(stats["DROP_COLUMN"]["time"], 0.0)
+        self.assertEqual(stats, json.loads(check_stats.to_json()))
+
+    def test_merge(self):
+        check_stats = CheckStatistics()
+        check_stats.add("DROP_COLUMN", 1.0, matched=True)
+        other = CheckStatistics()
+        other.add("DROP_COLUMN", 2.0, matched=False, evaluated=3)
+        check_stats.merge(other)
+        self.assertEqual(
+            {"DROP_COLUMN": {"evaluated": 4, "matched": 1, "time": 3.0}},
+            check_stats.as_dict(),
+        )
+
+    def test_linter(self):
+        linter = MigrationLinter(no_cache=True, no_output=True)
+        self.assertIsNone(linter.check_stats)
+
+        linter = MigrationLinter(
+            no_cache=True, no_output=True, collect_check_stats=True
+        )
+        linter.lint_all_migrations(app_label="app_add_not_null_column")
+        self.assertEqual(1, linter.check_stats.checks["NOT_NULL"].matched)
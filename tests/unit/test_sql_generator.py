@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import os
+import unittest
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.loader import MigrationLoader
+
+from django_migration_linter import SqlGenerator
+from django_migration_linter.constants import DJANGO_APPS_WITH_MIGRATIONS
+from django_migration_linter.sql_analyser import SqliteAnalyser, analyse_sql_statements
+
+
+class SqlGeneratorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.connection = connections[DEFAULT_DB_ALIAS]
+        self.loader = MigrationLoader(self.connection)
+
+    def test_plan_contains_ancestors_in_order(self):
+        generator = SqlGenerator(
+            self.loader,
+            self.connection,
+            targets=[("app_add_not_null_column", "0002_add_new_not_null_field")],
+        )
+        self.assertEqual(
+            [
+                ("app_add_not_null_column", "0001_create_table"),
+                ("app_add_not_null_column", "0002_add_new_not_null_field"),
+            ],
+            generator.plan,
+        )
+
+    def test_get_sql(self):
+        generator = SqlGenerator(
+            self.loader,
+            self.connection,
+            targets=[("app_add_not_null_column", "0001_create_table")],
+        )
+        sql_statements = generator.get_sql(
+            "app_add_not_null_column", "0001_create_table"
+        )
+        self.assertEqual(sql_statements[0], "BEGIN;")
+        self.assertEqual(sql_statements[-1], "COMMIT;")
+        self.assertTrue(
+            any(sql.startswith("CREATE TABLE") for sql in sql_statements),
+            sql_statements,
+        )
+
+    def test_unknown_target(self):
+        generator = SqlGenerator(
+            self.loader,
+            self.connection,
+            targets=[("app_add_not_null_column", "0001_create_table")],
+        )
+        self.assertNotIn(("app_correct", "0001_initial"), generator)
+        with self.assertRaises(KeyError):
+            generator.get_sql("app_correct", "0001_initial")
+
+    def test_target_sees_its_ancestors_only(self):
+        targets = [
+            ("app_add_not_null_column", "0002_add_new_not_null_field"),
+            ("app_alter_column", "0002_auto_20190414_1456"),
+        ]
+        generator = SqlGenerator(self.loader, self.connection, targets=targets)
+        collect_sql = generator._collect_sql
+        collected_apps = {}
+
+        def collect_sql_spy(migration, state):
+            collected_apps[migration.app_label] = {
+                app_label for app_label, _ in state.models
+            }
+            return collect_sql(migration, state)
+
+        with mock.patch.object(generator, "_collect_sql", collect_sql_spy):
+            for target in targets:
+                generator.get_sql(*target)
+
+        self.assertEqual(
+            {
+                "app_add_not_null_column": {"app_add_not_null_column"},
+                "app_alter_column": {"app_alter_column"},
+            },
+            collected_apps,
+        )
+
+    def test_state_failure_only_affects_its_targets(self):
+        failing_key = ("app_add_not_null_column", "0001_create_table")
+        targets = [
+            ("app_add_not_null_column", "0002_add_new_not_null_field"),
+            ("app_alter_column", "0001_initial"),
+        ]
+        generator = SqlGenerator(self.loader, self.connection, targets=targets)
+        failing_migration = self.loader.graph.nodes[failing_key]
+
+        with mock.patch.object(
+            failing_migration, "mutate_state", side_effect=ValueError("broken")
+        ):
+            with self.assertRaisesRegex(ValueError, "broken"):
+                generator.get_sql(*targets[0])
+            self.assertTrue(generator.get_sql(*targets[1]))
+
+    def test_same_issues_as_sqlmigrate(self):
+        targets = sorted(
+            key
+            for key in self.loader.disk_migrations
+            if key[0] not in DJANGO_APPS_WITH_MIGRATIONS
+        )
+        generator = SqlGenerator(self.loader, self.connection, targets=targets)
+
+        for app_label, migration_name in targets:
+            with self.subTest(app_label=app_label, migration_name=migration_name):
+                try:
+                    with open(os.devnull, "w") as dev_null:
+                        sqlmigrate_sql = call_command(
+                            "sqlmigrate",
+                            app_label,
+                            migration_name,
+                            database=DEFAULT_DB_ALIAS,
+                            stdout=dev_null,
+                        )
+                except ValueError:
+                    # The SQL generation depends on the database state.
+                    with self.assertRaises(ValueError):
+                        generator.get_sql(app_label, migration_name)
+                    continue
+
+                generated_sql = "\n".join(generator.get_sql(app_label, migration_name))
+                self.assertEqual(
+                    analyse_sql_statements(SqliteAnalyser, sqlmigrate_sql.splitlines()),
+                    analyse_sql_statements(SqliteAnalyser, generated_sql.splitlines()),
+                )
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import unittest
+from unittest.mock import patch
+
+from django_migration_linter.sql_analyser.statement import (
+    CHUNK_SIZE,
+    Clause,
+    StatementSplitter,
+    iter_chunks,
+    parse_statement,
+    parse_statements,
+    split_sql,
+    split_sql_statements,
+)
+
+
+class ParseStatementTestCase(unittest.TestCase):
+    def test_alter_table_clauses(self):
+        statement = parse_statement(
+            'ALTER TABLE "app_a" ADD COLUMN "field" integer DEFAULT 1 NOT NULL, '
+            'ALTER COLUMN "other" TYPE varchar(10) USING "other"::varchar(10);'
+        )
+        self.assertEqual("ALTER", statement.verb)
+        self.assertEqual("TABLE", statement.object_kind)
+        self.assertEqual("app_a", statement.table)
+        self.assertEqual("field", statement.column)
+        self.assertEqual(
+            (
+                Clause(
+                    action="ADD COLUMN",
+                    column="field",
+                    flags=frozenset(("DEFAULT", "NOT NULL")),
+                ),
+                Clause(
+                    action="ALTER COLUMN", column="other", flags=frozenset(("TYPE",))
+                ),
+            ),
+            statement.clauses,
+        )
+
+    def test_alter_column_flags(self):
+        for sql, flags in (
+            ('ALTER TABLE "a" ALTER COLUMN "c" SET NOT NULL;', {"NOT NULL"}),
+            ('ALTER TABLE "a" ALTER COLUMN "c" DROP NOT NULL;', {"DROP NOT NULL"}),
+            ("ALTER TABLE `a` ALTER COLUMN `c` SET DEFAULT 'x';", {"DEFAULT"}),
+            ('ALTER TABLE "a" ALTER COLUMN "c" SET DEFAULT NULL;', {"DEFAULT NULL"}),
+            ('ALTER TABLE "a" ALTER COLUMN "c" DROP DEFAULT;', {"DROP DEFAULT"}),
+            ("ALTER TABLE `a` MODIFY `c` varchar(10) NULL;", {"NULL"}),
+        ):
+            with self.subTest(sql=sql):
+                statement = parse_statement(sql)
+                self.assertEqual("a", statement.table)
+                self.assertEqual("c", statement.column)
+                self.assertEqual(flags, statement.flags)
+
+    def test_rename(self):
+        statement = parse_statement('ALTER TABLE "a" RENAME TO "b";')
+        self.assertEqual((Clause(action="RENAME TO", name="b"),), statement.clauses)
+        self.assertIsNone(statement.column)
+
+        statement = parse_statement("ALTER TABLE `a` CHANGE `old` `new` integer NULL;")
+        self.assertEqual("CHANGE", statement.clauses[0].action)
+        self.assertEqual("old", statement.column)
+        self.assertEqual("new", statement.clauses[0].name)
+
+        statement = parse_statement("RENAME TABLE `a` TO `b`;")
+        self.assertEqual(
+            ("RENAME", "TABLE", "a"),
+            (statement.verb, statement.object_kind, statement.table),
+        )
+
+    def test_create_table_columns(self):
+        statement = parse_statement(
+            'CREATE TABLE "a" ("id" integer NOT NULL PRIMARY KEY, '
+            '"b_id" integer NOT NULL REFERENCES "b" ("id"), "c" integer NULL, '
+            'CONSTRAINT "uniq" UNIQUE ("b_id", "c"));'
+        )
+        self.assertEqual("a", statement.table)
+        self.assertIsNone(statement.column)
+        self.assertEqual(
+            [
+                ("COLUMN", "id", {"NOT NULL", "PRIMARY KEY"}),
+                ("COLUMN", "b_id", {"NOT NULL", "REFERENCES"}),
+                ("COLUMN", "c", {"NULL"}),
+                ("CONSTRAINT", None, {"UNIQUE"}),
+            ],
+            [(c.action, c.column, c.flags) for c in statement.clauses],
+        )
+
+    def test_indexes(self):
+        statement = parse_statement(
+            'CREATE UNIQUE INDEX CONCURRENTLY "idx" ON "a" ("c") '
+            'WHERE ("d" IS NOT NULL);'
+        )
+        self.assertEqual(("CREATE", "INDEX"), (statement.verb, statement.object_kind))
+        self.assertEqual(("idx", "a"), (statement.name, statement.table))
+        self.assertEqual({"UNIQUE", "CONCURRENTLY"}, statement.flags)
+
+        statement = parse_statement("CREATE INDEX ON films ((lower(title)));")
+        self.assertEqual((None, "films"), (statement.name, statement.table))
+
+        statement = parse_statement('DROP INDEX CONCURRENTLY IF EXISTS "idx";')
+        self.assertTrue(statement.is_drop("INDEX"))
+        self.assertEqual("idx", statement.name)
+        self.assertIn("CONCURRENTLY", statement.flags)
+
+    def test_keywords_in_quotes_and_comments(self):
+        statement = parse_statement(
+            "-- Drop column DROP COLUMN\n"
+            'UPDATE "a" SET "c" = \'DROP COLUMN; RENAME TO\' /* ; */;'
+        )
+        self.assertEqual("UPDATE", statement.verb)
+        self.assertEqual((), statement.clauses)
+
+    def test_several_statements(self):
+        statements = parse_statements(
+            "CREATE FUNCTION f() RETURNS trigger AS $$ BEGIN RETURN NEW; END; $$ "
+            'LANGUAGE plpgsql; ALTER TABLE "a" DROP COLUMN "c";;'
+        )
+        self.assertEqual(["CREATE", "ALTER"], [s.verb for s in statements])
+        self.assertEqual('ALTER TABLE "a" DROP COLUMN "c";', statements[1].sql)
+        self.assertEqual("DROP COLUMN", statements[1].clauses[0].action)
+
+
+class SplitSqlTestCase(unittest.TestCase):
+    sql = (
+        "--\n-- Add field\n--\nBEGIN;\n"
+        'ALTER TABLE "a"\n    ADD COLUMN "b" integer NULL;\n'
+        'INSERT INTO "a" VALUES (\'x;y\', "c;d", `e;f`); /* g; */\n'
+        "CREATE FUNCTION f() RETURNS trigger AS $body$ BEGIN RETURN NEW; END; "
+        "$body$ LANGUAGE plpgsql;\n"
+        'CREATE TABLE "t" ("c" integer CHECK ("c" > 0));; COMMIT'
+    )
+    statements = [
+        "BEGIN;",
+        'ALTER TABLE "a"\n    ADD COLUMN "b" integer NULL;',
+        'INSERT INTO "a" VALUES (\'x;y\', "c;d", `e;f`);',
+        "CREATE FUNCTION f() RETURNS trigger AS $body$ BEGIN RETURN NEW; END; "
+        "$body$ LANGUAGE plpgsql;",
+        'CREATE TABLE "t" ("c" integer CHECK ("c" > 0));',
+        "COMMIT",
+    ]
+
+    def test_split(self):
+        self.assertEqual(self.statements, list(split_sql((self.sql,))))
+
+    def test_split_chunks(self):
+        for size in (1, 2, 3, 7):
+            with self.subTest(size=size):
+                chunks = (self.sql[i : i + size] for i in range(0, len(self.sql), size))
+                self.assertEqual(self.statements, list(split_sql(chunks)))
+
+    def test_statements_yielded_lazily(self):
+        splitter = StatementSplitter()
+        self.assertEqual([], list(splitter.feed("SELECT 'a;")))
+        self.assertEqual(["SELECT 'a;b';"], list(splitter.feed("b'; SELECT")))
+        self.assertEqual("SELECT", splitter.buffer)
+        self.assertEqual(
+            ["SELECT 1"], list(splitter.feed(" 1")) + list(splitter.close())
+        )
+
+    def test_unterminated_quote(self):
+        # The quote runs to the end of the SQL, like the tokenizer reads it.
+        self.assertEqual(["SELECT 'a; b"], list(split_sql(["SELECT 'a", "; b"])))
+        self.assertEqual(["SELECT 1;"], list(split_sql(["SELECT 1; /* a", "; b"])))
+
+    def test_backslash_not_an_escape_by_default(self):
+        statements = [
+            "UPDATE t SET p = 'C:\\';",
+            "DROP TABLE x;",
+            "UPDATE t SET p = 'D:\\';",
+        ]
+        self.assertEqual(statements, list(split_sql(["\n".join(statements)])))
+
+    def test_backslash_escapes(self):
+        self.assertEqual(
+            ["UPDATE t SET p = 'a\\';b';", "DROP TABLE x;"],
+            list(
+                split_sql(
+                    ["UPDATE t SET p = 'a\\';b';\nDROP TABLE x;"],
+                    backslash_escapes=True,
+                )
+            ),
+        )
+
+    def test_backslash_escapes_in_e_strings(self):
+        sql = "UPDATE t SET p = E'a\\';b';\nDROP TABLE x;"
+        for size in (1, 2, len(sql)):
+            with self.subTest(size=size):
+                chunks = (sql[i : i + size] for i in range(0, len(sql), size))
+                self.assertEqual(
+                    ["UPDATE t SET p = E'a\\';b';", "DROP TABLE x;"],
+                    list(split_sql(chunks)),
+                )
+
+    def test_iter_chunks(self):
+        self.assertEqual(["ab", "cd", "e"], list(iter_chunks("abcde", 2)))
+        self.assertEqual([], list(iter_chunks("")))
+
+    def test_strings_fed_in_chunks(self):
+        statements = ["SELECT 'a;b';", "SELECT 1;"] * (CHUNK_SIZE // 10)
+        with patch.object(
+            StatementSplitter,
+            "feed",
+            autospec=True,
+            side_effect=StatementSplitter.feed,
+        ) as feed_mock:
+            self.assertEqual(
+                statements, list(split_sql_statements(["\n".join(statements)]))
+            )
+        self.assertGreater(feed_mock.call_count, 1)
+        self.assertTrue(
+            all(len(call.args[1]) <= CHUNK_SIZE for call in feed_mock.call_args_list)
+        )
+
+    def test_statements_do_not_span_strings(self):
+        self.assertEqual(
+            ["UPDATE a SET b = 1", "DELETE FROM a;"],
+            list(split_sql_statements(["UPDATE a SET b = 1", "DELETE FROM a;"])),
+        )
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import importlib.util
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from django_migration_linter import MigrationLinter
+from django_migration_linter.sql_analyser import (
+    MySqlAnalyser,
+    PostgresqlAnalyser,
+    SqliteAnalyser,
+    analyse_sql_statements,
+)
+from django_migration_linter.sql_analyser.base import CheckStatistics
+from django_migration_linter.sql_analyser.statement import split_sql_statements
+
+# The inputs are large enough for a quadratic check to exceed the budget by
+# far, and small enough for a linear one to stay well below it.
+SIZE = 100_000
+TIME_BUDGET = 2.0
+
+
+def repeat(text: str, size: int = SIZE) -> str:
+    return text * (size // len(text))
+
+
+ADVERSARIAL_SQL = {
+    "unterminated_comments": "SELECT 1 " + repeat("/* DROP TABLE a; "),
+    "unterminated_quote": "UPDATE a SET b = 'x" + repeat(" DEFAULT 1 NOT NULL;"),
+    "unterminated_identifier": 'ALTER TABLE "a' + repeat(' MODIFY "b" int;'),
+    "backslashes": "SELECT " + repeat("x\\' "),
+    "dollar_tags": "SELECT " + repeat("$a b "),
+    "nested_parentheses": "ALTER TABLE a ADD CONSTRAINT c CHECK "
+    + "(" * (SIZE // 2)
+    + "b > 0"
+    + ")" * (SIZE // 2)
+    + ";",
+    "unbalanced_parentheses": "CREATE TABLE a " + "(" * SIZE,
+    "modify_without_null": "ALTER TABLE a "
+    + repeat("MODIFY b int DEFAULT 'NULL', ")
+    + "MODIFY c int;",
+    "default_then_not_null": "ALTER TABLE a ADD COLUMN b int DEFAULT "
+    + repeat("x ")
+    + "NOT NULL;",
+    "many_clauses": "ALTER TABLE a " + repeat("ADD COLUMN b int NOT NULL, ") + "c;",
+    "many_statements": repeat("CREATE INDEX i ON t (c);"),
+    "semicolons": ";" * SIZE,
+}
+
+RUNPYTHON_TEMPLATE = """\
+def forward(apps, schema_editor):
+{body}
+"""
+
+ADVERSARIAL_RUNPYTHON = {
+    "mismatched_assignments": "".join(
+        f'    Model{i} = apps.get_model("app", "Other{i}")\n'
+        f"    Model{i}.objects.all()\n"
+        for i in range(SIZE // 100)
+    ),
+    "unclosed_get_model_in_string": '    text = "{}"\n    a.objects.all()\n'.format(
+        repeat("Model.objects = apps.get_model(", SIZE)
+    ),
+    "long_line": "    value = [{}]\n".format(repeat("Model.objects.count(), ")),
+    "long_dotted_names": "    value = [{}]\n".format(repeat("a.b.c.d.e.f.g.h, ")),
+    "assignments_on_one_line": "    {}\n".format(
+        repeat("a = apps.get_model('app.B'); ")
+    ),
+}
+
+
+class SqlStressTestCase(unittest.TestCase):
+    def test_checks_time_budget(self):
+        for analyser_class in (PostgresqlAnalyser, MySqlAnalyser, SqliteAnalyser):
+            for name, sql in ADVERSARIAL_SQL.items():
+                with self.subTest(analyser=analyser_class.__name__, sql=name):
+                    check_stats = CheckStatistics()
+                    start = time.perf_counter()
+                    analyse_sql_statements(
+                        analyser_class,
+                        list(split_sql_statements([sql])),
+                        check_stats=check_stats,
+                    )
+                    elapsed = time.perf_counter() - start
+
+                    self.assertLess(elapsed, TIME_BUDGET)
+                    for code, stats in check_stats.as_dict().items():
+                        self.assertLess(stats["time"], TIME_BUDGET, code)
+
+
+class RunPythonStressTestCase(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+
+    def load_function(self, name: str, body: str):
+        path = os.path.join(self.path, f"{name}.py")
+        with open(path, "w") as file:
+            file.write(RUNPYTHON_TEMPLATE.format(body=body))
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module.forward
+
+    def test_checks_time_budget(self):
+        for name, body in ADVERSARIAL_RUNPYTHON.items():
+            function = self.load_function(name, body)
+            for check in (
+                MigrationLinter.get_runpython_model_import_issues,
+                MigrationLinter.get_runpython_model_variable_naming_issues,
+            ):
+                with self.subTest(source=name, check=check.__name__):
+                    start = time.perf_counter()
+                    check(function)
+                    self.assertLess(time.perf_counter() - start, TIME_BUDGET)
+
+    def test_mismatched_assignments(self):
+        function = self.load_function(
+            "mismatched", ADVERSARIAL_RUNPYTHON["mismatched_assignments"]
+        )
+        self.assertEqual(
+            [],
+            MigrationLinter.get_runpython_model_import_issues(function),
+        )
+        self.assertEqual(
+            SIZE // 100,
+            len(MigrationLinter.get_runpython_model_variable_naming_issues(function)),
+        )